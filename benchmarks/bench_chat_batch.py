@@ -0,0 +1,104 @@
+"""
+Benchmark: muchos mensajes de chat con /chat uno a uno vs. /chat/batch.
+
+Envía `--messages` mensajes repartidos en `--sessions` sesiones a la API en
+proceso (ASGI), con un modelo de Gemini simulado y una base SQLite temporal:
+    - "sequential": una llamada HTTP a /chat por mensaje, una tras otra
+      (como el job nocturno y el arnés de QA).
+    - "batch": una sola llamada a /chat/batch con todos los mensajes,
+      leyendo el NDJSON resultante.
+
+Reporta mensajes/s, errores y si el historial de cada sesión quedó en el
+orden enviado. (El transporte ASGI de httpx junta el cuerpo completo, así
+que el envío incremental del NDJSON solo se aprecia contra un servidor real.)
+
+Uso:
+    python -m benchmarks.bench_chat_batch --messages 400 --sessions 40 --concurrency 16
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def run_mode(mode: str, args) -> dict:
+    import httpx
+    from src.infrastructure.api.main import app
+
+    messages = [{"session_id": f"{mode}-{n % args.sessions}", "message": f"zapatillas running {n}"}
+                for n in range(args.messages)]
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        started = time.perf_counter()
+        if mode == "sequential":
+            for body in messages:
+                response = await client.post("/chat", json=body)
+                errors += response.status_code >= 400
+        else:
+            async with client.stream("POST", "/chat/batch", json={"messages": messages}) as response:
+                async for line in response.aiter_lines():
+                    if line:
+                        errors += "status" in json.loads(line)
+        elapsed = time.perf_counter() - started
+
+        ordered = True
+        for s in range(args.sessions):
+            history = (await client.get(f"/chat/history/{mode}-{s}", params={"limit": 50})).json()
+            sent = [m["message"] for m in messages if m["session_id"] == f"{mode}-{s}"]
+            ordered &= [m["message"] for m in history if m["is_user"]] == sent[-25:]
+
+    return {
+        "mode": mode,
+        "messages_per_s": round(args.messages / elapsed, 1),
+        "seconds": round(elapsed, 2),
+        "errors": errors,
+        "session_order_ok": ordered,
+    }
+
+
+async def main(args):
+    from src.infrastructure.api.main import app
+    from src.infrastructure.db.init_data import load_initial_data
+    from benchmarks.common import FakeGenerativeModel, make_gemini_service
+
+    await app.router.startup()
+    load_initial_data()
+    app.state.llm_provider = make_gemini_service(FakeGenerativeModel(base_latency=args.llm_latency, per_token_latency=0))
+    try:
+        modes = ["sequential", "batch"] if args.mode == "both" else [args.mode]
+        results = [await run_mode(mode, args) for mode in modes]
+    finally:
+        await app.router.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'modo':>11} {'mensajes/s':>11} {'seg':>7} {'err':>5} {'orden ok':>9}")
+    for r in results:
+        print(f"{r['mode']:>11} {r['messages_per_s']:>11} {r['seconds']:>7} "
+              f"{r['errors']:>5} {str(r['session_order_ok']):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["sequential", "batch", "both"], default="both")
+    parser.add_argument("--messages", type=int, default=400, help="Mensajes totales")
+    parser.add_argument("--sessions", type=int, default=40, help="Sesiones entre las que se reparten")
+    parser.add_argument("--concurrency", type=int, default=16, help="CHAT_BATCH_CONCURRENCY")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latencia simulada del modelo (s)")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    # Base de datos temporal (se lee de DATABASE_URL al importar la app)
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["CHAT_BATCH_CONCURRENCY"] = str(cli_args.concurrency)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-chat-batch-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    asyncio.run(main(cli_args))
@@ -0,0 +1,125 @@
+"""
+Benchmark: throughput de /chat y /products ejecutándose en paralelo.
+
+Compara el flujo anterior ("before": repositorios síncronos dentro del
+endpoint async de /chat, bloqueando el event loop) con el flujo actual
+("after": AsyncSession + aiosqlite). La API corre en proceso (ASGI) con
+un modelo de Gemini simulado y una base SQLite temporal.
+
+Uso:
+    python -m benchmarks.bench_concurrency --duration 5 --chat-clients 8 --product-clients 4
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def worker(client, method, url, body, stop_at, latencies, errors):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_mode(mode: str, args) -> dict:
+    import httpx
+    from fastapi import Depends
+    from src.infrastructure.api.main import app
+    from src.infrastructure.api.dependencies import get_chat_service, get_llm_provider
+    from src.infrastructure.db.database import SessionLocal
+    from src.infrastructure.repositories.product_repository import SQLProductRepository
+    from src.infrastructure.repositories.chat_repository import SQLChatRepository
+    from src.infrastructure.cache.catalog_cache import catalog_cache
+    from src.infrastructure.search.product_index import product_index
+    from src.application.chat_service import ChatService
+    from benchmarks.common import FakeGenerativeModel, make_gemini_service, percentile
+
+    def legacy_chat_service(gemini_service=Depends(get_llm_provider)):
+        db = SessionLocal()
+        try:
+            yield ChatService(SQLProductRepository(db), SQLChatRepository(db), gemini_service,
+                              catalog_cache, product_index)
+        finally:
+            db.close()
+
+    app.dependency_overrides.clear()
+    if mode == "before":
+        app.dependency_overrides[get_chat_service] = legacy_chat_service
+    app.state.llm_provider = make_gemini_service(FakeGenerativeModel(base_latency=args.llm_latency, per_token_latency=0))
+
+    chat_latencies, product_latencies = [], []
+    chat_errors, product_errors = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        stop_at = time.perf_counter() + args.duration
+        tasks = [
+            worker(client, "POST", "/chat", {"session_id": f"bench-{i}", "message": "zapatillas running"},
+                   stop_at, chat_latencies, chat_errors)
+            for i in range(args.chat_clients)
+        ] + [
+            worker(client, "GET", "/products", None, stop_at, product_latencies, product_errors)
+            for _ in range(args.product_clients)
+        ]
+        await asyncio.gather(*tasks)
+
+    app.dependency_overrides.clear()
+    return {
+        "mode": mode,
+        "chat_rps": round(len(chat_latencies) / args.duration, 1),
+        "chat_p50_ms": round(percentile(chat_latencies, 0.50), 2),
+        "chat_p95_ms": round(percentile(chat_latencies, 0.95), 2),
+        "chat_errors": len(chat_errors),
+        "products_rps": round(len(product_latencies) / args.duration, 1),
+        "products_p50_ms": round(percentile(product_latencies, 0.50), 2),
+        "products_p95_ms": round(percentile(product_latencies, 0.95), 2),
+        "products_errors": len(product_errors),
+    }
+
+
+async def main(args):
+    from src.infrastructure.api.main import app
+    from src.infrastructure.db.init_data import load_initial_data
+
+    await app.router.startup()
+    load_initial_data()
+    try:
+        modes = ["before", "after"] if args.mode == "both" else [args.mode]
+        results = [await run_mode(mode, args) for mode in modes]
+    finally:
+        await app.router.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'modo':>7} {'chat rps':>9} {'p50':>8} {'p95':>8} {'err':>5} "
+          f"{'products rps':>13} {'p50':>8} {'p95':>8} {'err':>5}")
+    for r in results:
+        print(f"{r['mode']:>7} {r['chat_rps']:>9} {r['chat_p50_ms']:>8} {r['chat_p95_ms']:>8} {r['chat_errors']:>5} "
+              f"{r['products_rps']:>13} {r['products_p50_ms']:>8} {r['products_p95_ms']:>8} {r['products_errors']:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["before", "after", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por modo")
+    parser.add_argument("--chat-clients", type=int, default=8)
+    parser.add_argument("--product-clients", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Latencia simulada del modelo (s)")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    # Base de datos temporal (se lee de DATABASE_URL al importar la app)
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-concurrency-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    asyncio.run(main(cli_args))
@@ -0,0 +1,86 @@
+"""
+Benchmark: tamaño del prompt y latencia a lo largo de una conversación larga.
+
+Compara el contexto sin presupuesto (últimos 6 mensajes completos, sin
+importar su largo) con el PromptBudget + resumen acumulado, en una sesión
+con turnos largos.
+
+Uso:
+    python -m benchmarks.bench_long_conversation --turns 60 --budget 1500
+"""
+import time
+import json
+import asyncio
+import argparse
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.search.product_index import ProductIndex
+from src.infrastructure.llm_providers.prompt_budget import PromptBudget
+from benchmarks.common import (
+    SAMPLE_QUERIES,
+    FakeGenerativeModel,
+    InMemoryChatRepository,
+    InMemoryChatSummaryRepository,
+    InMemoryProductRepository,
+    make_catalog,
+    make_gemini_service,
+)
+
+
+class LongAnswerModel(FakeGenerativeModel):
+    """Modelo falso que responde con textos largos (como un asistente verboso)."""
+    RESPONSE = " ".join(["Te recomiendo revisar estas opciones de nuestro catálogo."] * 25)
+
+
+async def run_case(budget: int, args) -> dict:
+    model = LongAnswerModel(base_latency=0.002, per_token_latency=0.00002, chunk_delay=0)
+    service = ChatService(
+        InMemoryProductRepository(make_catalog(args.catalog)),
+        InMemoryChatRepository(),
+        make_gemini_service(model),
+        CatalogCache(),
+        ProductIndex(),
+        prompt_budget=PromptBudget(max_tokens=budget) if budget else None,
+        summary_repo=InMemoryChatSummaryRepository(),
+    )
+    latencies = []
+    for turn in range(args.turns):
+        message = SAMPLE_QUERIES[turn % len(SAMPLE_QUERIES)] + " " + "con detalles adicionales " * args.user_words
+        start = time.perf_counter()
+        await service.process_user_message(ChatMessageRequestDTO(session_id="larga", message=message[:1000]))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    tokens = list(model.prompt_tokens)
+    quarter = max(1, len(tokens) // 4)
+    return {
+        "budget": budget or "sin presupuesto",
+        "tokens_first_quarter": round(sum(tokens[:quarter]) / quarter),
+        "tokens_last_quarter": round(sum(tokens[-quarter:]) / quarter),
+        "max_tokens": max(tokens),
+        "latency_first_quarter_ms": round(sum(latencies[:quarter]) / quarter, 2),
+        "latency_last_quarter_ms": round(sum(latencies[-quarter:]) / quarter, 2),
+    }
+
+
+async def main(args):
+    results = [await run_case(0, args), await run_case(args.budget, args)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'presupuesto':>16} {'tokens 1er 25%':>15} {'tokens últ. 25%':>16} {'máx':>6} "
+          f"{'ms 1er 25%':>11} {'ms últ. 25%':>12}")
+    for r in results:
+        print(f"{str(r['budget']):>16} {r['tokens_first_quarter']:>15} {r['tokens_last_quarter']:>16} "
+              f"{r['max_tokens']:>6} {r['latency_first_quarter_ms']:>11} {r['latency_last_quarter_ms']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=1500, help="Tokens máximos del prompt")
+    parser.add_argument("--catalog", type=int, default=500)
+    parser.add_argument("--user-words", type=int, default=20, help="Largo extra de cada mensaje del usuario")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,135 @@
+"""
+Benchmark: memoria y asignaciones al cargar el catálogo y el historial.
+
+Carga `--products` productos y `--messages` mensajes de chat desde una base
+SQLite temporal y compara dos formas de hidratar las entidades:
+    - "orm": objetos ORM (con identity map) copiados campo a campo a
+      dataclasses con __dict__ (la ruta anterior de los repositorios).
+    - "core": filas de SQLAlchemy Core convertidas directamente a las
+      entidades con __slots__ (la ruta actual).
+
+Reporta por dataset y ruta: segundos, pico de memoria durante la carga,
+memoria retenida por la lista de entidades y bytes por entidad (tracemalloc).
+
+Uso:
+    python -m benchmarks.bench_memory --products 100000 --messages 1000000
+"""
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def dict_twin(cls):
+    """Copia de una entidad sin __slots__ (con __dict__ por instancia), como antes."""
+    namespace = {"__annotations__": {f.name: f.type for f in fields(cls)}, "__post_init__": cls.__post_init__}
+    return dataclass(type(f"Dict{cls.__name__}", (), namespace))
+
+
+def seed(engine, products: int, messages: int, chunk: int = 10000) -> None:
+    from sqlalchemy import insert
+    from src.infrastructure.db.models import ChatMemoryModel, ProductModel
+    from benchmarks.common import make_catalog
+
+    with engine.begin() as conn:
+        rows = [{f.name: getattr(p, f.name) for f in fields(p)} for p in make_catalog(products)]
+        for i in range(0, len(rows), chunk):
+            conn.execute(insert(ProductModel), rows[i:i + chunk])
+
+        start = datetime(2025, 1, 1)
+        for i in range(0, messages, chunk):
+            conn.execute(insert(ChatMemoryModel), [
+                {"session_id": f"s{n % 1000}", "role": "user" if n % 2 == 0 else "assistant",
+                 "message": f"Mensaje {n} sobre zapatillas de running", "timestamp": start + timedelta(seconds=n)}
+                for n in range(i, min(i + chunk, messages))
+            ])
+
+
+def measure(load) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    entities = load()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(entities)
+    del entities
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 2),
+        "peak_mb": round(peak / 2**20, 1),
+        "retained_mb": round(retained / 2**20, 1),
+        "bytes_per_entity": round(retained / count) if count else 0,
+    }
+
+
+def run(args) -> list:
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import sessionmaker
+    from src.domain.entities import ChatMessage, Product
+    from src.infrastructure.db.database import Base
+    from src.infrastructure.db.models import ChatMemoryModel, ProductModel
+    from src.infrastructure.repositories.chat_repository import CHAT_MESSAGE_COLUMNS, rows_to_messages
+    from src.infrastructure.repositories.product_repository import products_query, rows_to_products
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-memory-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    seed(engine, args.products, args.messages)
+    Session = sessionmaker(bind=engine)
+
+    def orm_loader(model, entity_cls):
+        names = [f.name for f in fields(entity_cls)]
+
+        def load():
+            with Session() as db:
+                return [entity_cls(*(getattr(m, n) for n in names)) for m in db.execute(select(model)).scalars().all()]
+        return load
+
+    def core_loader(stmt, convert):
+        def load():
+            with Session() as db:
+                return convert(db.execute(stmt))
+        return load
+
+    cases = [
+        ("products", "orm", orm_loader(ProductModel, dict_twin(Product))),
+        ("products", "core", core_loader(products_query(), rows_to_products)),
+        ("chat_messages", "orm", orm_loader(ChatMemoryModel, dict_twin(ChatMessage))),
+        ("chat_messages", "core", core_loader(select(*CHAT_MESSAGE_COLUMNS), rows_to_messages)),
+    ]
+    results = [{"dataset": dataset, "path": path_name, **measure(load)} for dataset, path_name, load in cases]
+    engine.dispose()
+    return results
+
+
+def main(args):
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'dataset':>14} {'ruta':>5} {'filas':>9} {'seg':>7} {'pico MB':>9} {'retenido MB':>12} {'bytes/entidad':>14}")
+    for r in results:
+        print(f"{r['dataset']:>14} {r['path']:>5} {r['rows']:>9} {r['seconds']:>7} "
+              f"{r['peak_mb']:>9} {r['retained_mb']:>12} {r['bytes_per_entity']:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100000, help="Productos a cargar")
+    parser.add_argument("--messages", type=int, default=1000000, help="Mensajes de chat a cargar")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    main(cli_args)
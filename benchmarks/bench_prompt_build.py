@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: costo de armar el prompt con 10, 1k y 10k productos.
+
+Compara la construcción anterior (f-string + formateo de todos los
+productos en cada turno) con PromptBuilder en frío (primera llamada de
+una versión de catálogo) y en caliente (bloque cacheado).
+
+Uso:
+    python -m benchmarks.bench_prompt_build --sizes 10 1000 10000 --repeat 200
+"""
+import json
+import argparse
+import timeit
+from datetime import datetime
+
+from src.domain.entities import ChatContext, ChatMessage
+from src.infrastructure.llm_providers.prompt_builder import PromptBuilder
+from benchmarks.common import make_catalog
+
+
+def legacy_build_prompt(user_message, products, context):
+    """Copia de la construcción del prompt previa a PromptBuilder."""
+    formatted = []
+    for p in products:
+        formatted.append(
+            f"- {p.name} | {p.brand} | ${p.price:.2f} | Talla: {p.size} | Stock: {p.stock}"
+        )
+    products_info = "\n".join(formatted)
+    context_text = context.format_for_prompt() if context else ""
+    return f"""
+Eres un asistente virtual experto en ventas de zapatos para un e-commerce.
+Tu objetivo es ayudar a los clientes a encontrar los zapatos perfectos.
+
+PRODUCTOS DISPONIBLES:
+{products_info}
+
+INSTRUCCIONES:
+- Sé amigable y profesional
+- Usa el contexto de la conversación anterior
+- Recomienda productos específicos cuando sea apropiado
+- Menciona precios, tallas y disponibilidad
+- Si no tienes información, sé honesto
+
+HISTORIAL DE CONVERSACIÓN:
+{context_text}
+
+Usuario: {user_message}
+
+Asistente:
+"""
+
+
+def per_call_us(fn, repeat: int) -> float:
+    return round(min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat * 1e6, 2)
+
+
+def main(args):
+    context = ChatContext(messages=[
+        ChatMessage(id=i, session_id="bench", role="user" if i % 2 else "assistant",
+                    message=f"Mensaje de prueba número {i}", timestamp=datetime.utcnow())
+        for i in range(6)
+    ])
+    message = "¿Qué zapatillas de running tienen en talla 42?"
+
+    results = []
+    for size in args.sizes:
+        products = tuple(make_catalog(size))
+        builder = PromptBuilder()
+        repeat = max(1, args.repeat * 10 // max(size, 10))
+
+        assert builder.build(message, products, context, catalog_version=1) == legacy_build_prompt(message, products, context)
+
+        version = iter(range(2, 10 ** 9))
+        results.append({
+            "products": size,
+            "legacy_us": per_call_us(lambda: legacy_build_prompt(message, products, context), repeat),
+            "builder_cold_us": per_call_us(lambda: builder.build(message, products, context, next(version)), repeat),
+            "builder_warm_us": per_call_us(lambda: builder.build(message, products, context, 1), repeat),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'productos':>10} {'anterior µs':>12} {'frío µs':>10} {'caliente µs':>12}")
+    for r in results:
+        print(f"{r['products']:>10} {r['legacy_us']:>12} {r['builder_cold_us']:>10} {r['builder_warm_us']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=200, help="Llamadas por medición (se ajusta según el tamaño)")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    main(parser.parse_args())
@@ -0,0 +1,81 @@
+"""
+Benchmark: tamaño del prompt y latencia extremo a extremo según el catálogo.
+
+Compara enviar el catálogo completo al modelo contra enviar solo los
+top-K productos del índice BM25.
+
+Uso:
+    python -m benchmarks.bench_retrieval --sizes 10 100 1000 5000 --turns 20
+"""
+import time
+import json
+import asyncio
+import argparse
+import statistics
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.search.product_index import ProductIndex
+from benchmarks.common import (
+    SAMPLE_QUERIES,
+    FakeGenerativeModel,
+    InMemoryChatRepository,
+    InMemoryProductRepository,
+    make_catalog,
+    make_gemini_service,
+)
+
+
+async def run_case(size: int, turns: int, use_index: bool, top_k: int, model_kwargs: dict) -> dict:
+    model = FakeGenerativeModel(**model_kwargs)
+    service = ChatService(
+        InMemoryProductRepository(make_catalog(size)),
+        InMemoryChatRepository(),
+        make_gemini_service(model),
+        CatalogCache(),
+        ProductIndex() if use_index else None,
+        top_k=top_k,
+    )
+
+    latencies = []
+    for i in range(turns):
+        request = ChatMessageRequestDTO(session_id=f"bench-{i % 4}", message=SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+        start = time.perf_counter()
+        await service.process_user_message(request)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "catalog_size": size,
+        "mode": f"top-{top_k}" if use_index else "full",
+        "avg_prompt_tokens": round(statistics.mean(model.prompt_tokens)),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+async def main(args):
+    model_kwargs = {"base_latency": args.base_latency, "per_token_latency": args.per_token_latency}
+    results = []
+    for size in args.sizes:
+        for use_index in (False, True):
+            results.append(await run_case(size, args.turns, use_index, args.top_k, model_kwargs))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'catálogo':>9} {'modo':>7} {'tokens':>9} {'p50 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['catalog_size']:>9} {r['mode']:>7} {r['avg_prompt_tokens']:>9} {r['p50_ms']:>9} {r['max_ms']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--base-latency", type=float, default=0.05, help="Segundos fijos por llamada al modelo")
+    parser.add_argument("--per-token-latency", type=float, default=0.00002, help="Segundos por token de entrada")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,148 @@
+"""
+Benchmark: costo por fila de las respuestas de /products y /chat/history.
+
+Compara dos rutas de lectura sobre una base SQLite en memoria:
+    - "orm": objetos ORM -> entidad -> DTO de pydantic -> revalidación de
+      `response_model` -> json (la ruta anterior de FastAPI).
+    - "core": filas de SQLAlchemy Core -> dicts planos -> orjson (la ruta
+      actual de los endpoints).
+
+Reporta microsegundos por fila de la lectura completa y solo de la
+serialización (desde los objetos ya leídos hasta los bytes JSON).
+
+Uso:
+    python -m benchmarks.bench_serialization --rows 200 --repeat 200
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _per_row_us(fn, repeat: int, rows: int) -> float:
+    fn()  # Calentamiento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat / rows * 1e6, 2)
+
+
+def run(args) -> List[dict]:
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from src.application.dtos import ProductDTO, ChatHistoryDTO
+    from src.domain.entities import ChatMessage, ProductQuery
+    from src.infrastructure.db.database import Base
+    from src.infrastructure.db.models import ChatMemoryModel, ProductModel
+    from src.infrastructure.repositories.chat_repository import SQLChatRepository
+    from src.infrastructure.repositories.product_repository import (
+        SQLProductRepository,
+        build_product_page,
+        product_search_query,
+    )
+    from benchmarks.common import make_catalog
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    products_repo = SQLProductRepository(db)
+    for product in make_catalog(args.rows):
+        product.id = None
+        products_repo.save(product)
+    chat_repo = SQLChatRepository(db)
+    start = datetime(2025, 1, 1)
+    for i in range(args.rows):
+        chat_repo.save_message(ChatMessage(id=None, session_id="s1", role="user" if i % 2 == 0 else "assistant",
+                                           message=f"Mensaje {i} sobre zapatillas de running", timestamp=start + timedelta(seconds=i)))
+
+    products_adapter = TypeAdapter(List[ProductDTO])
+    history_adapter = TypeAdapter(List[ChatHistoryDTO])
+    query = ProductQuery(limit=args.rows)
+
+    def respond_validated(adapter, dtos):
+        # Lo que hace FastAPI con `response_model`: valida de nuevo y serializa
+        return JSONResponse(adapter.dump_python(adapter.validate_python(dtos), mode="json")).body
+
+    def products_orm_dtos():
+        models = db.execute(select(ProductModel).order_by(ProductModel.id).limit(args.rows)).scalars().all()
+        db.expunge_all()
+        return [ProductDTO.from_entity(products_repo._model_to_entity(m)) for m in models]
+
+    def history_orm_dtos():
+        models = db.execute(
+            select(ChatMemoryModel).where(ChatMemoryModel.session_id == "s1")
+            .order_by(ChatMemoryModel.timestamp.desc(), ChatMemoryModel.id.desc()).limit(args.rows)
+        ).scalars().all()
+        db.expunge_all()
+        return [ChatHistoryDTO.from_entity(chat_repo._model_to_entity(m)) for m in reversed(models)]
+
+    def products_core_items():
+        return build_product_page(db.execute(product_search_query(query)), query).items
+
+    def history_core_items():
+        return [ChatHistoryDTO.payload(m) for m in chat_repo.get_session_history("s1", args.rows)]
+
+    product_dtos, history_dtos = products_orm_dtos(), history_orm_dtos()
+    product_items, history_items = products_core_items(), history_core_items()
+    assert json.loads(respond_validated(products_adapter, product_dtos)) == json.loads(ORJSONResponse(product_items).body)
+    assert json.loads(respond_validated(history_adapter, history_dtos)) == json.loads(ORJSONResponse(history_items).body)
+
+    cases = {
+        "products": {
+            "orm": (lambda: respond_validated(products_adapter, products_orm_dtos()),
+                    lambda: respond_validated(products_adapter, product_dtos)),
+            "core": (lambda: ORJSONResponse(products_core_items()).body,
+                     lambda: ORJSONResponse(product_items).body),
+        },
+        "chat_history": {
+            "orm": (lambda: respond_validated(history_adapter, history_orm_dtos()),
+                    lambda: respond_validated(history_adapter, history_dtos)),
+            "core": (lambda: ORJSONResponse(history_core_items()).body,
+                     lambda: ORJSONResponse(history_items).body),
+        },
+    }
+
+    results = []
+    for endpoint, paths in cases.items():
+        for path, (full, serialize_only) in paths.items():
+            results.append({
+                "endpoint": endpoint,
+                "path": path,
+                "rows": args.rows,
+                "total_us_per_row": _per_row_us(full, args.repeat, args.rows),
+                "serialize_us_per_row": _per_row_us(serialize_only, args.repeat, args.rows),
+            })
+    db.close()
+    engine.dispose()
+    return results
+
+
+def main(args):
+    results = run(args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'endpoint':>13} {'ruta':>5} {'filas':>6} {'total µs/fila':>14} {'serialización µs/fila':>22}")
+    for r in results:
+        print(f"{r['endpoint']:>13} {r['path']:>5} {r['rows']:>6} "
+              f"{r['total_us_per_row']:>14} {r['serialize_us_per_row']:>22}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="Filas por respuesta")
+    parser.add_argument("--repeat", type=int, default=200, help="Repeticiones por medición")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    main(cli_args)
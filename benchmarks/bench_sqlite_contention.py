@@ -0,0 +1,118 @@
+"""
+Benchmark: contención de lectura/escritura en SQLite.
+
+Varios hilos escriben mensajes de chat mientras otros leen el historial y
+el catálogo, sobre una base SQLite temporal. Compara los valores por
+defecto de SQLite ("default": journal DELETE, synchronous FULL) con el
+perfil de producción de `database.py` ("tuned": WAL, synchronous NORMAL,
+mmap, cache y busy_timeout).
+
+Uso:
+    python -m benchmarks.bench_sqlite_contention --duration 5 --writers 4 --readers 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_profile(profile: str, args) -> dict:
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from src.domain.entities import ChatMessage
+    from src.infrastructure.db.database import Base, apply_sqlite_pragmas
+    from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+    from src.infrastructure.repositories.chat_repository import SQLChatRepository
+    from src.infrastructure.repositories.product_repository import SQLProductRepository
+    from benchmarks.common import make_catalog, percentile
+
+    path = os.path.join(tempfile.mkdtemp(prefix=f"bench-sqlite-{profile}-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           pool_size=args.writers + args.readers)
+    if profile == "tuned":
+        event.listen(engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        repo = SQLProductRepository(db)
+        for product in make_catalog(args.products):
+            repo.save(product)
+
+    write_latencies, read_latencies, errors = [], [], []
+    stop_at = time.perf_counter() + args.duration
+
+    def writer(i):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    SQLChatRepository(db).save_message(ChatMessage(
+                        id=None, session_id=f"s{i}", role="user",
+                        message="zapatillas running", timestamp=datetime.utcnow()))
+            except Exception as e:
+                errors.append(type(e).__name__)
+                continue
+            write_latencies.append((time.perf_counter() - start) * 1000)
+
+    def reader(i):
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    SQLChatRepository(db).get_session_history(f"s{i % args.writers}", limit=20)
+                    SQLProductRepository(db).get_all()
+            except Exception as e:
+                errors.append(type(e).__name__)
+                continue
+            read_latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes_per_s": round(len(write_latencies) / args.duration, 1),
+        "write_p95_ms": round(percentile(write_latencies, 0.95), 2),
+        "reads_per_s": round(len(read_latencies) / args.duration, 1),
+        "read_p95_ms": round(percentile(read_latencies, 0.95), 2),
+        "errors": len(errors),
+    }
+
+
+def main(args):
+    profiles = ["default", "tuned"] if args.profile == "both" else [args.profile]
+    results = [run_profile(profile, args) for profile in profiles]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'perfil':>8} {'escrituras/s':>13} {'p95':>8} {'lecturas/s':>11} {'p95':>8} {'err':>5}")
+    for r in results:
+        print(f"{r['profile']:>8} {r['writes_per_s']:>13} {r['write_p95_ms']:>8} "
+              f"{r['reads_per_s']:>11} {r['read_p95_ms']:>8} {r['errors']:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=["default", "tuned", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por perfil")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--products", type=int, default=200, help="Tamaño del catálogo")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    main(cli_args)
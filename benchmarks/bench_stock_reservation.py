@@ -0,0 +1,139 @@
+"""
+Benchmark: reservas de stock concurrentes (checkouts).
+
+Varios hilos hacen checkouts de 1 a 3 productos sobre un catálogo chico
+(mucha contención por fila) en una base SQLite temporal con el perfil de
+producción. Compara:
+    - "rmw": leer el producto, `Product.reduce_stock` y `save` por ítem
+      (leer-modificar-escribir, la única forma disponible antes).
+    - "conditional": `SQLProductRepository.adjust_stock`, un UPDATE
+      condicional por ítem y un solo commit por checkout.
+
+Reporta checkouts/s, p95, checkouts rechazados por stock, errores y
+unidades sobrevendidas (vendidas según los checkouts exitosos menos las
+que realmente salieron del stock; > 0 indica actualizaciones perdidas).
+
+Uso:
+    python -m benchmarks.bench_stock_reservation --duration 5 --workers 8
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_mode(mode: str, args) -> dict:
+    from sqlalchemy import create_engine, event, func, select
+    from sqlalchemy.orm import sessionmaker
+    from src.domain.entities import StockAdjustment
+    from src.infrastructure.db.database import Base, apply_sqlite_pragmas
+    from src.infrastructure.db.models import ProductModel
+    from src.infrastructure.repositories.product_repository import SQLProductRepository
+    from benchmarks.common import make_catalog, percentile
+
+    path = os.path.join(tempfile.mkdtemp(prefix=f"bench-stock-{mode}-"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False},
+                           pool_size=args.workers)
+    event.listen(engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        catalog = make_catalog(args.products)
+        for product in catalog:
+            product.stock = args.stock
+        SQLProductRepository(db).bulk_upsert(catalog)
+        initial = db.execute(select(func.sum(ProductModel.stock))).scalar()
+
+    latencies, errors = [], []
+    sold = rejected = 0
+    counter_lock = threading.Lock()
+    stop_at = time.perf_counter() + args.duration
+
+    def checkout_rmw(db, items):
+        repo = SQLProductRepository(db)
+        products = [repo.get_by_id(product_id) for product_id, _ in items]
+        if any(p.stock < qty for p, (_, qty) in zip(products, items)):
+            return False
+        for product, (_, qty) in zip(products, items):
+            product.reduce_stock(qty)
+            repo.save(product)
+        return True
+
+    def checkout_conditional(db, items):
+        results = SQLProductRepository(db).adjust_stock([StockAdjustment(pid, qty) for pid, qty in items])
+        return all(r.ok for r in results)
+
+    checkout = checkout_rmw if mode == "rmw" else checkout_conditional
+
+    def worker(seed):
+        nonlocal sold, rejected
+        rng = random.Random(seed)
+        while time.perf_counter() < stop_at:
+            product_ids = rng.sample(range(1, args.products + 1), rng.randint(1, 3))
+            items = [(pid, rng.randint(1, 2)) for pid in sorted(product_ids)]
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    ok = checkout(db, items)
+            except Exception as e:
+                errors.append(type(e).__name__)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            with counter_lock:
+                if ok:
+                    sold += sum(qty for _, qty in items)
+                else:
+                    rejected += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with Session() as db:
+        final = db.execute(select(func.sum(ProductModel.stock))).scalar()
+    engine.dispose()
+
+    return {
+        "mode": mode,
+        "checkouts_per_s": round(len(latencies) / args.duration, 1),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "rejected": rejected,
+        "errors": len(errors),
+        "oversold_units": sold - (initial - final),
+    }
+
+
+def main(args):
+    modes = ["rmw", "conditional"] if args.mode == "both" else [args.mode]
+    results = [run_mode(mode, args) for mode in modes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'modo':>12} {'checkouts/s':>12} {'p95':>8} {'rechazados':>11} {'err':>5} {'sobreventa':>11}")
+    for r in results:
+        print(f"{r['mode']:>12} {r['checkouts_per_s']:>12} {r['p95_ms']:>8} "
+              f"{r['rejected']:>11} {r['errors']:>5} {r['oversold_units']:>11}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["rmw", "conditional", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por modo")
+    parser.add_argument("--workers", type=int, default=8, help="Checkouts concurrentes")
+    parser.add_argument("--products", type=int, default=20, help="Productos (pocos = más contención)")
+    parser.add_argument("--stock", type=int, default=500, help="Stock inicial por producto")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    main(cli_args)
@@ -0,0 +1,149 @@
+"""
+Benchmark: chat por POST /chat vs. WebSocket /ws/chat/{session_id}.
+
+Lanza uvicorn en un subproceso (modelo falso, base SQLite temporal) y
+durante `--duration` segundos `--clients` clientes conversan, cada uno en su
+propia sesión y enviando el siguiente mensaje al recibir la respuesta:
+    - "post": un POST /chat por mensaje (HTTP keep-alive), como el widget.
+    - "ws": una conexión WebSocket por cliente; cada respuesta llega como
+      tokens y termina con el frame `done`.
+
+Reporta mensajes/s, latencia p50/p95 de la respuesta completa y, para el
+WebSocket, el tiempo hasta el primer token.
+
+Uso:
+    python -m benchmarks.bench_websocket_chat --duration 10 --clients 16
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGES = ["Hola", "Busco zapatillas de running", "¿Tienen Nike negras talla 42?", "¿Y en blanco?", "Gracias"]
+
+
+async def post_client(base_url: str, client_id: int, stop_at: float, latencies: list, first_tokens: list, errors: list):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        n = 0
+        while time.perf_counter() < stop_at:
+            body = {"session_id": f"post-{client_id}", "message": MESSAGES[n % len(MESSAGES)]}
+            start = time.perf_counter()
+            response = await client.post("/chat", json=body)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+            n += 1
+
+
+async def ws_client(base_url: str, client_id: int, stop_at: float, latencies: list, first_tokens: list, errors: list):
+    import websockets
+
+    url = base_url.replace("http://", "ws://") + f"/ws/chat/ws-{client_id}"
+    async with websockets.connect(url, max_size=None) as ws:
+        assert json.loads(await ws.recv())["type"] == "ready"
+        n = 0
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            first = None
+            await ws.send(json.dumps({"id": n, "message": MESSAGES[n % len(MESSAGES)]}))
+            while True:
+                frame = json.loads(await ws.recv())
+                if frame["type"] == "token" and first is None:
+                    first = time.perf_counter()
+                elif frame["type"] == "ping":
+                    await ws.send(json.dumps({"type": "pong"}))
+                elif frame["type"] == "error":
+                    errors.append(frame["status"])
+                    break
+                elif frame["type"] == "done":
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    first_tokens.append((first - start) * 1000)
+                    break
+            n += 1
+
+
+async def run_mode(mode: str, base_url: str, args) -> dict:
+    from benchmarks.common import percentile
+
+    latencies, first_tokens, errors = [], [], []
+    client = post_client if mode == "post" else ws_client
+    stop_at = time.perf_counter() + args.duration
+    await asyncio.gather(*(client(base_url, i, stop_at, latencies, first_tokens, errors) for i in range(args.clients)))
+    return {
+        "mode": mode,
+        "messages_per_s": round(len(latencies) / args.duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "first_token_p50_ms": round(percentile(first_tokens, 0.50), 2) if first_tokens else None,
+        "errors": len(errors),
+    }
+
+
+def main(args):
+    import httpx
+    from src.infrastructure.db.database import init_db
+    from src.infrastructure.db.init_data import load_initial_data
+
+    init_db()
+    load_initial_data()
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.infrastructure.api.main:app",
+         "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn no respondió en /health")
+        modes = ["post", "ws"] if args.mode == "both" else [args.mode]
+        results = [asyncio.run(run_mode(mode, base_url, args)) for mode in modes]
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'modo':>5} {'mensajes/s':>11} {'p50':>8} {'p95':>8} {'primer token p50':>17} {'err':>5}")
+    for r in results:
+        print(f"{r['mode']:>5} {r['messages_per_s']:>11} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{str(r['first_token_p50_ms']):>17} {r['errors']:>5}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["post", "ws", "both"], default="both")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por modo")
+    parser.add_argument("--clients", type=int, default=16, help="Conversaciones simultáneas")
+    parser.add_argument("--port", type=int, default=8766, help="Puerto del uvicorn local")
+    parser.add_argument("--llm-concurrency", type=int, default=64,
+                        help="LLM_MAX_CONCURRENCY (alto para medir el costo por mensaje y no la cola del pool)")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Latencia simulada del modelo")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=200.0, help="Ritmo de salida del modelo")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    # La configuración se lee de variables de entorno al importar la app
+    sys.path.insert(0, ROOT)
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["LLM_MAX_CONCURRENCY"] = str(cli_args.llm_concurrency)
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(cli_args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SEC"] = str(cli_args.llm_tokens_per_sec)
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench-websocket-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    main(cli_args)
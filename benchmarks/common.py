@@ -0,0 +1,173 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Incluye un generador de catálogos sintéticos, repositorios en memoria y un
+`GeminiService` con el modelo falso de `fake_provider`, de modo que los
+benchmarks corren sin red ni API key.
+"""
+import random
+from typing import Dict, List, Optional
+
+from src.domain.entities import Product, ProductQuery, ProductPage, ChatMessage, ChatSummary, StockResult
+from src.domain.repositories import IProductRepository, IChatRepository, IAsyncChatSummaryRepository
+from src.infrastructure.llm_providers.fake_provider import FakeGenerativeModel, estimate_tokens  # noqa: F401
+
+BRANDS = ["Nike", "Adidas", "Puma", "Reebok", "Converse", "Timberland", "Vans",
+          "New Balance", "Under Armour", "Fila", "Asics", "Salomon"]
+CATEGORIES = ["Running", "Casual", "Formal", "Deportivo", "Trail", "Basketball"]
+COLORS = ["Negro", "Blanco", "Gris", "Azul", "Rojo", "Marrón", "Verde"]
+MODELS = ["Pegasus", "Ultraboost", "Ignite", "Classic", "Chuck", "Boot", "Old Skool",
+          "574", "HOVR", "Disruptor", "Gel Kayano", "Speedcross", "Air Max", "Gazelle"]
+ADJECTIVES = ["ligeras", "resistentes", "cómodas", "elegantes", "impermeables", "retro"]
+
+SAMPLE_QUERIES = [
+    "¿Qué zapatillas de running tienen?",
+    "Busco unas Nike negras talla 42",
+    "Necesito botas formales marrones",
+    "¿Tienen algo casual en blanco?",
+    "Quiero zapatillas de trail impermeables",
+]
+
+
+def make_catalog(size: int, seed: int = 42) -> List[Product]:
+    """Genera un catálogo sintético reproducible de `size` productos."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(1, size + 1):
+        brand = rng.choice(BRANDS)
+        category = rng.choice(CATEGORIES)
+        color = rng.choice(COLORS)
+        products.append(Product(
+            id=i,
+            name=f"{brand} {rng.choice(MODELS)} {i}",
+            brand=brand,
+            category=category,
+            size=str(rng.randint(36, 46)),
+            color=color,
+            price=round(rng.uniform(40, 250), 2),
+            stock=rng.randint(0, 30),
+            description=f"Zapatillas {rng.choice(ADJECTIVES)} de {category.lower()} en {color.lower()}.",
+        ))
+    return products
+
+
+# --------------------------------------------
+# Repositorios en memoria
+# --------------------------------------------
+class InMemoryProductRepository(IProductRepository):
+    def __init__(self, products: List[Product]):
+        self.products: Dict[int, Product] = {p.id: p for p in products}
+
+    def get_all(self):
+        return list(self.products.values())
+
+    def get_by_id(self, product_id: int):
+        return self.products.get(product_id)
+
+    def get_by_brand(self, brand: str):
+        return [p for p in self.products.values() if p.brand == brand]
+
+    def get_by_category(self, category: str):
+        return [p for p in self.products.values() if p.category == category]
+
+    def search(self, query: ProductQuery):
+        # Versión simple para benchmarks: filtra y ordena en memoria, sin cursor
+        items = [
+            p for p in self.products.values()
+            if all(getattr(p, f) == getattr(query, f) for f in ("brand", "category", "size", "color") if getattr(query, f))
+            and (query.min_price is None or p.price >= query.min_price)
+            and (query.max_price is None or p.price <= query.max_price)
+            and (not query.in_stock or p.stock > 0)
+        ]
+        items.sort(key=lambda p: (getattr(p, query.sort_field), p.id), reverse=query.descending)
+        fields = query.selected_fields
+        return ProductPage(items=[{f: getattr(p, f) for f in fields} for p in items[:query.limit]], next_cursor=None)
+
+    def save(self, product: Product):
+        self.products[product.id] = product
+        return product
+
+    def bulk_upsert(self, products):
+        next_id = max(self.products, default=0) + 1
+        for product in products:
+            if product.id is None:
+                product.id, next_id = next_id, next_id + 1
+            self.products[product.id] = product
+        return len(products)
+
+    def adjust_stock(self, adjustments, all_or_nothing=True):
+        results = []
+        for a in adjustments:
+            product = self.products.get(a.product_id)
+            if product is None:
+                results.append(StockResult(a.product_id, a.quantity, "not_found"))
+            elif product.stock < a.quantity:
+                results.append(StockResult(a.product_id, a.quantity, "insufficient_stock", product.stock))
+            else:
+                product.stock -= a.quantity
+                status = "reserved" if a.is_reservation() else "released"
+                results.append(StockResult(a.product_id, a.quantity, status, product.stock))
+        if all_or_nothing and not all(r.ok for r in results):
+            for r in results:
+                if r.ok:
+                    self.products[r.product_id].stock += r.quantity
+            return [StockResult(r.product_id, r.quantity, "not_applied", r.stock + r.quantity) if r.ok else r
+                    for r in results]
+        return results
+
+    def delete(self, product_id: int):
+        return self.products.pop(product_id, None) is not None
+
+
+class InMemoryChatRepository(IChatRepository):
+    def __init__(self):
+        self.messages: Dict[str, List[ChatMessage]] = {}
+
+    def save_message(self, message: ChatMessage):
+        self.messages.setdefault(message.session_id, []).append(message)
+        return message
+
+    def get_session_history(self, session_id: str, limit: Optional[int] = None):
+        history = self.messages.get(session_id, [])
+        return history[-limit:] if limit else list(history)
+
+    def get_session_history_page(self, session_id: str, limit: int, before=None, after=None):
+        return self.get_session_history(session_id, limit), None
+
+    def delete_session_history(self, session_id: str):
+        return len(self.messages.pop(session_id, []))
+
+    def get_recent_messages(self, session_id: str, limit: int = 6):
+        return self.get_session_history(session_id, limit)
+
+
+class InMemoryChatSummaryRepository(IAsyncChatSummaryRepository):
+    def __init__(self):
+        self.summaries: Dict[str, ChatSummary] = {}
+
+    async def get(self, session_id: str):
+        return self.summaries.get(session_id)
+
+    async def save(self, summary: ChatSummary):
+        self.summaries[summary.session_id] = summary
+        return summary
+
+    async def delete(self, session_id: str):
+        return self.summaries.pop(session_id, None) is not None
+
+
+# --------------------------------------------
+# Modelo de Gemini simulado
+# --------------------------------------------
+def make_gemini_service(model: FakeGenerativeModel):
+    """Crea un `GeminiService` real cuyo modelo es `model` (sin red)."""
+    from src.infrastructure.llm_providers.gemini_service import GeminiService
+
+    return GeminiService(model=model)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
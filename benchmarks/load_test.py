@@ -0,0 +1,237 @@
+"""
+Prueba de carga extremo a extremo de la API.
+
+Ejecuta un escenario por endpoint (/chat, /products, /products/{id} y
+/chat/history/{session_id}) con clientes concurrentes y reporta por
+endpoint: requests por segundo, p50/p95/p99, errores y consultas SQL por
+request (leídas de /metrics antes y después de cada escenario).
+
+El modelo de Gemini se reemplaza por FakeGenerativeModel (LLM_PROVIDER=fake),
+con latencia y ritmo de tokens configurables. La API puede correr:
+    - en proceso (ASGI, por defecto),
+    - en un uvicorn local lanzado por el script (--uvicorn),
+    - o en un servidor ya iniciado (--base-url, con LLM_PROVIDER=fake).
+
+El resultado es JSON estable para comparar entre versiones:
+    python -m benchmarks.load_test --duration 5 --output carga-v1.json
+    python -m benchmarks.load_test --duration 5 --compare carga-v1.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orden de ejecución: el historial se consulta después de que /chat creó las sesiones
+SCENARIOS = ["products", "product_by_id", "chat", "chat_history"]
+
+
+def build_request(scenario: str, client_id: int, n: int, product_ids: list):
+    """Retorna (método, url, cuerpo) del request `n` del cliente `client_id`."""
+    from benchmarks.common import SAMPLE_QUERIES
+
+    session_id = f"load-{client_id}"
+    if scenario == "products":
+        return "GET", "/products", None
+    if scenario == "product_by_id":
+        return "GET", f"/products/{product_ids[(client_id + n) % len(product_ids)]}", None
+    if scenario == "chat":
+        return "POST", "/chat", {"session_id": session_id, "message": SAMPLE_QUERIES[n % len(SAMPLE_QUERIES)]}
+    return "GET", f"/chat/history/{session_id}", None
+
+
+async def db_queries(client) -> int:
+    response = await client.get("/metrics")
+    return response.json()["db"]["queries"]
+
+
+async def run_scenario(client, scenario: str, args, product_ids: list) -> dict:
+    from benchmarks.common import percentile
+
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + args.duration
+
+    async def worker(client_id):
+        n = 0
+        while time.perf_counter() < stop_at:
+            method, url, body = build_request(scenario, client_id, n, product_ids)
+            n += 1
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    queries_before = await db_queries(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    queries = await db_queries(client) - queries_before
+
+    requests = len(latencies) + len(errors)
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "db_queries_per_request": round(queries / requests, 2) if requests else 0.0,
+    }
+
+
+async def run_all(client, args) -> dict:
+    await client.get("/health")  # Calentamiento
+    product_ids = [p["id"] for p in (await client.get("/products", params={"limit": 200, "fields": "id"})).json()]
+    scenarios = args.scenarios or SCENARIOS
+    return {
+        scenario: await run_scenario(client, scenario, args, product_ids)
+        for scenario in SCENARIOS if scenario in scenarios
+    }
+
+
+def seed_database(size: int) -> None:
+    """Crea las tablas y carga el catálogo inicial más `size` productos sintéticos."""
+    from src.infrastructure.db.database import init_db, SessionLocal
+    from src.infrastructure.db.init_data import load_initial_data
+    from src.infrastructure.repositories.product_repository import SQLProductRepository
+    from benchmarks.common import make_catalog
+
+    init_db()
+    load_initial_data()
+    with SessionLocal() as db:
+        repo = SQLProductRepository(db)
+        for product in make_catalog(size):
+            product.id = None
+            repo.save(product)
+
+
+async def run_in_process(args) -> dict:
+    import httpx
+    from src.infrastructure.api.main import app
+
+    await app.router.startup()
+    seed_database(args.products)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60) as client:
+            return await run_all(client, args)
+    finally:
+        await app.router.shutdown()
+
+
+async def run_remote(args, base_url: str) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        return await run_all(client, args)
+
+
+def run_uvicorn(args) -> dict:
+    """Lanza uvicorn en un subproceso con la base temporal y el modelo falso."""
+    import httpx
+
+    seed_database(args.products)
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.infrastructure.api.main:app",
+         "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT, env=os.environ.copy(),
+    )
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("uvicorn no respondió en /health")
+        return asyncio.run(run_remote(args, base_url))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_table(results: dict, baseline: dict = None) -> None:
+    columns = ["rps", "p50_ms", "p95_ms", "p99_ms", "errors", "db_queries_per_request"]
+    print(f"{'endpoint':>14} " + " ".join(f"{c:>22}" for c in columns))
+    for scenario, metrics in results["endpoints"].items():
+        cells = []
+        for column in columns:
+            value = metrics[column]
+            previous = (baseline or {}).get("endpoints", {}).get(scenario, {}).get(column)
+            if previous:
+                cells.append(f"{value} ({(value - previous) / previous * 100:+.0f}%)")
+            else:
+                cells.append(str(value))
+        print(f"{scenario:>14} " + " ".join(f"{c:>22}" for c in cells))
+
+
+def main(args):
+    if args.base_url:
+        target, endpoints = args.base_url, asyncio.run(run_remote(args, args.base_url))
+    elif args.uvicorn:
+        target, endpoints = "uvicorn", run_uvicorn(args)
+    else:
+        target, endpoints = "in-process", asyncio.run(run_in_process(args))
+
+    results = {
+        "meta": {
+            "target": target,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "products": args.products,
+            "llm_latency_ms": float(os.environ["FAKE_LLM_LATENCY_MS"]),
+            "llm_tokens_per_sec": float(os.environ["FAKE_LLM_TOKENS_PER_SEC"]),
+            "python": platform.python_version(),
+        },
+        "endpoints": endpoints,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        print_table(results, baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes concurrentes")
+    parser.add_argument("--products", type=int, default=200, help="Productos sintéticos a cargar")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, help="Endpoints a medir (todos por defecto)")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Latencia simulada del modelo")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=200.0, help="Ritmo de salida del modelo")
+    parser.add_argument("--uvicorn", action="store_true", help="Lanza un uvicorn local en lugar de ASGI en proceso")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto del uvicorn local")
+    parser.add_argument("--base-url", help="Usa un servidor ya iniciado (no carga datos)")
+    parser.add_argument("--output", help="Guarda los resultados JSON en este archivo")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para mostrar la variación")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    cli_args = parser.parse_args()
+
+    # La configuración se lee de variables de entorno al importar la app
+    sys.path.insert(0, ROOT)
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(cli_args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SEC"] = str(cli_args.llm_tokens_per_sec)
+    if not cli_args.base_url:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="load-test-"), "load.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    main(cli_args)
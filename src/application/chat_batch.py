@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import AsyncContextManager, AsyncIterator, Callable, Deque, Dict, List, Tuple
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.domain.exceptions import LLMCapacityError
+
+_DONE = object()
+
+
+# --------------------------------------------
+# Procesamiento de lotes de mensajes de chat
+# --------------------------------------------
+class ChatBatchProcessor:
+    """
+    Procesa muchos mensajes de chat (de varias sesiones) con concurrencia acotada.
+
+    Los mensajes se agrupan por session_id y cada grupo lo procesa un único
+    worker en el orden recibido, así que dentro de una sesión cada turno ve
+    la respuesta del anterior. Hasta `concurrency` sesiones avanzan a la vez;
+    los resultados se entregan a medida que termina cada mensaje.
+
+    Attributes:
+        service_factory (Callable): Retorna un context manager asíncrono que
+            entrega un ChatService (uno por sesión, con su propia AsyncSession).
+        concurrency (int): Sesiones procesadas en paralelo.
+    """
+
+    def __init__(self, service_factory: Callable[[], AsyncContextManager[ChatService]], concurrency: int = 8):
+        if concurrency <= 0:
+            raise ValueError("concurrency debe ser mayor que 0")
+        self.service_factory = service_factory
+        self.concurrency = concurrency
+
+    @classmethod
+    def from_env(cls, service_factory: Callable[[], AsyncContextManager[ChatService]]) -> "ChatBatchProcessor":
+        """Crea el procesador con CHAT_BATCH_CONCURRENCY (por defecto 8)."""
+        return cls(service_factory, concurrency=int(os.getenv("CHAT_BATCH_CONCURRENCY", "8")))
+
+    async def run(self, requests: List[ChatMessageRequestDTO]) -> AsyncIterator[dict]:
+        """
+        Procesa el lote y retorna un resultado por mensaje, en orden de finalización.
+
+        Cada resultado incluye `index` (posición en el lote) y `session_id`;
+        si el mensaje se procesó, `response` y `timestamp`, y si no, `status`
+        (503 sin capacidad de IA, 500 otro error) y `detail`. Un error no
+        detiene los mensajes siguientes de la misma sesión.
+
+        Si el consumidor deja de iterar (p. ej. el cliente se desconecta),
+        se cancelan los mensajes pendientes.
+        """
+        groups = self._group_by_session(requests)
+        results: asyncio.Queue = asyncio.Queue()
+        workers = [
+            asyncio.create_task(self._worker(groups, results))
+            for _ in range(min(self.concurrency, len(groups)))
+        ]
+        try:
+            remaining = len(workers)
+            while remaining:
+                result = await results.get()
+                if result is _DONE:
+                    remaining -= 1
+                    continue
+                yield result
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    @staticmethod
+    def _group_by_session(
+        requests: List[ChatMessageRequestDTO],
+    ) -> Deque[List[Tuple[int, ChatMessageRequestDTO]]]:
+        by_session: Dict[str, List[Tuple[int, ChatMessageRequestDTO]]] = {}
+        for index, request in enumerate(requests):
+            by_session.setdefault(request.session_id, []).append((index, request))
+        return deque(by_session.values())
+
+    async def _worker(self, groups: Deque, results: asyncio.Queue) -> None:
+        try:
+            while groups:
+                items = groups.popleft()
+                async with self.service_factory() as service:
+                    for index, request in items:
+                        await results.put(await self._process(service, index, request))
+        finally:
+            results.put_nowait(_DONE)
+
+    @staticmethod
+    async def _process(service: ChatService, index: int, request: ChatMessageRequestDTO) -> dict:
+        started = time.perf_counter()
+        result = {"index": index, "session_id": request.session_id}
+        try:
+            response = await service.process_user_message(request)
+            result.update(response=response.response, timestamp=response.timestamp)
+        except LLMCapacityError as e:
+            result.update(status=503, detail=e.message)
+        except Exception as e:
+            result.update(status=500, detail=f"Error interno: {str(e)}")
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
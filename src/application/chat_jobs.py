@@ -0,0 +1,182 @@
+import os
+import asyncio
+from typing import AsyncContextManager, Callable, List, Optional
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from src.domain.entities import ChatJob
+from src.domain.exceptions import LLMCapacityError
+from src.infrastructure.repositories.chat_job_queue import ChatJobQueue
+
+
+# --------------------------------------------
+# Pool de workers de la cola de trabajos de chat
+# --------------------------------------------
+class ChatJobWorkers:
+    """
+    Workers en proceso que vacían la ChatJobQueue con ChatService.
+
+    Cada worker toma un trabajo y genera la respuesta con
+    `process_user_message` en su propio ChatService (y AsyncSession). Los
+    mensajes del turno los guarda la cola, junto con el estado del trabajo
+    (ver ChatJobQueue), así que un reintento no duplica el turno en el
+    historial. Mientras procesa, el worker renueva el lease del trabajo; si
+    el proceso muere o no logra guardar el resultado, el lease vence y el
+    trabajo vuelve a la cola. Si el pool de IA está saturado
+    (LLMCapacityError) el trabajo vuelve a la cola, hasta `max_attempts`
+    intentos; luego falla. Una tarea aparte devuelve a la cola los trabajos
+    con lease vencido y purga los resultados vencidos.
+
+    Attributes:
+        queue (ChatJobQueue): Cola de donde se toman los trabajos.
+        service_factory (Callable): Retorna un context manager asíncrono que
+            entrega un ChatService.
+        workers (int): Trabajos procesados en paralelo.
+        poll_interval (float): Segundos máximos de espera sin avisos de la cola.
+        retry_delay (float): Espera tras devolver un trabajo por falta de capacidad.
+        max_attempts (int): Intentos por trabajo (incluye los de otros procesos).
+    """
+
+    def __init__(
+        self,
+        queue: ChatJobQueue,
+        service_factory: Callable[[], AsyncContextManager[ChatService]],
+        workers: int = 4,
+        poll_interval: float = 1.0,
+        retry_delay: float = 0.5,
+        max_attempts: int = 5,
+    ):
+        if workers <= 0:
+            raise ValueError("workers debe ser mayor que 0")
+        self.queue = queue
+        self.service_factory = service_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self._stop: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.busy = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(
+        cls, queue: ChatJobQueue, service_factory: Callable[[], AsyncContextManager[ChatService]]
+    ) -> "ChatJobWorkers":
+        """Crea el pool con CHAT_JOBS_WORKERS workers (por defecto 4) y CHAT_JOBS_MAX_ATTEMPTS (5)."""
+        return cls(
+            queue,
+            service_factory,
+            workers=int(os.getenv("CHAT_JOBS_WORKERS", "4")),
+            max_attempts=int(os.getenv("CHAT_JOBS_MAX_ATTEMPTS", "5")),
+        )
+
+    # -------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------
+    def start(self) -> None:
+        """Inicia los workers y el mantenimiento de la cola (requiere un event loop activo)."""
+        self._stop = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def close(self) -> None:
+        """
+        Detiene los workers. Los trabajos en curso se cancelan y vuelven a la
+        cola cuando vence su lease (los toma otro proceso o el próximo inicio).
+        """
+        if self._stop is None:
+            return
+        self._stop.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "busy": self.busy, "worker_errors": self.errors}
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    async def _worker(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = await self.queue.claim()
+            except Exception as e:
+                print(f"⚠️ Error al tomar un trabajo de chat: {e}")
+                job = None
+            if job is None:
+                await self.queue.wait_available(self.poll_interval)
+                continue
+            self.busy += 1
+            try:
+                await self._process(job)
+            except Exception as e:
+                # p. ej. "database is locked" en todos los reintentos al guardar el
+                # resultado: el worker sigue y el trabajo vuelve a la cola al vencer su lease
+                self.errors += 1
+                print(f"⚠️ Error al procesar el trabajo de chat {job.id}: {e}")
+            finally:
+                self.busy -= 1
+
+    async def _process(self, job: ChatJob) -> None:
+        if job.attempts > self.max_attempts:
+            # Trabajo retomado tras leases vencidos que nunca llegó a terminar
+            await self.queue.fail(job, f"Se superó el máximo de {self.max_attempts} intentos")
+            return
+        try:
+            response = await self._run_turn(job)
+        except LLMCapacityError as e:
+            if job.attempts >= self.max_attempts:
+                await self.queue.fail(job, f"{e.message} (tras {job.attempts} intentos)")
+                return
+            await self.queue.release(job)
+            await asyncio.sleep(self.retry_delay)
+            return
+        except Exception as e:
+            await self.queue.fail(job, f"Error interno: {str(e)}")
+            print(f"⚠️ Trabajo de chat {job.id} fallido: {e}")
+            return
+        if response is not None:
+            await self.queue.complete(job, response)
+
+    async def _run_turn(self, job: ChatJob) -> Optional[str]:
+        """
+        Guarda el mensaje del usuario (si hace falta) y genera la respuesta,
+        renovando el lease mientras tanto. Retorna None si el trabajo pasó a
+        otro worker.
+        """
+        request = ChatMessageRequestDTO(session_id=job.session_id, message=job.message)
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if not job.user_saved and not await self.queue.save_user_message(job):
+                return None
+            async with self.service_factory() as service:
+                response = await service.process_user_message(request, user_message_saved=True, save_response=False)
+            return response.response
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _heartbeat(self, job: ChatJob) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await self.queue.renew(job):
+                    return
+            except Exception as e:
+                print(f"⚠️ Error al renovar el lease del trabajo de chat {job.id}: {e}")
+
+    async def _janitor(self) -> None:
+        interval = min(max(1.0, min(self.queue.result_ttl, 300.0)), self.queue.lease_seconds / 2)
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.queue.requeue_expired()
+                await self.queue.purge_finished()
+            except Exception as e:
+                print(f"⚠️ Error en el mantenimiento de la cola de chat: {e}")
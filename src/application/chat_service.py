@@ -1,67 +1,360 @@
-from src.domain.repositories import IProductRepository, IChatRepository
-from src.infrastructure.llm_providers.gemini_service import GeminiService
-from src.application.dtos import ChatMessageRequestDTO, ChatMessageResponseDTO, ChatHistoryDTO
-from src.domain.entities import ChatMessage, ChatContext
+import inspect
+import anyio
+from dataclasses import dataclass
+from src.domain.repositories import (
+    IProductRepository,
+    IChatRepository,
+    IAsyncProductRepository,
+    IAsyncChatRepository,
+    IAsyncChatSummaryRepository,
+)
+from src.domain.llm_provider import ILLMProvider, FALLBACK_RESPONSE
+from src.infrastructure.cache.catalog_cache import CatalogCache, CatalogSnapshot
+from src.infrastructure.cache.response_cache import ResponseCache
+from src.infrastructure.cache.single_flight import SingleFlight
+from src.infrastructure.llm_providers.prompt_budget import PromptBudget, RollingSummarizer
+from src.infrastructure.search.product_index import ProductIndex
+from src.application.dtos import ChatMessageRequestDTO, ChatMessageResponseDTO, ChatHistoryDTO, ChatHistoryPageDTO
+from src.domain.entities import ChatMessage, ChatContext, ChatSummary
 from datetime import datetime
+from typing import AsyncIterator, List, Optional, Union
+
+
+async def _resolve(result):
+    """
+    Espera el resultado si es awaitable; permite usar el mismo flujo con
+    repositorios síncronos (IChatRepository) o asíncronos (IAsyncChatRepository).
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+@dataclass
+class _Turn:
+    """Datos preparados para generar la respuesta de un turno."""
+    context: ChatContext
+    products: list
+    catalog_version: Optional[int]
+    cache_key: Optional[str] = None
+    flight_key: Optional[str] = None
 
 
 class ChatService:
     """
     Servicio de aplicación que integra IA + historial de conversación.
+    Acepta repositorios síncronos o asíncronos.
     """
 
-    def __init__(self, product_repo: IProductRepository, chat_repo: IChatRepository, gemini_service: GeminiService):
+    def __init__(
+        self,
+        product_repo: Union[IProductRepository, IAsyncProductRepository],
+        chat_repo: Union[IChatRepository, IAsyncChatRepository],
+        gemini_service: ILLMProvider,
+        catalog_cache: Optional[CatalogCache] = None,
+        product_index: Optional[ProductIndex] = None,
+        top_k: int = 8,
+        response_cache: Optional[ResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        prompt_budget: Optional[PromptBudget] = None,
+        summary_repo: Optional[IAsyncChatSummaryRepository] = None,
+    ):
         self.product_repo = product_repo
         self.chat_repo = chat_repo
         self.gemini_service = gemini_service
+        self.catalog_cache = catalog_cache
+        self.product_index = product_index
+        self.top_k = top_k
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+        self.prompt_budget = prompt_budget if prompt_budget is not None and prompt_budget.enabled else None
+        self.summary_repo = summary_repo
+        self.summarizer = RollingSummarizer(max_tokens=prompt_budget.summary_tokens) if self.prompt_budget else None
+
+    @property
+    def history_window(self) -> int:
+        """Mensajes recientes que se leen del historial en cada turno."""
+        return self.prompt_budget.history_window if self.prompt_budget else 6
 
-    async def process_user_message(self, request: ChatMessageRequestDTO):
+    async def process_user_message(
+        self, request: ChatMessageRequestDTO, user_message_saved: bool = False, save_response: bool = True
+    ):
         """
         Procesa un mensaje del usuario, genera una respuesta y guarda ambos mensajes.
+
+        Con `user_message_saved=True` el mensaje del usuario ya está en el
+        historial y no se vuelve a guardar; con `save_response=False` la
+        respuesta solo se retorna. Así quien reintenta el turno (p. ej. la cola
+        de trabajos) guarda cada mensaje una sola vez, en su propia transacción.
+        """
+
+        # 1️⃣ a 3️⃣ Guardar mensaje del usuario, contexto y productos relevantes
+        turn = await self._prepare_turn(request, save_user_message=not user_message_saved)
+
+        # 4️⃣ Generar respuesta con Gemini (o reutilizar una respuesta cacheada
+        # o la generación idéntica que ya está en curso)
+        response_text = self._get_cached_response(turn)
+        if response_text is None:
+            response_text = await self._generate(request.message, turn)
+
+        # 5️⃣ Guardar mensaje del asistente
+        if save_response:
+            await self._save_message(request.session_id, "assistant", response_text)
+
+        # 6️⃣ Retornar DTO de respuesta
+        return ChatMessageResponseDTO(session_id=request.session_id, response=response_text)
+
+    async def stream_user_message(
+        self, request: ChatMessageRequestDTO, recent: Optional[List[ChatMessage]] = None
+    ) -> AsyncIterator[str]:
         """
+        Igual que `process_user_message`, pero entrega la respuesta por
+        fragmentos a medida que el modelo los genera.
 
+        El mensaje del asistente se guarda al terminar el stream, también si
+        el cliente se desconecta antes (se guarda el texto recibido hasta ese
+        momento).
+
+        `recent` es el contexto reciente que mantiene el llamador (p. ej. una
+        conexión WebSocket, cargado con `history_window` mensajes): se usa en
+        lugar de leer el historial y se le agregan los mensajes del turno.
+        """
+        turn = await self._prepare_turn(request, recent=recent)
+
+        cached = self._get_cached_response(turn)
+        if cached is not None:
+            self._remember(recent, await self._save_message(request.session_id, "assistant", cached))
+            yield cached
+            return
+
+        chunks = []
+        try:
+            stream = self.gemini_service.stream_response(
+                request.message, turn.products, turn.context, catalog_version=turn.catalog_version
+            )
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            self._store_response(turn, "".join(chunks).strip())
+        finally:
+            response_text = "".join(chunks).strip()
+            if response_text:
+                # Protegido de la cancelación que produce la desconexión del cliente
+                with anyio.CancelScope(shield=True):
+                    self._remember(recent, await self._save_message(request.session_id, "assistant", response_text))
+
+    async def save_user_message(self, request: ChatMessageRequestDTO):
+        """
+        Guarda solo el mensaje del usuario (para procesarlo luego con
+        `process_user_message(..., user_message_saved=True)`).
+        """
+        return await self._save_message(request.session_id, "user", request.message)
+
+    async def _prepare_turn(
+        self,
+        request: ChatMessageRequestDTO,
+        save_user_message: bool = True,
+        recent: Optional[List[ChatMessage]] = None,
+    ):
+        """
+        Guarda el mensaje del usuario y reúne el contexto reciente, los
+        productos que se enviarán al modelo y la clave de la cache de respuestas.
+        """
         # 1️⃣ Guardar mensaje del usuario
-        user_msg = ChatMessage(
-            id=None,
-            session_id=request.session_id,
-            role="user",
-            message=request.message,
-            timestamp=datetime.utcnow()
-        )
-        self.chat_repo.save_message(user_msg)
+        if save_user_message:
+            self._remember(recent, await self.save_user_message(request))
 
-        # 2️⃣ Recuperar historial reciente
-        recent_msgs = self.chat_repo.get_recent_messages(request.session_id, limit=6)
+        # 2️⃣ Recuperar historial reciente (o el que mantiene el llamador)
+        if recent is None:
+            recent_msgs = await _resolve(
+                self.chat_repo.get_recent_messages(request.session_id, limit=self.history_window)
+            )
+        else:
+            recent_msgs = list(recent)
         context = ChatContext(messages=recent_msgs)
 
-        # 3️⃣ Obtener productos disponibles
-        products = self.product_repo.get_all()
+        # 3️⃣ Obtener productos relevantes (copia cacheada si hay cache)
+        catalog = await self._get_catalog()
+        products = self._select_products(catalog, request.message, context)
 
-        # 4️⃣ Generar respuesta con Gemini
-        response_text = await self.gemini_service.generate_response(request.message, products, context)
+        # Con presupuesto de tokens: productos y turnos que entran, más el resumen
+        if self.prompt_budget is not None:
+            context, products = await self._fit_prompt(request, products, recent_msgs)
+        turn = _Turn(context=context, products=products, catalog_version=catalog.version)
 
-        # 5️⃣ Guardar mensaje del asistente
-        assistant_msg = ChatMessage(
+        if self.response_cache is not None and not context.summary:
+            # El historial previo excluye el mensaje actual (ya guardado)
+            history = context.get_recent_messages()
+            if history and history[-1].is_from_user() and history[-1].message == request.message:
+                history = history[:-1]
+            turn.cache_key = self.response_cache.make_key(request.message, products, history, catalog.version)
+        if self.single_flight is not None:
+            turn.flight_key = self.single_flight.make_key(request.message, products, context, catalog.version)
+        return turn
+
+    async def _generate(self, message: str, turn: _Turn) -> str:
+        async def call():
+            response_text = await self.gemini_service.generate_response(
+                message, turn.products, turn.context, catalog_version=turn.catalog_version
+            )
+            self._store_response(turn, response_text)
+            return response_text
+
+        if self.single_flight is None:
+            return await call()
+        return await self.single_flight.do(turn.flight_key, call)
+
+    async def _fit_prompt(self, request: ChatMessageRequestDTO, products: list, recent_msgs: list):
+        """
+        Ajusta productos y turnos recientes al presupuesto de tokens. Los
+        turnos que ya no entran se agregan al resumen acumulado de la sesión,
+        que se incluye en el prompt con el espacio restante.
+        """
+        fitted = self.prompt_budget.fit(request.message, products, recent_msgs)
+
+        summary_text = None
+        history_exceeds_window = len(recent_msgs) >= self.prompt_budget.history_window
+        if self.summary_repo is not None and (fitted.dropped or history_exceeds_window):
+            summary = await _resolve(self.summary_repo.get(request.session_id))
+            summary = summary or ChatSummary(session_id=request.session_id, text="")
+            updated = self.summarizer.fold(summary, fitted.dropped)
+            if updated is not summary:
+                await _resolve(self.summary_repo.save(updated))
+            summary_text = self.prompt_budget.fit_summary(updated.text, fitted.remaining_tokens)
+
+        context = ChatContext(
+            messages=fitted.recent,
+            max_messages=self.prompt_budget.max_recent_messages,
+            summary=summary_text,
+        )
+        return context, fitted.products
+
+    def _get_cached_response(self, turn: _Turn) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(turn.cache_key)
+
+    def _store_response(self, turn: _Turn, response_text: str) -> None:
+        # Las respuestas de error no se cachean
+        if self.response_cache is not None and response_text and response_text != FALLBACK_RESPONSE:
+            self.response_cache.put(turn.cache_key, response_text)
+
+    def _remember(self, recent: Optional[List[ChatMessage]], message: Optional[ChatMessage]) -> None:
+        # Agrega el mensaje al contexto del llamador, conservando solo la ventana
+        if recent is None or message is None:
+            return
+        recent.append(message)
+        del recent[:-self.history_window]
+
+    async def _save_message(self, session_id: str, role: str, text: str):
+        message = ChatMessage(
             id=None,
-            session_id=request.session_id,
-            role="assistant",
-            message=response_text,
+            session_id=session_id,
+            role=role,
+            message=text,
             timestamp=datetime.utcnow()
         )
-        self.chat_repo.save_message(assistant_msg)
+        return await _resolve(self.chat_repo.save_message(message))
 
-        # 6️⃣ Retornar DTO de respuesta
-        return ChatMessageResponseDTO(session_id=request.session_id, response=response_text)
+    async def _get_catalog(self) -> CatalogSnapshot:
+        """
+        Retorna el catálogo. Con `catalog_cache` se lee la copia inmutable
+        de la versión vigente y solo se consulta la base al invalidarse.
+        """
+        if self.catalog_cache is None:
+            return CatalogSnapshot(version=None, products=tuple(await _resolve(self.product_repo.get_all())))
+
+        snapshot = self.catalog_cache.get()
+        if snapshot is None:
+            version = self.catalog_cache.version
+            snapshot = self.catalog_cache.put(version, await _resolve(self.product_repo.get_all()))
+        return snapshot
+
+    def _select_products(self, catalog: CatalogSnapshot, message: str, context: ChatContext):
+        """
+        Elige los productos que se envían al modelo.
 
-    def get_session_history(self, session_id: str, limit: int = 10):
+        Sin `product_index` se envía el catálogo completo. Con índice se
+        envían solo los `top_k` productos más relevantes para el mensaje
+        actual y los mensajes recientes del usuario; si nada coincide
+        (por ejemplo, un saludo) se envían los primeros `top_k` con stock.
+        """
+        if self.product_index is None:
+            return list(catalog.products)
+
+        if not self.product_index.is_built:
+            self.product_index.rebuild(catalog.products)
+
+        previous = [m.message for m in context.get_recent_messages() if m.is_from_user()]
+        query = " ".join([message] + previous)
+        selected = [
+            catalog.by_id[product_id]
+            for product_id in self.product_index.search(query, self.top_k)
+            if product_id in catalog.by_id
+        ]
+        if selected:
+            return selected
+        return [p for p in catalog.products if p.is_available()][:self.top_k]
+
+    async def get_session_history(self, session_id: str, limit: int = 10):
         """
         Obtiene el historial de chat de una sesión.
         """
-        messages = self.chat_repo.get_session_history(session_id, limit)
+        messages = await _resolve(self.chat_repo.get_session_history(session_id, limit))
         return [ChatHistoryDTO.from_entity(m) for m in messages]
 
-    def delete_session_history(self, session_id: str):
+    async def get_session_history_payload(self, session_id: str, limit: int = 10):
+        """
+        Igual que `get_session_history`, pero retorna dicts listos para
+        codificar a JSON (sin crear ni validar DTOs).
+        """
+        messages = await _resolve(self.chat_repo.get_session_history(session_id, limit))
+        return [ChatHistoryDTO.payload(m) for m in messages]
+
+    async def get_session_history_page(
+        self,
+        session_id: str,
+        limit: int = 20,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
+        """
+        Obtiene una página del historial de chat paginada por cursor.
+        """
+        messages, next_cursor = await _resolve(
+            self.chat_repo.get_session_history_page(session_id, limit, before, after)
+        )
+        return ChatHistoryPageDTO(
+            session_id=session_id,
+            messages=[ChatHistoryDTO.from_entity(m) for m in messages],
+            next_cursor=next_cursor,
+        )
+
+    async def get_session_history_page_payload(
+        self,
+        session_id: str,
+        limit: int = 20,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
+        """
+        Igual que `get_session_history_page`, pero retorna un dict listo para
+        codificar a JSON (sin crear ni validar DTOs).
+        """
+        messages, next_cursor = await _resolve(
+            self.chat_repo.get_session_history_page(session_id, limit, before, after)
+        )
+        return {
+            "session_id": session_id,
+            "messages": [ChatHistoryDTO.payload(m) for m in messages],
+            "next_cursor": next_cursor,
+        }
+
+    async def delete_session_history(self, session_id: str):
         """
-        Elimina el historial de chat por session_id.
+        Elimina el historial de chat (y su resumen) por session_id.
         """
-        return self.chat_repo.delete_session_history(session_id)
+        deleted = await _resolve(self.chat_repo.delete_session_history(session_id))
+        if self.summary_repo is not None:
+            await _resolve(self.summary_repo.delete(session_id))
+        return deleted
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -36,6 +36,25 @@ class ProductDTO(BaseModel):
         )
 
 
+# ---------------------------------------
+# DTO: ProductFieldsDTO
+# ---------------------------------------
+class ProductFieldsDTO(BaseModel):
+    """
+    Producto retornado por GET /products: con `fields` solo trae los campos
+    pedidos, por eso todos son opcionales en el esquema.
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    size: Optional[str] = None
+    color: Optional[str] = None
+    price: Optional[float] = None
+    stock: Optional[int] = None
+    description: Optional[str] = None
+
+
 # ---------------------------------------
 # DTO: ChatMessageDTO
 # ---------------------------------------
@@ -72,8 +91,101 @@ class ChatMessageResponseDTO(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ChatBatchRequestDTO(BaseModel):
+    messages: List[ChatMessageRequestDTO] = Field(
+        min_length=1, max_length=5000, description="Mensajes de una o varias sesiones, en orden por sesión"
+    )
+
+
+class ChatJobRequestDTO(ChatMessageRequestDTO):
+    priority: int = Field(default=5, ge=0, le=9, description="0 = más urgente; a igual prioridad, orden de llegada")
+
+
+class ChatJobDTO(BaseModel):
+    id: str
+    session_id: str
+    status: str = Field(description="queued, running, done o failed")
+    priority: int
+    response: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @classmethod
+    def from_entity(cls, entity):
+        return cls(
+            id=entity.id,
+            session_id=entity.session_id,
+            status=entity.status,
+            priority=entity.priority,
+            response=entity.response,
+            error=entity.error,
+            created_at=entity.created_at,
+            started_at=entity.started_at,
+            finished_at=entity.finished_at,
+        )
+
+
 class ChatHistoryDTO(BaseModel):
     session_id: str
     message: str
     is_user: bool
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+    @classmethod
+    def from_entity(cls, entity):
+        return cls(
+            session_id=entity.session_id,
+            message=entity.message,
+            is_user=entity.is_from_user(),
+            timestamp=entity.timestamp,
+        )
+
+    @staticmethod
+    def payload(entity) -> dict:
+        """
+        Mismo contenido que `from_entity` como dict plano, sin validación de
+        pydantic (ruta rápida: se codifica directo a JSON).
+        """
+        return {
+            "session_id": entity.session_id,
+            "message": entity.message,
+            "is_user": entity.role == "user",
+            "timestamp": entity.timestamp,
+        }
+
+
+class ChatHistoryPageDTO(BaseModel):
+    session_id: str
+    messages: List[ChatHistoryDTO]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor para pedir la página siguiente")
+
+
+# ---------------------------------------
+# DTOs de reserva de stock
+# ---------------------------------------
+class StockAdjustmentDTO(BaseModel):
+    product_id: int
+    quantity: int = Field(description="Unidades a reservar (positivo) o liberar (negativo); distinto de 0")
+
+
+class StockReservationRequestDTO(BaseModel):
+    items: List[StockAdjustmentDTO] = Field(min_length=1, max_length=500)
+    all_or_nothing: bool = Field(default=True, description="Si un ítem falla, no se aplica ninguno")
+
+
+class StockResultDTO(BaseModel):
+    product_id: int
+    quantity: int
+    status: str = Field(description="reserved, released, insufficient_stock, not_found o not_applied")
+    stock: Optional[int] = None
+
+    @classmethod
+    def from_entity(cls, entity):
+        return cls(product_id=entity.product_id, quantity=entity.quantity, status=entity.status, stock=entity.stock)
+
+
+class StockReservationResponseDTO(BaseModel):
+    applied: bool = Field(description="True si se aplicó al menos un ajuste y no hubo reversión")
+    results: List[StockResultDTO]
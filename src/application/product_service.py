@@ -1,4 +1,5 @@
-from src.application.dtos import ProductDTO
+from src.application.dtos import ProductDTO, StockReservationRequestDTO, StockReservationResponseDTO, StockResultDTO
+from src.domain.entities import ProductQuery, ProductPage, StockAdjustment
 from src.domain.repositories import IProductRepository
 
 
@@ -23,3 +24,26 @@ class ProductService:
         """
         product = self.product_repository.get_by_id(product_id)
         return ProductDTO.from_entity(product) if product else None
+
+    def search_products(self, query: ProductQuery) -> ProductPage:
+        """
+        Retorna una página de productos filtrada, ordenada y con los campos pedidos.
+
+        Raises:
+            ValueError: Si el cursor no es válido para la consulta.
+        """
+        return self.product_repository.search(query)
+
+    def reserve_stock(self, request: StockReservationRequestDTO) -> StockReservationResponseDTO:
+        """
+        Reserva (o libera) stock de varios productos en una sola transacción.
+
+        Raises:
+            ValueError: Si algún ítem tiene cantidad 0.
+        """
+        adjustments = [StockAdjustment(item.product_id, item.quantity) for item in request.items]
+        results = self.product_repository.adjust_stock(adjustments, all_or_nothing=request.all_or_nothing)
+        return StockReservationResponseDTO(
+            applied=any(r.ok for r in results),
+            results=[StockResultDTO.from_entity(r) for r in results],
+        )
@@ -1,12 +1,20 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
+# Encabezado del resumen de turnos antiguos dentro del prompt
+SUMMARY_HEADER = "Resumen de la conversación anterior:"
+
+# Las entidades usan __slots__ (sin __dict__ por instancia): el catálogo y
+# el historial se cargan en memoria en grandes cantidades. Los campos se
+# declaran en el orden de las columnas, de modo que los repositorios pueden
+# construirlas directamente desde una fila (p. ej. `Product(*row)`).
+
 
 # -----------------------------
 # ENTIDAD: PRODUCT
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class Product:
     """
     Entidad que representa un producto en el e-commerce.
@@ -60,7 +68,7 @@ class Product:
 # -----------------------------
 # ENTIDAD: CHAT MESSAGE
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
     """
     Entidad que representa un mensaje en el chat.
@@ -94,7 +102,7 @@ class ChatMessage:
 # -----------------------------
 # VALUE OBJECT: CHAT CONTEXT
 # -----------------------------
-@dataclass
+@dataclass(slots=True)
 class ChatContext:
     """
     Value Object que encapsula el contexto de una conversación.
@@ -102,6 +110,7 @@ class ChatContext:
     """
     messages: List[ChatMessage]
     max_messages: int = 6
+    summary: Optional[str] = None  # Resumen de los turnos que ya no entran completos
 
     def get_recent_messages(self) -> List[ChatMessage]:
         """Retorna los últimos N mensajes (max_messages)."""
@@ -113,7 +122,215 @@ class ChatContext:
         ✅ corregido para usar "assistant" en lugar de "Asistente"
         """
         formatted = []
+        if self.summary:
+            formatted.append(f"{SUMMARY_HEADER}\n{self.summary}")
         for msg in self.get_recent_messages():
             role = "user" if msg.role == "user" else "assistant"
             formatted.append(f"{role}: {msg.message}")
         return "\n".join(formatted)
+
+
+# -----------------------------
+# ENTIDAD: CHAT SUMMARY
+# -----------------------------
+@dataclass(slots=True)
+class ChatSummary:
+    """
+    Resumen acumulado de los turnos antiguos de una sesión.
+    Se actualiza de forma incremental a medida que los turnos salen del prompt.
+    """
+    session_id: str
+    text: str
+    summarized_until: Optional[datetime] = None  # Timestamp del último mensaje resumido
+
+    def covers(self, message: ChatMessage) -> bool:
+        """Retorna True si el mensaje ya está incluido en el resumen."""
+        return self.summarized_until is not None and message.timestamp <= self.summarized_until
+
+
+# -----------------------------
+# VALUE OBJECT: PRODUCT QUERY
+# -----------------------------
+PRODUCT_FIELDS = ("id", "name", "brand", "category", "size", "color", "price", "stock", "description")
+PRODUCT_SORT_FIELDS = ("id", "name", "price", "stock")
+
+
+@dataclass
+class ProductQuery:
+    """
+    Value Object con los filtros, el orden y la página de una consulta de productos.
+
+    `sort` es un campo de PRODUCT_SORT_FIELDS, con prefijo "-" para orden
+    descendente. Sin `limit` se retornan todos los resultados; con `limit`
+    la consulta se pagina y `cursor` es el valor retornado como
+    `next_cursor` por la página anterior. `fields` limita los campos
+    retornados.
+    """
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    size: Optional[str] = None
+    color: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: bool = False
+    sort: str = "id"
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None
+
+    def __post_init__(self):
+        """
+        Validaciones que se ejecutan después de crear la consulta.
+        """
+        if self.sort_field not in PRODUCT_SORT_FIELDS:
+            raise ValueError(f"Orden inválido: {self.sort}. Opciones: {', '.join(PRODUCT_SORT_FIELDS)}.")
+        if self.limit is not None and self.limit <= 0:
+            raise ValueError("El tamaño de página debe ser mayor que 0.")
+        if self.min_price is not None and self.max_price is not None and self.min_price > self.max_price:
+            raise ValueError("min_price no puede ser mayor que max_price.")
+        if self.fields is not None:
+            unknown = [f for f in self.fields if f not in PRODUCT_FIELDS]
+            if unknown or not self.fields:
+                raise ValueError(f"Campos inválidos: {', '.join(unknown)}. Opciones: {', '.join(PRODUCT_FIELDS)}.")
+
+    @property
+    def sort_field(self) -> str:
+        return self.sort.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+    @property
+    def selected_fields(self) -> List[str]:
+        """Campos a retornar, en el orden de PRODUCT_FIELDS."""
+        if self.fields is None:
+            return list(PRODUCT_FIELDS)
+        return [f for f in PRODUCT_FIELDS if f in self.fields]
+
+
+@dataclass
+class ProductPage:
+    """
+    Página de resultados de una ProductQuery: cada elemento es un dict con
+    los campos pedidos, y `next_cursor` permite pedir la página siguiente.
+    """
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+# -----------------------------
+# VALUE OBJECT: STOCK ADJUSTMENT
+# -----------------------------
+# Resultados posibles de un ajuste de stock
+STOCK_RESERVED = "reserved"
+STOCK_RELEASED = "released"
+STOCK_INSUFFICIENT = "insufficient_stock"
+STOCK_NOT_FOUND = "not_found"
+STOCK_NOT_APPLIED = "not_applied"  # Válido, pero revertido porque otro ítem del lote falló
+
+
+@dataclass(slots=True)
+class StockAdjustment:
+    """
+    Ajuste de stock de un producto: `quantity` positiva reserva (descuenta)
+    unidades y negativa las libera (devuelve al stock).
+    """
+    product_id: int
+    quantity: int
+
+    def __post_init__(self):
+        """
+        Validaciones que se ejecutan después de crear el ajuste.
+        """
+        if self.quantity == 0:
+            raise ValueError("La cantidad a ajustar no puede ser 0.")
+
+    def is_reservation(self) -> bool:
+        """Retorna True si el ajuste descuenta stock."""
+        return self.quantity > 0
+
+
+@dataclass(slots=True)
+class StockResult:
+    """
+    Resultado de un StockAdjustment.
+
+    Attributes:
+        status (str): STOCK_RESERVED, STOCK_RELEASED, STOCK_INSUFFICIENT,
+            STOCK_NOT_FOUND o STOCK_NOT_APPLIED.
+        stock (Optional[int]): Stock tras el ajuste (o el actual si falló;
+            None si el producto no existe).
+    """
+    product_id: int
+    quantity: int
+    status: str
+    stock: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (STOCK_RESERVED, STOCK_RELEASED)
+
+    @property
+    def changes_availability(self) -> bool:
+        """True si el ajuste aplicado agotó el producto o le devolvió stock."""
+        if not self.ok or self.stock is None:
+            return False
+        return (self.stock + self.quantity > 0) != (self.stock > 0)
+
+
+# -----------------------------
+# ENTIDAD: CHAT JOB
+# -----------------------------
+# Estados de un trabajo de chat asíncrono
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+@dataclass(slots=True)
+class ChatJob:
+    """
+    Mensaje de chat encolado para procesarse en segundo plano.
+
+    Attributes:
+        priority (int): 0 (más urgente) a 9; a igual prioridad, el más antiguo primero.
+        status (str): JOB_QUEUED, JOB_RUNNING, JOB_DONE o JOB_FAILED.
+        attempts (int): Veces que un worker tomó el trabajo.
+        user_saved (bool): El mensaje del usuario ya está en el historial
+            (un reintento no lo vuelve a guardar).
+        lease_expires_at (Optional[datetime]): Hasta cuándo el worker que lo
+            tomó lo tiene reservado; vencido, el trabajo vuelve a la cola.
+    """
+    id: str
+    session_id: str
+    message: str
+    priority: int
+    status: str
+    response: Optional[str]
+    error: Optional[str]
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    user_saved: bool = False
+    lease_expires_at: Optional[datetime] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Tiempo en cola hasta que un worker lo tomó."""
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.created_at).total_seconds()
+
+    @property
+    def service_seconds(self) -> Optional[float]:
+        """Tiempo de procesamiento (desde que un worker lo tomó hasta terminar)."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
@@ -72,3 +72,68 @@ class ChatServiceError(Exception):
         """
         self.message = message
         super().__init__(self.message)
+
+
+class LLMCapacityError(ChatServiceError):
+    """
+    Se lanza cuando el pool de llamadas al proveedor de IA está saturado
+    y la espera por un cupo supera el tiempo máximo configurado.
+
+    Attributes:
+        message (str): Mensaje de error descriptivo.
+    """
+
+    def __init__(self, message: str = "El asistente está saturado, inténtalo más tarde"):
+        """
+        Constructor de la excepción.
+
+        Args:
+            message (str): Mensaje personalizado del error.
+
+        Example:
+            >>> raise LLMCapacityError()
+        """
+        super().__init__(message)
+
+
+class LLMProviderError(ChatServiceError):
+    """
+    Se lanza cuando un proveedor de IA falla al generar una respuesta.
+    Permite que un enrutador reintente con otro proveedor.
+
+    Attributes:
+        message (str): Mensaje de error descriptivo.
+    """
+
+    def __init__(self, message: str = "El proveedor de IA no pudo generar una respuesta"):
+        """
+        Constructor de la excepción.
+
+        Args:
+            message (str): Mensaje personalizado del error.
+
+        Example:
+            >>> raise LLMProviderError("Timeout en gemini-2.5-flash")
+        """
+        super().__init__(message)
+
+
+class ChatJobQueueFullError(ChatServiceError):
+    """
+    Se lanza cuando la cola de trabajos de chat alcanzó su capacidad máxima.
+
+    Attributes:
+        message (str): Mensaje de error descriptivo.
+    """
+
+    def __init__(self, message: str = "La cola de trabajos de chat está llena, inténtalo más tarde"):
+        """
+        Constructor de la excepción.
+
+        Args:
+            message (str): Mensaje personalizado del error.
+
+        Example:
+            >>> raise ChatJobQueueFullError()
+        """
+        super().__init__(message)
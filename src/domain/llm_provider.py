@@ -0,0 +1,75 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+from .entities import ChatContext, Product
+
+# Respuesta que se entrega cuando falla la llamada al modelo
+FALLBACK_RESPONSE = "Lo siento, hubo un problema al procesar tu mensaje. Inténtalo nuevamente más tarde."
+
+
+# ---------------------------------------------
+# Interface: ILLMProvider
+# ---------------------------------------------
+class ILLMProvider(ABC):
+    """
+    Interface que define el contrato de un proveedor de IA conversacional.
+    Las implementaciones concretas (Gemini, enrutadores, stubs) estarán en
+    la capa de infraestructura.
+    """
+
+    @abstractmethod
+    async def generate_response(
+        self,
+        user_message: str,
+        products: List[Product],
+        context: ChatContext,
+        catalog_version: Optional[int] = None,
+    ) -> str:
+        """
+        Genera la respuesta completa del asistente.
+
+        Args:
+            user_message (str): Mensaje actual del usuario.
+            products (List[Product]): Productos relevantes para el prompt.
+            context (ChatContext): Mensajes recientes de la conversación.
+            catalog_version (Optional[int]): Versión del catálogo (permite cachear el prompt).
+
+        Returns:
+            str: Texto de la respuesta.
+
+        Raises:
+            LLMCapacityError: Si el proveedor está saturado.
+            LLMProviderError: Si el proveedor falla y no responde con FALLBACK_RESPONSE.
+        """
+        pass
+
+    @abstractmethod
+    def stream_response(
+        self,
+        user_message: str,
+        products: List[Product],
+        context: ChatContext,
+        catalog_version: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Genera la respuesta en fragmentos de texto (async generator).
+
+        Args:
+            user_message (str): Mensaje actual del usuario.
+            products (List[Product]): Productos relevantes para el prompt.
+            context (ChatContext): Mensajes recientes de la conversación.
+            catalog_version (Optional[int]): Versión del catálogo.
+
+        Returns:
+            AsyncIterator[str]: Fragmentos de la respuesta.
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Retorna métricas del proveedor (modelo, pool, latencias).
+
+        Returns:
+            dict: Métricas en formato serializable.
+        """
+        pass
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from .entities import Product, ChatMessage
+from typing import List, Optional, Tuple
+from .entities import Product, ChatMessage, ChatSummary, ProductQuery, ProductPage, StockAdjustment, StockResult
 
 
 # ---------------------------------------------
@@ -61,6 +61,23 @@ class IProductRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def search(self, query: ProductQuery) -> ProductPage:
+        """
+        Busca productos con filtros, orden y paginación por cursor (keyset).
+
+        Args:
+            query (ProductQuery): Filtros, orden, página y campos a retornar.
+
+        Returns:
+            ProductPage: Productos de la página (solo los campos pedidos) y
+            cursor de la página siguiente (None si no hay más).
+
+        Raises:
+            ValueError: Si el cursor no es válido o no corresponde al orden.
+        """
+        pass
+
     @abstractmethod
     def save(self, product: Product) -> Product:
         """
@@ -74,6 +91,40 @@ class IProductRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def bulk_upsert(self, products: List[Product]) -> int:
+        """
+        Inserta o actualiza un lote de productos en una sola transacción.
+
+        Los productos con ID reemplazan al existente con ese ID (o se crean
+        con ese ID); los que no tienen ID se insertan como nuevos.
+
+        Args:
+            products (List[Product]): Lote de productos ya validados.
+
+        Returns:
+            int: Cantidad de productos escritos.
+        """
+        pass
+
+    @abstractmethod
+    def adjust_stock(self, adjustments: List[StockAdjustment], all_or_nothing: bool = True) -> List[StockResult]:
+        """
+        Aplica varios ajustes de stock en una sola transacción.
+
+        Cada reserva solo se aplica si alcanza el stock (nunca queda negativo),
+        sin leer y reescribir el producto completo. Las caches del catálogo
+        solo se invalidan si un producto se agota o vuelve a tener stock.
+
+        Args:
+            adjustments (List[StockAdjustment]): Ajustes a aplicar.
+            all_or_nothing (bool): Si un ajuste falla, revierte todos.
+
+        Returns:
+            List[StockResult]: Un resultado por ajuste, en el mismo orden.
+        """
+        pass
+
     @abstractmethod
     def delete(self, product_id: int) -> bool:
         """
@@ -149,3 +200,276 @@ class IChatRepository(ABC):
             List[ChatMessage]: Lista de mensajes recientes.
         """
         pass
+
+    @abstractmethod
+    def get_session_history_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        """
+        Obtiene una página del historial usando un cursor (keyset).
+
+        Sin cursor retorna los mensajes más recientes. Con `before` retorna
+        los anteriores al cursor y con `after` los posteriores.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            limit (int): Tamaño de la página.
+            before (Optional[str]): Cursor; mensajes más antiguos que él.
+            after (Optional[str]): Cursor; mensajes más nuevos que él.
+
+        Returns:
+            Tuple[List[ChatMessage], Optional[str]]: Mensajes en orden
+            cronológico y cursor para pedir la página siguiente en la misma
+            dirección (None si no hay más).
+
+        Raises:
+            ValueError: Si el cursor no es válido.
+        """
+        pass
+
+
+# ---------------------------------------------
+# Interface: IAsyncProductRepository
+# ---------------------------------------------
+class IAsyncProductRepository(ABC):
+    """
+    Versión asíncrona de IProductRepository.
+    Permite acceder a productos sin bloquear el event loop de la API.
+    """
+
+    @abstractmethod
+    async def get_all(self) -> List[Product]:
+        """
+        Obtiene todos los productos registrados.
+
+        Returns:
+            List[Product]: Lista de todos los productos.
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, product_id: int) -> Optional[Product]:
+        """
+        Obtiene un producto por su ID.
+
+        Args:
+            product_id (int): Identificador del producto.
+
+        Returns:
+            Optional[Product]: El producto encontrado o None si no existe.
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_brand(self, brand: str) -> List[Product]:
+        """
+        Obtiene todos los productos de una marca específica.
+
+        Args:
+            brand (str): Nombre de la marca.
+
+        Returns:
+            List[Product]: Lista de productos de esa marca.
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_category(self, category: str) -> List[Product]:
+        """
+        Obtiene productos de una categoría específica.
+
+        Args:
+            category (str): Categoría (e.g., Running, Casual, Formal).
+
+        Returns:
+            List[Product]: Lista de productos de esa categoría.
+        """
+        pass
+
+    @abstractmethod
+    async def search(self, query: ProductQuery) -> ProductPage:
+        """
+        Busca productos con filtros, orden y paginación por cursor (keyset).
+
+        Args:
+            query (ProductQuery): Filtros, orden, página y campos a retornar.
+
+        Returns:
+            ProductPage: Productos de la página (solo los campos pedidos) y
+            cursor de la página siguiente (None si no hay más).
+
+        Raises:
+            ValueError: Si el cursor no es válido o no corresponde al orden.
+        """
+        pass
+
+    @abstractmethod
+    async def save(self, product: Product) -> Product:
+        """
+        Guarda o actualiza un producto en la base de datos.
+
+        Args:
+            product (Product): Entidad del producto a guardar.
+
+        Returns:
+            Product: El producto guardado (con ID asignado si es nuevo).
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, product_id: int) -> bool:
+        """
+        Elimina un producto por su ID.
+
+        Args:
+            product_id (int): Identificador del producto.
+
+        Returns:
+            bool: True si se eliminó, False si no existía.
+        """
+        pass
+
+
+# ---------------------------------------------
+# Interface: IAsyncChatRepository
+# ---------------------------------------------
+class IAsyncChatRepository(ABC):
+    """
+    Versión asíncrona de IChatRepository.
+    """
+
+    @abstractmethod
+    async def save_message(self, message: ChatMessage) -> ChatMessage:
+        """
+        Guarda un mensaje en el historial del chat.
+
+        Args:
+            message (ChatMessage): Entidad de mensaje.
+
+        Returns:
+            ChatMessage: El mensaje guardado con ID asignado.
+        """
+        pass
+
+    @abstractmethod
+    async def get_session_history(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
+        """
+        Obtiene el historial de una sesión específica.
+
+        Args:
+            session_id (str): Identificador único de la sesión.
+            limit (Optional[int]): Límite de cantidad de mensajes a recuperar.
+
+        Returns:
+            List[ChatMessage]: Lista de mensajes ordenados cronológicamente.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_session_history(self, session_id: str) -> int:
+        """
+        Elimina todo el historial de una sesión.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+
+        Returns:
+            int: Cantidad de mensajes eliminados.
+        """
+        pass
+
+    @abstractmethod
+    async def get_recent_messages(self, session_id: str, count: int) -> List[ChatMessage]:
+        """
+        Obtiene los últimos N mensajes de una sesión (orden cronológico).
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            count (int): Cantidad máxima de mensajes a recuperar.
+
+        Returns:
+            List[ChatMessage]: Lista de mensajes recientes.
+        """
+        pass
+
+    @abstractmethod
+    async def get_session_history_page(
+        self,
+        session_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        """
+        Obtiene una página del historial usando un cursor (keyset).
+
+        Sin cursor retorna los mensajes más recientes. Con `before` retorna
+        los anteriores al cursor y con `after` los posteriores.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+            limit (int): Tamaño de la página.
+            before (Optional[str]): Cursor; mensajes más antiguos que él.
+            after (Optional[str]): Cursor; mensajes más nuevos que él.
+
+        Returns:
+            Tuple[List[ChatMessage], Optional[str]]: Mensajes en orden
+            cronológico y cursor para pedir la página siguiente en la misma
+            dirección (None si no hay más).
+
+        Raises:
+            ValueError: Si el cursor no es válido.
+        """
+        pass
+
+
+# ---------------------------------------------
+# Interface: IAsyncChatSummaryRepository
+# ---------------------------------------------
+class IAsyncChatSummaryRepository(ABC):
+    """
+    Interface asíncrona para guardar el resumen acumulado de cada sesión.
+    """
+
+    @abstractmethod
+    async def get(self, session_id: str) -> Optional[ChatSummary]:
+        """
+        Obtiene el resumen de una sesión.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+
+        Returns:
+            Optional[ChatSummary]: El resumen o None si la sesión no tiene.
+        """
+        pass
+
+    @abstractmethod
+    async def save(self, summary: ChatSummary) -> ChatSummary:
+        """
+        Crea o reemplaza el resumen de una sesión.
+
+        Args:
+            summary (ChatSummary): Resumen a guardar.
+
+        Returns:
+            ChatSummary: El resumen guardado.
+        """
+        pass
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        """
+        Elimina el resumen de una sesión.
+
+        Args:
+            session_id (str): Identificador de la sesión.
+
+        Returns:
+            bool: True si existía un resumen.
+        """
+        pass
@@ -0,0 +1,266 @@
+import os
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+import anyio
+import orjson
+from pydantic import ValidationError
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatHistoryDTO, ChatMessageRequestDTO
+from src.domain.entities import ChatMessage
+from src.domain.exceptions import LLMCapacityError
+
+# Códigos de cierre propios (rango 4000-4999 de la especificación)
+CLOSE_IDLE_TIMEOUT = 4408  # El cliente dejó de responder al heartbeat
+CLOSE_SLOW_CONSUMER = 4429  # El cliente no lee lo que se le envía
+
+
+@dataclass
+class ChatSocketSettings:
+    """
+    Parámetros de las conexiones WebSocket del chat.
+
+    Attributes:
+        heartbeat_interval (float): Segundos sin recibir nada del cliente tras los que se le envía un ping.
+        idle_timeout (float): Segundos sin recibir nada del cliente tras los que se cierra.
+        max_pending (int): Mensajes del cliente en espera; por encima se rechazan.
+        send_timeout (float): Segundos máximos de un envío; si el cliente no
+            lee en ese tiempo, se cierra la conexión.
+    """
+    heartbeat_interval: float = 20.0
+    idle_timeout: float = 60.0
+    max_pending: int = 8
+    send_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "ChatSocketSettings":
+        """
+        Crea la configuración con WS_HEARTBEAT_INTERVAL_S, WS_IDLE_TIMEOUT_S,
+        WS_MAX_PENDING_MESSAGES y WS_SEND_TIMEOUT_S.
+        """
+        return cls(
+            heartbeat_interval=float(os.getenv("WS_HEARTBEAT_INTERVAL_S", "20")),
+            idle_timeout=float(os.getenv("WS_IDLE_TIMEOUT_S", "60")),
+            max_pending=int(os.getenv("WS_MAX_PENDING_MESSAGES", "8")),
+            send_timeout=float(os.getenv("WS_SEND_TIMEOUT_S", "10")),
+        )
+
+
+# --------------------------------------------
+# Cola de salida con fragmentos combinables
+# --------------------------------------------
+class _Outbox:
+    """
+    Frames pendientes de enviar. Los tokens consecutivos de un mismo mensaje
+    se combinan en un solo frame mientras el cliente no alcanza a leerlos,
+    así un cliente lento recibe menos frames más grandes y el stream del
+    modelo nunca espera al socket.
+    """
+
+    def __init__(self):
+        self._frames: List[dict] = []
+        self._ready = asyncio.Event()
+
+    def put(self, frame: dict) -> None:
+        last = self._frames[-1] if self._frames else None
+        if (frame["type"] == "token" and last is not None and last["type"] == "token"
+                and last.get("id") == frame.get("id")):
+            last["token"] += frame["token"]
+        else:
+            self._frames.append(frame)
+        self._ready.set()
+
+    async def take(self, timeout: float) -> List[dict]:
+        """Retorna los frames pendientes, esperando hasta `timeout` segundos."""
+        if not self._frames:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        frames, self._frames = self._frames, []
+        self._ready.clear()
+        return frames
+
+
+# --------------------------------------------
+# Conexión WebSocket de una sesión de chat
+# --------------------------------------------
+class ChatSocketConnection:
+    """
+    Atiende una conexión /ws/chat/{session_id} de principio a fin.
+
+    El ChatService (con su AsyncSession y repositorios) se crea una vez por
+    conexión. Al conectar se leen los mensajes recientes de la sesión: se
+    guardan en `context` y se envían en el frame `ready` (un cliente que se
+    reconecta puede mostrar la conversación). Cada turno usa `context` como
+    historial reciente y le agrega sus mensajes, así que mientras la conexión
+    está abierta los turnos no vuelven a leer el historial de la base (los
+    mensajes de la sesión escritos por otros canales se ven al reconectar).
+    Tres tareas comparten la conexión:
+        - lectura: recibe mensajes y pongs; rechaza mensajes si ya hay
+          `max_pending` en espera.
+        - proceso: responde los mensajes de a uno, en orden, enviando los
+          tokens a medida que el modelo los genera.
+        - escritura: único dueño de `send`; combina tokens si el cliente lee
+          lento, envía pings si el cliente calla y cierra la conexión si el cliente
+          no responde (`idle_timeout`) o no lee (`send_timeout`).
+
+    Protocolo (JSON en frames de texto):
+        cliente -> {"message": "...", "id": "opcional"} | {"type": "ping"} | {"type": "pong"}
+        servidor -> ready (session_id, history), token (id, token), done (id),
+                    error (id, status, detail), ping, pong
+        Los frames binarios se rechazan con un error 400.
+
+    Attributes:
+        websocket (WebSocket): Conexión ya aceptada.
+        session_id (str): Sesión de chat de la conexión.
+        service (ChatService): Servicio de la conexión.
+        settings (ChatSocketSettings): Heartbeat y límites de la conexión.
+        after_turn (Callable): Se espera tras cada mensaje (p. ej. cerrar la
+            AsyncSession para devolver su conexión al pool entre mensajes).
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        service: ChatService,
+        settings: ChatSocketSettings,
+        after_turn: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.service = service
+        self.settings = settings
+        self.after_turn = after_turn
+        self._outbox = _Outbox()
+        self._inbox: asyncio.Queue = asyncio.Queue(maxsize=settings.max_pending)
+        self._last_received = time.monotonic()
+        self._sequence = 0
+        self.context: List[ChatMessage] = []
+        self.close_code: Optional[int] = None
+
+    async def run(self) -> None:
+        """Atiende la conexión hasta que el cliente se desconecta o se cierra por timeout."""
+        await self._warm_up()
+        self._outbox.put({
+            "type": "ready",
+            "session_id": self.session_id,
+            "history": [ChatHistoryDTO.payload(m) for m in self.context],
+        })
+        tasks = [
+            asyncio.create_task(self._read()),
+            asyncio.create_task(self._process()),
+            asyncio.create_task(self._write()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.close_code is not None:
+            try:
+                await self.websocket.close(code=self.close_code)
+            except RuntimeError:
+                pass  # El cliente ya cerró
+
+    # -------------------------------------------------
+    # Tareas de la conexión
+    # -------------------------------------------------
+    async def _warm_up(self) -> None:
+        # Carga el contexto reciente antes del primer mensaje
+        self.context = list(
+            await self.service.chat_repo.get_recent_messages(self.session_id, limit=self.service.history_window)
+        )
+        if self.after_turn:
+            await self.after_turn()
+
+    async def _read(self) -> None:
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                self._last_received = time.monotonic()
+                text = message.get("text")
+                if text is None:
+                    self._outbox.put({"type": "error", "id": None, "status": 400,
+                                      "detail": "Solo se aceptan frames de texto (JSON)"})
+                    continue
+                self._handle(text)
+        except WebSocketDisconnect:
+            pass
+
+    def _handle(self, text: str) -> None:
+        try:
+            frame = orjson.loads(text)
+            if not isinstance(frame, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        except ValueError as e:
+            self._outbox.put({"type": "error", "id": None, "status": 400, "detail": f"Frame inválido: {e}"})
+            return
+        kind = frame.get("type", "message")
+        if kind == "pong":
+            return
+        if kind == "ping":
+            self._outbox.put({"type": "pong"})
+            return
+
+        self._sequence += 1
+        message_id = frame.get("id", self._sequence)
+        try:
+            request = ChatMessageRequestDTO(session_id=self.session_id, message=frame.get("message"))
+        except ValidationError:
+            self._outbox.put({"type": "error", "id": message_id, "status": 400, "detail": "Falta el campo message"})
+            return
+        try:
+            self._inbox.put_nowait((message_id, request))
+        except asyncio.QueueFull:
+            self._outbox.put({
+                "type": "error", "id": message_id, "status": 429,
+                "detail": f"Demasiados mensajes en espera (máximo {self.settings.max_pending})",
+            })
+
+    async def _process(self) -> None:
+        while True:
+            message_id, request = await self._inbox.get()
+            try:
+                async for token in self.service.stream_user_message(request, recent=self.context):
+                    self._outbox.put({"type": "token", "id": message_id, "token": token})
+                self._outbox.put({"type": "done", "id": message_id})
+            except LLMCapacityError as e:
+                self._outbox.put({"type": "error", "id": message_id, "status": 503, "detail": e.message})
+            except Exception as e:
+                self._outbox.put({"type": "error", "id": message_id, "status": 500, "detail": f"Error interno: {str(e)}"})
+            finally:
+                if self.after_turn:
+                    with anyio.CancelScope(shield=True):
+                        await self.after_turn()
+
+    async def _write(self) -> None:
+        last_ping = 0.0
+        while True:
+            frames = await self._outbox.take(timeout=self.settings.heartbeat_interval)
+            now = time.monotonic()
+            silence = now - self._last_received
+            if silence > self.settings.idle_timeout:
+                self.close_code = CLOSE_IDLE_TIMEOUT
+                return
+            # Ping si el cliente no envía nada, aunque haya tokens en curso
+            if silence >= self.settings.heartbeat_interval and now - last_ping >= self.settings.heartbeat_interval:
+                frames.append({"type": "ping"})
+                last_ping = now
+            for frame in frames:
+                try:
+                    await asyncio.wait_for(self.websocket.send_text(orjson.dumps(frame).decode()),
+                                           timeout=self.settings.send_timeout)
+                except asyncio.TimeoutError:
+                    self.close_code = CLOSE_SLOW_CONSUMER
+                    return
+                except (WebSocketDisconnect, RuntimeError):
+                    return
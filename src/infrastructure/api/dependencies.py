@@ -0,0 +1,136 @@
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.application.chat_service import ChatService
+from src.infrastructure.db.database import get_async_db, AsyncSessionLocal
+from src.infrastructure.repositories.async_product_repository import AsyncSQLProductRepository
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.infrastructure.repositories.write_behind import ChatWriteBehindQueue, WriteBehindChatRepository
+from src.infrastructure.repositories.chat_job_queue import ChatJobQueue
+from src.infrastructure.repositories.session_context_repository import SessionContextChatRepository
+from src.infrastructure.repositories.chat_summary_repository import AsyncSQLChatSummaryRepository
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.search.product_index import product_index
+from src.infrastructure.cache.response_cache import response_cache
+from src.infrastructure.cache.single_flight import single_flight
+from src.infrastructure.cache.session_context import session_context_store
+from src.infrastructure.llm_providers.prompt_budget import prompt_budget
+from src.domain.llm_provider import ILLMProvider
+
+
+# --------------------------------------------
+# Dependencia: proveedor de IA compartido
+# --------------------------------------------
+def get_llm_provider(request: Request) -> ILLMProvider:
+    """
+    Retorna el proveedor de IA creado al iniciar la aplicación.
+
+    Raises:
+        HTTPException: 503 si el proveedor no pudo configurarse.
+    """
+    provider = getattr(request.app.state, "llm_provider", None)
+    if provider is None:
+        raise HTTPException(status_code=503, detail="El asistente de IA no está configurado (GEMINI_API_KEY).")
+    return provider
+
+
+# --------------------------------------------
+# Construcción de repositorios y servicios de chat
+# --------------------------------------------
+def build_chat_repository(db: AsyncSession, queue: Optional[ChatWriteBehindQueue] = None):
+    """
+    Repositorio de chat sobre `db`; con `queue` encola los mensajes en la
+    escritura diferida. Los mensajes recientes se leen del contexto de
+    sesión en memoria.
+    """
+    repo = AsyncSQLChatRepository(db)
+    if queue:
+        repo = WriteBehindChatRepository(repo, queue)
+    if session_context_store.enabled:
+        repo = SessionContextChatRepository(repo, session_context_store)
+    return repo
+
+
+def build_chat_service(db: AsyncSession, chat_repo, gemini_service: ILLMProvider) -> ChatService:
+    """
+    ChatService completo (caches, índice y presupuesto de tokens compartidos) sobre `db`.
+    """
+    return ChatService(
+        AsyncSQLProductRepository(db),
+        chat_repo,
+        gemini_service,
+        catalog_cache,
+        product_index,
+        response_cache=response_cache,
+        single_flight=single_flight,
+        prompt_budget=prompt_budget,
+        summary_repo=AsyncSQLChatSummaryRepository(db),
+    )
+
+
+def chat_service_factory(
+    gemini_service: ILLMProvider,
+    queue: Optional[ChatWriteBehindQueue] = None,
+    session_factory: Callable = AsyncSessionLocal,
+):
+    """
+    Fábrica de ChatService para trabajo fuera de un request (lotes, workers):
+    cada uso abre su propia AsyncSession y la cierra al salir.
+    """
+    @asynccontextmanager
+    async def factory():
+        async with session_factory() as db:
+            yield build_chat_service(db, build_chat_repository(db, queue), gemini_service)
+    return factory
+
+
+# --------------------------------------------
+# Dependencias: servicios de chat (acceso asíncrono a la base)
+# --------------------------------------------
+def get_chat_repository(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Repositorio de chat del request; con la escritura diferida activa
+    encola los mensajes en la cola compartida de la aplicación. Los
+    mensajes recientes se leen del contexto de sesión en memoria.
+    """
+    return build_chat_repository(db, getattr(request.app.state, "chat_write_queue", None))
+
+
+def get_chat_service(
+    db: AsyncSession = Depends(get_async_db),
+    chat_repo=Depends(get_chat_repository),
+    gemini_service: ILLMProvider = Depends(get_llm_provider),
+) -> ChatService:
+    """
+    Construye el ChatService del request con repositorios asíncronos.
+    """
+    return build_chat_service(db, chat_repo, gemini_service)
+
+
+def get_chat_history_service(
+    db: AsyncSession = Depends(get_async_db),
+    chat_repo=Depends(get_chat_repository),
+) -> ChatService:
+    """
+    ChatService limitado al historial (no requiere proveedor de IA).
+    """
+    return ChatService(None, chat_repo, None, summary_repo=AsyncSQLChatSummaryRepository(db))
+
+
+# --------------------------------------------
+# Dependencia: cola de trabajos de chat
+# --------------------------------------------
+def get_chat_job_queue(request: Request) -> ChatJobQueue:
+    """
+    Retorna la cola de trabajos de chat creada al iniciar la aplicación.
+
+    Raises:
+        HTTPException: 503 si el modo asíncrono no está habilitado (CHAT_JOBS).
+    """
+    queue = getattr(request.app.state, "chat_job_queue", None)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Los trabajos de chat no están habilitados (CHAT_JOBS).")
+    return queue
@@ -1,16 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import json
+import anyio
+import orjson
+import tempfile
 
-from src.infrastructure.db.database import init_db, get_db
+from src.infrastructure.db.database import init_db, get_db, SessionLocal, async_engine, AsyncSessionLocal, query_counter
+from src.infrastructure.repositories.write_behind import ChatWriteBehindQueue
+from src.infrastructure.repositories.chat_retention import ChatRetentionPurger
+from src.infrastructure.repositories.chat_job_queue import ChatJobQueue
+from src.infrastructure.repositories.catalog_version import CatalogVersionWatcher
 from src.infrastructure.repositories.product_repository import SQLProductRepository
-from src.infrastructure.repositories.chat_repository import SQLChatRepository
 from src.application.product_service import ProductService
 from src.application.chat_service import ChatService
-from src.application.dtos import ProductDTO, ChatMessageRequestDTO, ChatMessageResponseDTO, ChatHistoryDTO
-from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.application.chat_batch import ChatBatchProcessor
+from src.application.chat_jobs import ChatJobWorkers
+from src.domain.entities import ProductQuery
+from src.application.dtos import (
+    ProductDTO,
+    ProductFieldsDTO,
+    ChatMessageRequestDTO,
+    ChatBatchRequestDTO,
+    ChatJobRequestDTO,
+    ChatJobDTO,
+    ChatMessageResponseDTO,
+    ChatHistoryDTO,
+    ChatHistoryPageDTO,
+    StockReservationRequestDTO,
+    StockReservationResponseDTO,
+)
+from src.infrastructure.llm_providers.provider_factory import create_llm_provider
+from src.infrastructure.api.chat_socket import ChatSocketConnection, ChatSocketSettings
+from src.infrastructure.api.dependencies import (
+    build_chat_repository,
+    build_chat_service,
+    chat_service_factory,
+    get_chat_service,
+    get_chat_history_service,
+    get_chat_job_queue,
+    get_llm_provider,
+)
+from src.domain.exceptions import ChatJobQueueFullError, LLMCapacityError
+from src.infrastructure.cache.response_cache import response_cache
+from src.infrastructure.cache.single_flight import single_flight
+from src.infrastructure.cache.session_context import session_context_store
+from src.infrastructure.cache.http_cache import catalog_http_cache
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.search.product_index import product_index
+from src.infrastructure.importers.product_feed import (
+    FEED_FORMATS,
+    ProductFeedImporter,
+    detect_format,
+    print_progress,
+    text_lines,
+)
 
 # ------------------------------------------------------------
 # Inicialización de FastAPI
@@ -30,15 +78,73 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 # ------------------------------------------------------------
-# Evento de inicio - Inicializa la base de datos
+# Evento de inicio - Inicializa la base de datos y el proveedor de IA
 # ------------------------------------------------------------
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     init_db()
 
+    # Versión compartida del catálogo: ve las escrituras de otros workers y del importador CLI
+    app.state.catalog_watcher = CatalogVersionWatcher.from_env(AsyncSessionLocal, catalog_cache, product_index)
+    # Aun sin sincronización periódica, los ETag parten de la fila compartida
+    await (app.state.catalog_watcher or CatalogVersionWatcher(AsyncSessionLocal, catalog_cache, product_index)).check_once()
+    if app.state.catalog_watcher:
+        app.state.catalog_watcher.start()
+
+    # Un único proveedor de IA para toda la vida de la aplicación
+    # (Gemini, el modelo falso o el enrutador con cobertura, según el entorno)
+    try:
+        app.state.llm_provider = create_llm_provider()
+    except ValueError as e:
+        print(f"⚠️ {e}. El endpoint /chat no estará disponible.")
+        app.state.llm_provider = None
+
+    # Escritura diferida de mensajes (opcional, CHAT_WRITE_BEHIND=1)
+    app.state.chat_write_queue = ChatWriteBehindQueue.from_env(AsyncSessionLocal)
+    if app.state.chat_write_queue:
+        app.state.chat_write_queue.start()
+
+    # Purga del historial por antigüedad o inactividad (opcional, CHAT_RETENTION_*)
+    app.state.chat_purger = ChatRetentionPurger.from_env(AsyncSessionLocal, on_session_purged=session_context_store.drop)
+    if app.state.chat_purger:
+        app.state.chat_purger.start()
+
+    # Trabajos de chat asíncronos (opcional, CHAT_JOBS=1)
+    app.state.chat_job_queue = ChatJobQueue.from_env(AsyncSessionLocal, on_session_written=session_context_store.drop)
+    app.state.chat_job_workers = None
+    if app.state.chat_job_queue:
+        recovered = await app.state.chat_job_queue.recover()
+        if recovered:
+            print(f"♻️ {recovered} trabajos de chat con lease vencido devueltos a la cola.")
+        if app.state.llm_provider is not None:
+            factory = chat_service_factory(app.state.llm_provider, app.state.chat_write_queue)
+            app.state.chat_job_workers = ChatJobWorkers.from_env(app.state.chat_job_queue, factory)
+            app.state.chat_job_workers.start()
+
+
+# ------------------------------------------------------------
+# Evento de cierre - Guarda mensajes pendientes y libera conexiones
+# ------------------------------------------------------------
+@app.on_event("shutdown")
+async def on_shutdown():
+    workers = getattr(app.state, "chat_job_workers", None)
+    if workers:
+        await workers.close()
+    purger = getattr(app.state, "chat_purger", None)
+    if purger:
+        await purger.close()
+    watcher = getattr(app.state, "catalog_watcher", None)
+    if watcher:
+        await watcher.close()
+    queue = getattr(app.state, "chat_write_queue", None)
+    if queue:
+        await queue.close()
+    await async_engine.dispose()
+
 
 # ------------------------------------------------------------
 # Endpoint raíz
@@ -55,35 +161,165 @@ def root():
         "endpoints": [
             "/products",
             "/products/{id}",
+            "/products/import",
+            "/stock/reservations",
             "/chat",
+            "/chat/stream",
+            "/chat/batch",
+            "/chat/jobs",
+            "/chat/jobs/{job_id}",
+            "/ws/chat/{session_id}",
             "/chat/history/{session_id}",
+            "/chat/history/{session_id}/page",
             "/health",
+            "/metrics",
         ],
     }
 
 
 # ------------------------------------------------------------
-# Obtener todos los productos
+# Buscar productos (filtros, orden, paginación y campos)
 # ------------------------------------------------------------
-@app.get("/products", response_model=List[ProductDTO])
-def get_all_products(db: Session = Depends(get_db)):
-    repo = SQLProductRepository(db)
-    service = ProductService(repo)
-    return service.get_all_products()
+@app.get("/products", response_model=List[ProductFieldsDTO])
+def get_all_products(
+    request: Request,
+    brand: Optional[str] = None,
+    category: Optional[str] = None,
+    size: Optional[str] = None,
+    color: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = Query(False, description="Solo productos con stock"),
+    sort: str = Query("id", description="id, name, price o stock; prefijo '-' para descendente"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Tamaño de página; sin él se retorna todo el catálogo"),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior (requiere limit)"),
+    fields: Optional[str] = Query(None, description="Campos a retornar separados por coma"),
+    db: Session = Depends(get_db),
+):
+    """
+    Retorna los productos que cumplen los filtros. La paginación es
+    opcional: con `limit` se retorna una página y, si hay más resultados,
+    el header `X-Next-Cursor` trae el cursor para pedir la siguiente.
+    Con `If-None-Match` vigente responde 304 sin consultar la base.
+    """
+    etag = catalog_http_cache.etag(str(sorted(request.query_params.multi_items())))
+    cache_headers = catalog_http_cache.headers(etag)
+    if catalog_http_cache.not_modified(request.headers, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    if cursor is not None and limit is None:
+        raise HTTPException(status_code=400, detail="cursor requiere limit.")
+    try:
+        query = ProductQuery(
+            brand=brand,
+            category=category,
+            size=size,
+            color=color,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields is not None else None,
+        )
+        page = ProductService(SQLProductRepository(db)).search_products(query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.next_cursor:
+        cache_headers["X-Next-Cursor"] = page.next_cursor
+    # Filas planas codificadas con orjson: `response_model` queda solo para el esquema OpenAPI
+    return ORJSONResponse(content=page.items, headers=cache_headers)
+
+
+# ------------------------------------------------------------
+# Importación masiva de productos (CSV / JSONL)
+# ------------------------------------------------------------
+@app.post("/products/import")
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv o jsonl (por defecto, según el Content-Type)"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+):
+    """
+    Importa un feed de productos enviado como cuerpo crudo del request.
+
+    El cuerpo se copia a un archivo temporal a medida que llega (en memoria
+    hasta 1 MB, luego en disco, escribiendo fuera del event loop) y se
+    importa en lotes con upsert por ID, así que la memoria no crece con el
+    tamaño del feed. Si el feed deja de ser UTF-8 válido responde 400 con
+    el reporte parcial: los lotes anteriores ya quedaron guardados.
+    """
+    if format is not None and format not in FEED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido. Opciones: {', '.join(FEED_FORMATS)}.")
+    try:
+        fmt = format or detect_format(content_type=request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as feed:
+        async for chunk in request.stream():
+            await run_in_threadpool(feed.write, chunk)
+        feed.seek(0)
+
+        def run_import():
+            importer = ProductFeedImporter(batch_size=batch_size, on_progress=print_progress)
+            with SessionLocal() as db:
+                return importer.run(text_lines(feed), fmt, SQLProductRepository(db))
+
+        report = await run_in_threadpool(run_import)
+    if report.aborted:
+        return ORJSONResponse(status_code=400, content=report.to_dict())
+    return report.to_dict()
+
+
+# ------------------------------------------------------------
+# Reserva de stock (checkout)
+# ------------------------------------------------------------
+@app.post(
+    "/stock/reservations",
+    response_model=StockReservationResponseDTO,
+    responses={409: {"model": StockReservationResponseDTO, "description": "Ningún ajuste se aplicó"}},
+)
+def reserve_stock(request: StockReservationRequestDTO, db: Session = Depends(get_db)):
+    """
+    Reserva (cantidad positiva) o libera (negativa) stock de varios productos
+    en una transacción, con un UPDATE condicional por ítem: el stock nunca
+    queda negativo aunque haya checkouts concurrentes. Responde 409 si no se
+    aplicó ningún ajuste.
+    """
+    try:
+        result = ProductService(SQLProductRepository(db)).reserve_stock(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not result.applied:
+        return ORJSONResponse(status_code=409, content=result.model_dump())
+    return result
 
 
 # ------------------------------------------------------------
 # Obtener producto por ID
 # ------------------------------------------------------------
 @app.get("/products/{product_id}", response_model=ProductDTO)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
+def get_product_by_id(product_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = catalog_http_cache.etag(f"product:{product_id}")
+    cache_headers = catalog_http_cache.headers(etag)
+    # `If-None-Match: *` solo vale si el producto existe: se valida después de buscarlo
+    wildcard = request.headers.get("if-none-match", "").strip() == "*"
+    if not wildcard and catalog_http_cache.not_modified(request.headers, etag):
+        return Response(status_code=304, headers=cache_headers)
+
     repo = SQLProductRepository(db)
     service = ProductService(repo)
     product = service.get_product_by_id(product_id)
 
     if not product:
         raise HTTPException(status_code=404, detail=f"Producto con ID {product_id} no encontrado")
+    if wildcard and catalog_http_cache.not_modified(request.headers, etag):
+        return Response(status_code=304, headers=cache_headers)
 
+    response.headers.update(cache_headers)
     return product
 
 
@@ -91,51 +327,195 @@ def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
 # Endpoint de Chat con IA
 # ------------------------------------------------------------
 @app.post("/chat", response_model=ChatMessageResponseDTO)
-async def chat_with_ai(request: ChatMessageRequestDTO, db: Session = Depends(get_db)):
+async def chat_with_ai(request: ChatMessageRequestDTO, chat_service: ChatService = Depends(get_chat_service)):
     """
     Procesa un mensaje del usuario, genera una respuesta de IA
     y guarda el historial de conversación.
     """
     try:
-        # Repositorios y servicios
-        product_repo = SQLProductRepository(db)
-        chat_repo = SQLChatRepository(db)
-        gemini_service = GeminiService()
-        chat_service = ChatService(product_repo, chat_repo, gemini_service)
-
-        # Generar respuesta con IA
+        # Generar respuesta con IA (repositorios asíncronos, sin bloquear el event loop)
         response = await chat_service.process_user_message(request)
         return response
 
+    except LLMCapacityError as e:
+        raise HTTPException(status_code=503, detail=e.message)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
 
+# ------------------------------------------------------------
+# Endpoint de Chat con IA en streaming (Server-Sent Events)
+# ------------------------------------------------------------
+def _sse(data: dict, event: str = None) -> str:
+    """Formatea un evento SSE."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_with_ai_stream(request: ChatMessageRequestDTO, chat_service: ChatService = Depends(get_chat_service)):
+    """
+    Igual que /chat, pero envía la respuesta como eventos SSE a medida que
+    el modelo la genera: un evento `data: {"token": ...}` por fragmento y
+    un evento final `done`. La respuesta completa se guarda en el historial
+    al terminar el stream o cuando el cliente se desconecta.
+    """
+    async def event_stream():
+        try:
+            async for token in chat_service.stream_user_message(request):
+                yield _sse({"token": token})
+            yield _sse({"session_id": request.session_id}, event="done")
+        except LLMCapacityError as e:
+            yield _sse({"detail": e.message}, event="error")
+        except Exception as e:
+            yield _sse({"detail": f"Error interno: {str(e)}"}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ------------------------------------------------------------
+# Lote de mensajes de chat (respuesta NDJSON)
+# ------------------------------------------------------------
+@app.post("/chat/batch")
+async def chat_batch(batch: ChatBatchRequestDTO, provider=Depends(get_llm_provider)):
+    """
+    Procesa muchos mensajes de una o varias sesiones en una sola llamada.
+
+    Hasta CHAT_BATCH_CONCURRENCY sesiones avanzan en paralelo; los mensajes
+    de una misma sesión se procesan en el orden enviado. Cada resultado se
+    envía como una línea JSON apenas termina (ver ChatBatchProcessor.run),
+    y los mensajes se guardan con INSERTs por lotes de la escritura diferida.
+    """
+    shared_queue = getattr(app.state, "chat_write_queue", None)
+
+    async def lines():
+        # Sin escritura diferida global, una cola propia del lote
+        queue = shared_queue or ChatWriteBehindQueue(AsyncSessionLocal)
+        if queue is not shared_queue:
+            queue.start()
+
+        try:
+            processor = ChatBatchProcessor.from_env(chat_service_factory(provider, queue))
+            async for result in processor.run(batch.messages):
+                yield orjson.dumps(result) + b"\n"
+        finally:
+            if queue is not shared_queue:
+                # Protegido de la cancelación que produce la desconexión del cliente
+                with anyio.CancelScope(shield=True):
+                    await queue.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+
+# ------------------------------------------------------------
+# Trabajos de chat asíncronos
+# ------------------------------------------------------------
+@app.post("/chat/jobs", response_model=ChatJobDTO, status_code=202)
+async def create_chat_job(request: ChatJobRequestDTO, response: Response, queue: ChatJobQueue = Depends(get_chat_job_queue)):
+    """
+    Encola un mensaje y retorna el trabajo de inmediato, sin esperar al
+    modelo. El resultado se consulta en `Location` (/chat/jobs/{id}).
+    """
+    try:
+        job = await queue.enqueue(request.session_id, request.message, request.priority)
+    except ChatJobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=e.message, headers={"Retry-After": "1"})
+    response.headers["Location"] = f"/chat/jobs/{job.id}"
+    return ChatJobDTO.from_entity(job)
+
+
+@app.get("/chat/jobs/{job_id}", response_model=ChatJobDTO)
+async def get_chat_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=60, description="Segundos a esperar a que termine (long-polling)"),
+    queue: ChatJobQueue = Depends(get_chat_job_queue),
+):
+    """
+    Retorna el estado del trabajo; con `wait` responde apenas termina o al
+    vencer la espera (con el estado vigente).
+    """
+    job = await queue.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return ChatJobDTO.from_entity(job)
+
+
+# ------------------------------------------------------------
+# Chat por WebSocket (una conexión por sesión)
+# ------------------------------------------------------------
+chat_socket_settings = ChatSocketSettings.from_env()
+
+
+@app.websocket("/ws/chat/{session_id}")
+async def chat_websocket(websocket: WebSocket, session_id: str):
+    """
+    Canal de chat persistente de una sesión. El ChatService y el contexto de
+    la sesión se preparan una vez por conexión; las respuestas se envían
+    como tokens a medida que el modelo las genera (ver ChatSocketConnection).
+    """
+    await websocket.accept()
+    provider = getattr(app.state, "llm_provider", None)
+    if provider is None:
+        await websocket.send_json({"type": "error", "status": 503,
+                                   "detail": "El asistente de IA no está configurado (GEMINI_API_KEY)."})
+        await websocket.close(code=1011)
+        return
+
+    async with AsyncSessionLocal() as db:
+        queue = getattr(app.state, "chat_write_queue", None)
+        service = build_chat_service(db, build_chat_repository(db, queue), provider)
+        # La AsyncSession devuelve su conexión al pool entre mensajes
+        connection = ChatSocketConnection(websocket, session_id, service, chat_socket_settings, after_turn=db.close)
+        await connection.run()
+
+
 # ------------------------------------------------------------
 # Obtener historial de chat
 # ------------------------------------------------------------
 @app.get("/chat/history/{session_id}", response_model=List[ChatHistoryDTO])
-def get_chat_history(
+async def get_chat_history(
     session_id: str,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    service: ChatService = Depends(get_chat_history_service),
 ):
     """
     Retorna los últimos N mensajes del historial de chat de una sesión.
     """
-    repo = SQLChatRepository(db)
-    service = ChatService(None, repo, None)
-    return service.get_session_history(session_id, limit)
+    return ORJSONResponse(await service.get_session_history_payload(session_id, limit))
+
+
+# ------------------------------------------------------------
+# Historial de chat paginado por cursor
+# ------------------------------------------------------------
+@app.get("/chat/history/{session_id}/page", response_model=ChatHistoryPageDTO)
+async def get_chat_history_page(
+    session_id: str,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = Query(None, description="Mensajes anteriores a este cursor"),
+    after: Optional[str] = Query(None, description="Mensajes posteriores a este cursor"),
+    service: ChatService = Depends(get_chat_history_service),
+):
+    """
+    Retorna una página del historial en orden cronológico. Sin cursor se
+    obtienen los mensajes más recientes; `next_cursor` se envía como
+    `before` (o `after`) para seguir recorriendo en la misma dirección.
+    """
+    try:
+        return ORJSONResponse(await service.get_session_history_page_payload(session_id, limit, before, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ------------------------------------------------------------
 # Eliminar historial de chat
 # ------------------------------------------------------------
 @app.delete("/chat/history/{session_id}")
-def delete_chat_history(session_id: str, db: Session = Depends(get_db)):
-    repo = SQLChatRepository(db)
-    service = ChatService(None, repo, None)
-    deleted_count = service.delete_session_history(session_id)
+async def delete_chat_history(session_id: str, service: ChatService = Depends(get_chat_history_service)):
+    deleted_count = await service.delete_session_history(session_id)
     return {"deleted": deleted_count}
 
 
@@ -145,3 +525,28 @@ def delete_chat_history(session_id: str, db: Session = Depends(get_db)):
 @app.get("/health")
 def health_check():
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
+
+
+# ------------------------------------------------------------
+# Métricas internas (pool de IA, caches, coalescencia, cola de escritura, consultas SQL)
+# ------------------------------------------------------------
+@app.get("/metrics")
+def get_metrics():
+    provider = getattr(app.state, "llm_provider", None)
+    queue = getattr(app.state, "chat_write_queue", None)
+    purger = getattr(app.state, "chat_purger", None)
+    job_queue = getattr(app.state, "chat_job_queue", None)
+    job_workers = getattr(app.state, "chat_job_workers", None)
+    watcher = getattr(app.state, "catalog_watcher", None)
+    return {
+        "llm_pool": provider.stats() if provider else None,
+        "response_cache": response_cache.stats(),
+        "catalog_http_cache": catalog_http_cache.stats(),
+        "catalog_sync": watcher.stats() if watcher else None,
+        "single_flight": single_flight.stats(),
+        "session_context": session_context_store.stats(),
+        "chat_write_queue": queue.stats() if queue else None,
+        "chat_retention": purger.stats() if purger else None,
+        "chat_jobs": {**job_queue.stats(), **(job_workers.stats() if job_workers else {})} if job_queue else None,
+        "db": {"queries": query_counter.count},
+    }
@@ -0,0 +1,159 @@
+import time
+import threading
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from src.domain.entities import Product
+
+
+# ------------------------------
+# VALUE OBJECT: CatalogSnapshot
+# ------------------------------
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Copia inmutable del catálogo asociada a una versión concreta.
+
+    Attributes:
+        version (Optional[int]): Versión del catálogo con la que se cargó la
+            copia (None si se leyó sin cache).
+        products (Tuple[Product, ...]): Productos del catálogo (solo lectura).
+    """
+    version: Optional[int]
+    products: Tuple[Product, ...]
+
+    @cached_property
+    def by_id(self) -> Dict[int, Product]:
+        """Productos indexados por ID (se calcula una vez por copia)."""
+        return {p.id: p for p in self.products}
+
+
+# ------------------------------
+# CACHE: CatalogCache
+# ------------------------------
+class CatalogCache:
+    """
+    Cache en memoria del catálogo de productos, versionada.
+
+    Cada escritura sobre el catálogo (save, delete, cargas masivas) llama a
+    `invalidate()`, que adopta la nueva versión y descarta la copia actual.
+    Las lecturas (por ejemplo, cada turno del chat) reutilizan la copia
+    mientras la versión no cambie, evitando recorrer la tabla `products`.
+
+    Además de la versión local (que siempre avanza y marca las copias), la
+    cache sigue la versión compartida de la tabla `catalog_version`, que
+    cada escritura incrementa en su transacción. Las escrituras de otros
+    procesos (otros workers de uvicorn, el importador CLI) llegan con
+    `sync()`, que llama periódicamente CatalogVersionWatcher.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._shared_version = 0
+        self._modified_at = time.time()
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def version(self) -> int:
+        """Versión actual del catálogo."""
+        return self._version
+
+    @property
+    def shared_version(self) -> int:
+        """Última versión de `catalog_version` conocida (igual en todos los procesos)."""
+        return self._shared_version
+
+    @property
+    def modified_at(self) -> float:
+        """Momento (epoch) de la última invalidación, o del inicio del proceso."""
+        return self._modified_at
+
+    def invalidate(self, shared_version: Optional[int] = None, modified_at: Optional[float] = None) -> int:
+        """
+        Marca el catálogo como modificado.
+
+        Args:
+            shared_version (Optional[int]): Versión de `catalog_version` que
+                dejó la escritura (sin ella, la compartida avanza en 1).
+            modified_at (Optional[float]): Momento (epoch) de la escritura.
+
+        Returns:
+            int: La nueva versión del catálogo.
+        """
+        with self._lock:
+            self._version += 1
+            # Nunca retrocede: una escritura más nueva pudo llegar antes con sync()
+            self._shared_version = (
+                self._shared_version + 1 if shared_version is None else max(self._shared_version, shared_version)
+            )
+            self._modified_at = time.time() if modified_at is None else modified_at
+            self._snapshot = None
+            return self._version
+
+    def sync(self, shared_version: int, modified_at: float) -> bool:
+        """
+        Adopta la versión de `catalog_version` si es más nueva que la conocida.
+
+        Returns:
+            bool: True si el catálogo cambió en otro proceso (se descartó la copia).
+        """
+        with self._lock:
+            if shared_version <= self._shared_version:
+                return False
+            self._version += 1
+            self._shared_version = shared_version
+            self._modified_at = modified_at
+            self._snapshot = None
+            return True
+
+    def get(self) -> Optional[CatalogSnapshot]:
+        """
+        Retorna la copia vigente o None si hay que recargar el catálogo.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        return None
+
+    def put(self, version: int, products: Iterable[Product]) -> CatalogSnapshot:
+        """
+        Guarda una copia del catálogo cargada cuando la versión era `version`.
+
+        Si el catálogo se invalidó mientras se cargaba, la copia se retorna
+        al llamador pero no se guarda, para no servir datos obsoletos.
+
+        Args:
+            version (int): Versión leída ANTES de cargar los productos.
+            products (Iterable[Product]): Productos cargados desde el repositorio.
+
+        Returns:
+            CatalogSnapshot: La copia inmutable construida.
+        """
+        snapshot = CatalogSnapshot(version=version, products=tuple(products))
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get_snapshot(self, loader: Callable[[], Iterable[Product]]) -> CatalogSnapshot:
+        """
+        Retorna la copia vigente, cargándola con `loader` si no existe.
+
+        Args:
+            loader (Callable): Función que retorna todos los productos
+                (normalmente `IProductRepository.get_all`).
+
+        Returns:
+            CatalogSnapshot: Copia inmutable del catálogo.
+        """
+        snapshot = self.get()
+        if snapshot is not None:
+            return snapshot
+        version = self._version
+        return self.put(version, loader())
+
+
+# Instancia compartida por todo el proceso
+catalog_cache = CatalogCache()
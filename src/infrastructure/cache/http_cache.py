@@ -0,0 +1,98 @@
+import os
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from src.infrastructure.cache.catalog_cache import CatalogCache, catalog_cache
+
+
+class CatalogHTTPCache:
+    """
+    Validadores HTTP (ETag / Last-Modified) de los endpoints del catálogo.
+
+    El ETag combina la versión del catálogo, el momento de su última
+    escritura y una huella de la variante pedida (query string o ID). Ambos
+    vienen de la fila compartida `catalog_version` (ver CatalogCache), así
+    que todos los workers emiten y validan los mismos ETags, y un cliente
+    con el ETag vigente recibe 304 sin consultar la base ni serializar. El
+    momento de la escritura evita que una base recreada (versión 1 otra
+    vez) valide ETags viejos.
+
+    Una escritura hecha en otro proceso se refleja aquí cuando
+    CatalogVersionWatcher la lee (cada CATALOG_SYNC_INTERVAL_S); hasta
+    entonces este proceso puede responder 304 con la versión anterior.
+
+    Attributes:
+        catalog (CatalogCache): Fuente de la versión del catálogo.
+        max_age (int): Segundos de `Cache-Control: max-age` (0 = revalidar siempre).
+    """
+
+    def __init__(self, catalog: CatalogCache, max_age: int = 60):
+        self.catalog = catalog
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, catalog: CatalogCache) -> "CatalogHTTPCache":
+        """Crea los validadores con CATALOG_HTTP_MAX_AGE."""
+        return cls(catalog, max_age=int(os.getenv("CATALOG_HTTP_MAX_AGE", "60")))
+
+    def etag(self, variant: str = "", version: Optional[int] = None) -> str:
+        """
+        ETag fuerte de una variante del catálogo.
+
+        Leer la versión ANTES de consultar la base: si una escritura ocurre
+        en medio, el ETag queda viejo (un 200 extra) y nunca adelantado.
+        """
+        modified_at = int(self.catalog.modified_at)
+        version = self.catalog.shared_version if version is None else version
+        digest = hashlib.blake2b(variant.encode(), digest_size=6).hexdigest()
+        return f'"{version}-{modified_at:x}-{digest}"'
+
+    def headers(self, etag: str) -> Dict[str, str]:
+        """Headers de cache para una respuesta 200 o 304."""
+        return {
+            "ETag": etag,
+            "Last-Modified": formatdate(self.catalog.modified_at, usegmt=True),
+            "Cache-Control": f"public, max-age={self.max_age}, must-revalidate",
+        }
+
+    def not_modified(self, request_headers: Mapping[str, str], etag: str) -> bool:
+        """
+        Indica si el cliente ya tiene la representación vigente.
+
+        `If-None-Match` tiene prioridad; `If-Modified-Since` solo se usa si
+        el cliente no envía ETag.
+        """
+        fresh = self._is_fresh(request_headers, etag)
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def stats(self) -> dict:
+        return {"version": self.catalog.shared_version, "hits": self.hits, "misses": self.misses}
+
+    def _is_fresh(self, request_headers: Mapping[str, str], etag: str) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            # Comparación débil (RFC 9110): se ignora el prefijo W/
+            tags = (tag.strip() for tag in if_none_match.split(","))
+            return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.catalog.modified_at) <= since
+        return False
+
+
+# Instancia compartida por todo el proceso
+catalog_http_cache = CatalogHTTPCache.from_env(catalog_cache)
@@ -0,0 +1,164 @@
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from src.domain.entities import ChatMessage, Product
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_message(text: str) -> str:
+    """
+    Normaliza un mensaje para compararlo con otros casi idénticos:
+    minúsculas, sin tildes, sin signos de puntuación y espacios simples.
+
+    Example:
+        >>> normalize_message("¿Qué zapatillas de  Running tienen?")
+        'que zapatillas de running tienen'
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Cache LRU con expiración (TTL) de respuestas del modelo.
+
+    La clave combina el mensaje normalizado, una huella del contexto
+    relevante (productos enviados e historial previo) y la versión del
+    catálogo, de modo que un cambio de stock o precio invalida la entrada.
+
+    Attributes:
+        max_entries (int): Máximo de respuestas guardadas (0 = deshabilitada).
+        ttl_seconds (float): Segundos de validez de cada respuesta.
+        max_message_length (int): Mensajes más largos no se cachean.
+        exclude_patterns (List[re.Pattern]): Mensajes que coinciden no se cachean.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 300.0,
+        max_message_length: int = 300,
+        exclude_patterns: Iterable[str] = (),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_message_length = max_message_length
+        self.exclude_patterns = [re.compile(p, re.IGNORECASE) for p in exclude_patterns]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.excluded = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Crea la cache con LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL y
+        LLM_CACHE_EXCLUDE (expresiones regulares separadas por coma).
+        """
+        patterns = [p.strip() for p in os.getenv("LLM_CACHE_EXCLUDE", "").split(",") if p.strip()]
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "300")),
+            exclude_patterns=patterns,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def make_key(
+        self,
+        message: str,
+        products: Sequence[Product],
+        history: Sequence[ChatMessage],
+        catalog_version: Optional[int],
+    ) -> Optional[str]:
+        """
+        Calcula la clave de la respuesta o None si no debe cachearse.
+
+        Args:
+            message (str): Mensaje actual del usuario.
+            products (Sequence[Product]): Productos enviados al modelo.
+            history (Sequence[ChatMessage]): Mensajes previos al actual.
+            catalog_version (Optional[int]): Versión del catálogo (None = sin cache).
+
+        Returns:
+            Optional[str]: Clave de la cache o None si aplica una exclusión.
+        """
+        if not self.enabled or catalog_version is None:
+            return None
+        if len(message) > self.max_message_length or any(p.search(message) for p in self.exclude_patterns):
+            self.excluded += 1
+            return None
+
+        fingerprint = hashlib.sha1()
+        fingerprint.update(",".join(str(p.id) for p in products).encode())
+        for msg in history:
+            fingerprint.update(f"\x1e{msg.role}:{msg.message}".encode())
+        return f"{catalog_version}:{normalize_message(message)}:{fingerprint.hexdigest()}"
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        """Retorna la respuesta cacheada o None (cuenta aciertos y fallos)."""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Optional[str], response: str) -> None:
+        """Guarda una respuesta, expulsando la menos usada si la cache está llena."""
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Contadores de uso de la cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "excluded": self.excluded,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Instancia compartida por todo el proceso
+response_cache = ResponseCache.from_env()
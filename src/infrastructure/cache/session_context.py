@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+from src.domain.entities import ChatMessage
+
+# Bytes estimados por mensaje además del texto (objeto, fechas, strings cortos)
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def _message_size(message: ChatMessage) -> int:
+    return len(message.message.encode()) + MESSAGE_OVERHEAD_BYTES
+
+
+@dataclass
+class _Session:
+    messages: Deque[ChatMessage]
+    last_access: float
+    size: int = 0
+
+
+@dataclass
+class _Hydration:
+    """Marca de una carga desde la base en curso; se anula si llega una escritura."""
+    valid: bool = field(default=True)
+
+
+class SessionContextStore:
+    """
+    Últimos mensajes de cada sesión en memoria (buffer circular por sesión).
+
+    Una sesión se carga desde la base la primera vez que se consulta y luego
+    se mantiene al día con cada `save_message`, de modo que el contexto del
+    turno se arma sin consultar la base. Entre sesiones se expulsa la menos
+    usada (LRU) al superar `max_sessions` o `max_bytes`, y las que no se usan
+    hace más de `idle_ttl` segundos.
+
+    El store es por proceso: con varios workers, cada uno ve solo las
+    escrituras que pasaron por él (usar afinidad de sesión o un solo worker).
+
+    Attributes:
+        max_sessions (int): Máximo de sesiones en memoria (0 = deshabilitado).
+        max_messages (int): Mensajes guardados por sesión.
+        idle_ttl (float): Segundos sin uso tras los que se expulsa una sesión.
+        max_bytes (int): Tope aproximado de memoria de todos los mensajes.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        max_messages: int = 20,
+        idle_ttl: float = 1800.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._hydrating: Dict[str, _Hydration] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.hydrations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionContextStore":
+        """
+        Crea el store con SESSION_CONTEXT_MAX_SESSIONS, SESSION_CONTEXT_MAX_MESSAGES,
+        SESSION_CONTEXT_IDLE_TTL y SESSION_CONTEXT_MAX_BYTES.
+        """
+        return cls(
+            max_sessions=int(os.getenv("SESSION_CONTEXT_MAX_SESSIONS", "10000")),
+            max_messages=int(os.getenv("SESSION_CONTEXT_MAX_MESSAGES", "20")),
+            idle_ttl=float(os.getenv("SESSION_CONTEXT_IDLE_TTL", "1800")),
+            max_bytes=int(os.getenv("SESSION_CONTEXT_MAX_BYTES", str(64 * 1024 * 1024))),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0 and self.max_messages > 0
+
+    # -------------------------------------------------
+    # Lectura
+    # -------------------------------------------------
+    def get(self, session_id: str, limit: int) -> Optional[List[ChatMessage]]:
+        """
+        Retorna los últimos `limit` mensajes de la sesión, o None si la sesión
+        no está en memoria o se piden más mensajes de los que se guardan.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and self._is_idle(session):
+                self._evict(session_id)
+                session = None
+            if session is None or limit > self.max_messages:
+                self.misses += 1
+                return None
+            session.last_access = self._clock()
+            self._sessions.move_to_end(session_id)
+            self.hits += 1
+            messages = list(session.messages)
+            return messages[-limit:] if limit else messages
+
+    def begin_hydration(self, session_id: str) -> _Hydration:
+        """
+        Marca el inicio de una carga desde la base. Llamar antes de consultar:
+        si mientras tanto se guarda un mensaje de la sesión, la carga se descarta.
+        """
+        token = _Hydration()
+        with self._lock:
+            self._hydrating[session_id] = token
+        return token
+
+    def hydrate(self, session_id: str, messages: List[ChatMessage], token: _Hydration) -> bool:
+        """
+        Guarda los mensajes leídos de la base (los últimos `max_messages`).
+
+        Returns:
+            bool: False si la carga quedó obsoleta y no se guardó.
+        """
+        with self._lock:
+            if self._hydrating.get(session_id) is token:
+                del self._hydrating[session_id]
+            if not token.valid or not self.enabled:
+                return False
+            if session_id in self._sessions:
+                self._evict(session_id)
+            session = _Session(messages=deque(maxlen=self.max_messages), last_access=self._clock())
+            self._sessions[session_id] = session
+            for message in messages[-self.max_messages:]:
+                self._push(session, message)
+            self.hydrations += 1
+            self._enforce_limits()
+            return True
+
+    # -------------------------------------------------
+    # Escritura
+    # -------------------------------------------------
+    def append(self, message: ChatMessage) -> None:
+        """Agrega un mensaje guardado al buffer de su sesión (si está en memoria)."""
+        with self._lock:
+            hydration = self._hydrating.pop(message.session_id, None)
+            if hydration is not None:
+                hydration.valid = False
+            session = self._sessions.get(message.session_id)
+            if session is None:
+                return
+            self._push(session, message)
+            session.last_access = self._clock()
+            self._sessions.move_to_end(message.session_id)
+            self._enforce_limits()
+
+    def drop(self, session_id: str) -> None:
+        """Elimina la sesión de memoria (p. ej. al borrar su historial)."""
+        with self._lock:
+            hydration = self._hydrating.pop(session_id, None)
+            if hydration is not None:
+                hydration.valid = False
+            if session_id in self._sessions:
+                self._evict(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._hydrating.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hydrations": self.hydrations,
+            "evictions": self.evictions,
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares (requieren el lock)
+    # -------------------------------------------------
+    def _push(self, session: _Session, message: ChatMessage) -> None:
+        if len(session.messages) == session.messages.maxlen:
+            dropped = _message_size(session.messages[0])
+            session.size -= dropped
+            self._bytes -= dropped
+        session.messages.append(message)
+        size = _message_size(message)
+        session.size += size
+        self._bytes += size
+
+    def _is_idle(self, session: _Session) -> bool:
+        return self.idle_ttl > 0 and self._clock() - session.last_access > self.idle_ttl
+
+    def _evict(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size
+        self.evictions += 1
+
+    def _enforce_limits(self) -> None:
+        # Las sesiones inactivas quedan al inicio del OrderedDict (orden LRU)
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            over_limit = len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+            if not over_limit and not self._is_idle(oldest):
+                break
+            self._evict(oldest_id)
+
+
+# Instancia compartida por todo el proceso
+session_context_store = SessionContextStore.from_env()
@@ -0,0 +1,109 @@
+import os
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Sequence
+
+from src.domain.entities import ChatContext, Product
+
+
+@dataclass
+class _Call:
+    """Generación en curso compartida por todos sus solicitantes."""
+    task: asyncio.Future
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Coalescencia de generaciones idénticas en curso ("single-flight").
+
+    La primera solicitud de una clave ejecuta la llamada al modelo; las que
+    llegan mientras sigue en curso esperan ese mismo resultado en lugar de
+    hacer otra llamada. Al terminar, la clave se libera: no guarda
+    resultados (eso lo hace ResponseCache), por lo que no hay riesgo de
+    respuestas obsoletas.
+
+    La llamada corre en su propia tarea: si un solicitante se cancela (por
+    ejemplo, el cliente se desconecta) los demás siguen esperando, y solo
+    se cancela cuando no queda ninguno.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls) -> "SingleFlight":
+        """Crea la instancia; SINGLE_FLIGHT=0 la desactiva."""
+        return cls(enabled=os.getenv("SINGLE_FLIGHT", "1").lower() in {"1", "true", "yes"})
+
+    def make_key(
+        self,
+        message: str,
+        products: Sequence[Product],
+        context: ChatContext,
+        catalog_version: Optional[int],
+    ) -> Optional[str]:
+        """
+        Huella de las entradas del prompt: mensaje exacto, productos enviados,
+        contexto de la conversación y versión del catálogo.
+        """
+        if not self.enabled:
+            return None
+        fingerprint = hashlib.sha1()
+        fingerprint.update(message.encode())
+        fingerprint.update(f"\x1e{catalog_version}\x1e".encode())
+        fingerprint.update(",".join(str(p.id) for p in products).encode())
+        fingerprint.update(b"\x1e" + context.format_for_prompt().encode())
+        return fingerprint.hexdigest()
+
+    async def do(self, key: Optional[str], fn: Callable[[], Awaitable]):
+        """
+        Ejecuta `fn` o se une a la ejecución en curso con la misma clave.
+
+        Args:
+            key (Optional[str]): Clave de coalescencia (None = sin coalescer).
+            fn (Callable[[], Awaitable]): Crea la llamada al modelo.
+
+        Returns:
+            El resultado de la llamada (compartido entre solicitantes).
+        """
+        if key is None:
+            return await fn()
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._release(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 3) if total else 0.0,
+        }
+
+    def _release(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+# Instancia compartida por todo el proceso
+single_flight = SingleFlight.from_env()
@@ -1,29 +1,142 @@
 import os
-from sqlalchemy import create_engine
+import time
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from contextlib import contextmanager
 
 # --------------------------------------------
-# Crear carpeta 'data' si no existe
+# URL de conexión (DATABASE_URL, por defecto SQLite local)
 # --------------------------------------------
-os.makedirs("data", exist_ok=True)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/ecommerce_chat.db")
+
+_url = make_url(DATABASE_URL)
+IS_SQLITE = _url.get_backend_name() == "sqlite"
+IS_SQLITE_FILE = IS_SQLITE and _url.database not in (None, "", ":memory:")
 
 # --------------------------------------------
-# URL de conexión a SQLite
+# Crear la carpeta de la base SQLite si no existe
 # --------------------------------------------
-DATABASE_URL = "sqlite:///./data/ecommerce_chat.db"
+if IS_SQLITE_FILE:
+    os.makedirs(os.path.dirname(_url.database) or ".", exist_ok=True)
+
+# --------------------------------------------
+# Perfil de SQLite para producción
+# --------------------------------------------
+# WAL permite que los lectores no bloqueen al escritor (y viceversa);
+# con WAL, synchronous=NORMAL es seguro ante caídas del proceso. SQLITE_TUNING=0
+# deja los valores por defecto de SQLite.
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1").lower() in {"1", "true", "yes"}
+
+SQLITE_PRAGMAS = {
+    # Debe ir primero: solo aplica al crear la base (init_db convierte las existentes).
+    # INCREMENTAL permite devolver páginas libres con PRAGMA incremental_vacuum tras las purgas
+    "auto_vacuum": os.getenv("SQLITE_AUTO_VACUUM", "INCREMENTAL"),
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # Negativo = KiB (64 MiB)
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict = None) -> None:
+    """
+    Aplica los PRAGMA del perfil a una conexión nueva.
+
+    Args:
+        dbapi_connection: Conexión DBAPI (sqlite3 o el adaptador de aiosqlite).
+        pragmas (dict): PRAGMA a aplicar; por defecto SQLITE_PRAGMAS.
+    """
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if name == "journal_mode" and not IS_SQLITE_FILE:
+                continue  # Las bases en memoria no admiten WAL
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _pool_options(async_driver: bool = False) -> dict:
+    """
+    Tamaño del pool configurable con DB_POOL_SIZE, DB_MAX_OVERFLOW y
+    DB_POOL_TIMEOUT. Las bases SQLite en memoria usan su pool por defecto.
+    """
+    if IS_SQLITE and not IS_SQLITE_FILE:
+        return {}
+    options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    }
+    if async_driver and IS_SQLITE:
+        # aiosqlite usa NullPool por defecto: una conexión (y sus PRAGMA) por sesión
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+def _register_sqlite_profile(sync_engine) -> None:
+    if IS_SQLITE and SQLITE_TUNING:
+        event.listen(sync_engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+
 
 # --------------------------------------------
 # Configuración del motor de base de datos
 # --------------------------------------------
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    **_pool_options(),
 )
+_register_sqlite_profile(engine)
 
 # Creador de sesiones
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --------------------------------------------
+# Motor asíncrono (aiosqlite) para no bloquear el event loop
+# --------------------------------------------
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_options(async_driver=True))
+_register_sqlite_profile(async_engine.sync_engine)
+
+# expire_on_commit=False: las entidades siguen legibles tras el commit sin otra consulta
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# --------------------------------------------
+# Contador de consultas SQL (expuesto en /metrics)
+# --------------------------------------------
+class QueryCounter:
+    """
+    Cuenta las sentencias ejecutadas por ambos motores. Las pruebas de
+    carga lo leen antes y después de cada escenario para obtener las
+    consultas por request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+
+query_counter = QueryCounter()
+event.listen(engine, "before_cursor_execute", query_counter)
+event.listen(async_engine.sync_engine, "before_cursor_execute", query_counter)
+
 # Clase base para los modelos ORM
 Base = declarative_base()
 
@@ -41,6 +154,15 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """
+    Genera una sesión asíncrona de base de datos para cada request de FastAPI.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # --------------------------------------------
 # Inicializador de la base de datos
 # --------------------------------------------
@@ -50,9 +172,59 @@ def init_db():
     """
     from src.infrastructure.db import models  # Import diferido
     Base.metadata.create_all(bind=engine)
+    _ensure_auto_vacuum()
+
+    # create_all no agrega índices nuevos a tablas que ya existían
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _seed_catalog_version()
     print("✅ Tablas creadas correctamente.")
 
 
+def _seed_catalog_version(bind=None) -> None:
+    """
+    Crea la fila de `catalog_version` si aún no existe. Así todos los workers
+    toman el mismo `modified_at` al iniciar (y emiten los mismos ETag)
+    aunque el catálogo nunca se haya escrito.
+    """
+    from sqlalchemy import insert, select
+    from sqlalchemy.exc import IntegrityError
+    from src.infrastructure.db.models import CatalogVersionModel
+    from src.infrastructure.repositories.product_repository import CATALOG_VERSION_ID
+
+    try:
+        with (bind or engine).begin() as conn:
+            seeded = conn.execute(
+                select(CatalogVersionModel.id).where(CatalogVersionModel.id == CATALOG_VERSION_ID)
+            ).first()
+            if seeded is None:
+                conn.execute(insert(CatalogVersionModel).values(
+                    id=CATALOG_VERSION_ID, version=1, modified_at=time.time()
+                ))
+    except IntegrityError:
+        pass  # Otro worker la creó al mismo tiempo
+
+
+_AUTO_VACUUM_MODES = {"NONE": 0, "FULL": 1, "INCREMENTAL": 2}
+
+
+def _ensure_auto_vacuum() -> None:
+    """
+    Convierte una base SQLite existente al modo auto_vacuum configurado.
+    Requiere un VACUUM completo, que se hace una sola vez.
+    """
+    if not (IS_SQLITE_FILE and SQLITE_TUNING):
+        return
+    wanted = _AUTO_VACUUM_MODES.get(str(SQLITE_PRAGMAS["auto_vacuum"]).upper())
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        current = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+        if wanted is None or current == wanted:
+            return
+        print(f"⏳ Convirtiendo la base a auto_vacuum={SQLITE_PRAGMAS['auto_vacuum']} (VACUUM único)...")
+        conn.exec_driver_sql("VACUUM")
+
+
 # --------------------------------------------
 # Ejecución directa del módulo
 # --------------------------------------------
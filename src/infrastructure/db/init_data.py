@@ -1,5 +1,8 @@
 from src.infrastructure.db.database import SessionLocal
 from src.infrastructure.db.models import ProductModel
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.search.product_index import product_index
+from src.infrastructure.repositories.product_repository import catalog_version_bump_statement
 
 
 def load_initial_data():
@@ -27,7 +30,11 @@ def load_initial_data():
         ]
 
         db.add_all(products)
+        bump = catalog_version_bump_statement(db.get_bind().dialect.name)
+        stamp = tuple(db.execute(bump).one()) if bump is not None else ()
         db.commit()
+        catalog_cache.invalidate(*stamp)
+        product_index.clear()
         print("✅ Datos iniciales cargados correctamente.")
 
     except Exception as e:
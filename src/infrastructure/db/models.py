@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Float, Text, DateTime, Index
 from datetime import datetime
 from src.infrastructure.db.database import Base
 
@@ -18,7 +18,7 @@ class ProductModel(Base):
     category = Column(String(100), nullable=False, index=True)
     size = Column(String(20), nullable=False)
     color = Column(String(50), nullable=False)
-    price = Column(Float, nullable=False)
+    price = Column(Float, nullable=False, index=True)
     stock = Column(Integer, nullable=False)
     description = Column(Text, nullable=True)
 
@@ -32,14 +32,95 @@ class ProductModel(Base):
 class ChatMemoryModel(Base):
     """
     Representa un mensaje almacenado en el historial de chat.
+
+    El índice compuesto (session_id, timestamp) permite leer el historial de
+    una sesión ya ordenado, sin ordenar todos sus mensajes en cada consulta.
     """
     __tablename__ = "chat_memory"
+    __table_args__ = (
+        Index("ix_chat_memory_session_timestamp", "session_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    session_id = Column(String(100), nullable=False, index=True)
+    session_id = Column(String(100), nullable=False)
     role = Column(String(20), nullable=False)
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
         return f"<ChatMemoryModel id={self.id} role={self.role} session={self.session_id}>"
+
+
+# ------------------------------
+# MODELO: ChatSummaryModel
+# ------------------------------
+class ChatSummaryModel(Base):
+    """
+    Resumen acumulado de los turnos antiguos de una sesión (uno por sesión).
+    """
+    __tablename__ = "chat_summaries"
+
+    session_id = Column(String(100), primary_key=True)
+    summary = Column(Text, nullable=False)
+    summarized_until = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ChatSummaryModel session={self.session_id}>"
+
+
+# ------------------------------
+# MODELO: ChatJobModel
+# ------------------------------
+class ChatJobModel(Base):
+    """
+    Trabajo de chat asíncrono (POST /chat/jobs).
+
+    El índice (status, priority, created_at) entrega el próximo trabajo en
+    cola sin ordenar la tabla; los trabajos terminados se purgan tras
+    CHAT_JOBS_RESULT_TTL_S. Un trabajo en curso tiene un lease que su worker
+    renueva; si vence (el proceso murió o no pudo guardar el resultado),
+    el trabajo vuelve a la cola.
+    """
+    __tablename__ = "chat_jobs"
+    __table_args__ = (
+        Index("ix_chat_jobs_status_priority_created", "status", "priority", "created_at"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    session_id = Column(String(100), nullable=False)
+    message = Column(Text, nullable=False)
+    priority = Column(Integer, nullable=False, default=5)
+    status = Column(String(20), nullable=False)
+    response = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    user_saved = Column(Boolean, nullable=False, default=False)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<ChatJobModel id={self.id} status={self.status} session={self.session_id}>"
+
+
+# ------------------------------
+# MODELO: CatalogVersionModel
+# ------------------------------
+class CatalogVersionModel(Base):
+    """
+    Versión compartida del catálogo (una sola fila, id=1).
+
+    Cada escritura sobre `products` la incrementa en su misma transacción;
+    los procesos de la API la consultan para invalidar sus caches cuando el
+    catálogo cambió en otro proceso (otro worker o el importador CLI).
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    modified_at = Column(Float, nullable=False)  # Epoch de la última escritura
+
+    def __repr__(self):
+        return f"<CatalogVersionModel version={self.version}>"
@@ -0,0 +1,247 @@
+import io
+import os
+import csv
+import json
+import time
+import argparse
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.domain.entities import PRODUCT_FIELDS, Product
+from src.domain.repositories import IProductRepository
+
+FEED_FORMATS = ("csv", "jsonl")
+
+# Content-Types aceptados por el endpoint de importación
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+# --------------------------------------------
+# Resultado de una importación
+# --------------------------------------------
+@dataclass
+class ImportReport:
+    """
+    Resumen de una importación de productos.
+
+    Attributes:
+        read (int): Registros leídos del feed.
+        imported (int): Productos insertados o actualizados.
+        rejected (int): Registros descartados por no cumplir las reglas de Product.
+        batches (int): Lotes (transacciones) escritos.
+        seconds (float): Duración total.
+        errors (List[str]): Primeros errores, con su número de registro.
+        aborted (Optional[str]): Motivo por el que la importación se detuvo
+            antes del final del feed (los lotes previos quedan guardados).
+    """
+    read: int = 0
+    imported: int = 0
+    rejected: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    aborted: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "imported": self.imported,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "errors": self.errors,
+            "aborted": self.aborted,
+        }
+
+
+# --------------------------------------------
+# Lectura del feed (un registro a la vez)
+# --------------------------------------------
+def detect_format(name: Optional[str] = None, content_type: Optional[str] = None) -> str:
+    """
+    Deduce el formato del feed por Content-Type o extensión del archivo.
+
+    Raises:
+        ValueError: Si no se puede deducir el formato.
+    """
+    if content_type:
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type in CONTENT_TYPE_FORMATS:
+            return CONTENT_TYPE_FORMATS[media_type]
+    if name:
+        extension = os.path.splitext(name)[1].lower().lstrip(".")
+        if extension in ("jsonl", "ndjson"):
+            return "jsonl"
+        if extension == "csv":
+            return "csv"
+    raise ValueError(f"Formato de feed desconocido. Opciones: {', '.join(FEED_FORMATS)}.")
+
+
+def iter_records(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Recorre el feed de forma perezosa y retorna (número de registro, dict).
+
+    Un registro JSONL inválido se retorna como la excepción que lo rechazó,
+    para que el importador lo cuente sin detener la carga.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row
+    elif fmt == "jsonl":
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, ValueError(f"JSON inválido: {e.msg}")
+    else:
+        raise ValueError(f"Formato de feed desconocido: {fmt}. Opciones: {', '.join(FEED_FORMATS)}.")
+
+
+def record_to_product(record: Dict) -> Product:
+    """
+    Convierte un registro del feed en Product (aplica sus validaciones).
+
+    Raises:
+        ValueError: Si falta un campo obligatorio o un valor no es válido.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("El registro debe ser un objeto.")
+    missing = [name for name in PRODUCT_FIELDS if name not in ("id", "description") and record.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Campos faltantes: {', '.join(missing)}.")
+    try:
+        product_id = record.get("id")
+        return Product(
+            id=int(product_id) if product_id not in (None, "") else None,
+            name=str(record["name"]),
+            brand=str(record["brand"]),
+            category=str(record["category"]),
+            size=str(record["size"]),
+            color=str(record["color"]),
+            price=float(record["price"]),
+            stock=int(record["stock"]),
+            description=str(record.get("description") or ""),
+        )
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e))
+
+
+# --------------------------------------------
+# Importador por lotes
+# --------------------------------------------
+class ProductFeedImporter:
+    """
+    Importa un feed de productos en lotes de `batch_size`.
+
+    Lee el feed registro a registro, valida cada uno con las reglas de
+    Product y escribe cada lote con `IProductRepository.bulk_upsert` (un
+    executemany y un commit por lote). Solo un lote vive en memoria a la
+    vez, así que el uso de memoria no depende del tamaño del feed.
+
+    Attributes:
+        batch_size (int): Productos por lote/transacción.
+        max_errors (int): Errores guardados en el reporte (se cuentan todos).
+        on_progress (Callable): Se llama con el reporte parcial tras cada lote.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        max_errors: int = 100,
+        on_progress: Optional[Callable[[ImportReport], None]] = None,
+    ):
+        if batch_size <= 0:
+            raise ValueError("batch_size debe ser mayor que 0")
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.on_progress = on_progress
+
+    def run(self, lines: Iterable[str], fmt: str, repo: IProductRepository) -> ImportReport:
+        """
+        Importa todas las líneas del feed.
+
+        Args:
+            lines (Iterable[str]): Líneas del archivo (se consumen de a una).
+            fmt (str): "csv" o "jsonl".
+            repo (IProductRepository): Repositorio donde se escriben los lotes.
+
+        Returns:
+            ImportReport: Resumen de la importación. Si el feed deja de ser
+                UTF-8 válido a mitad de camino, se guarda lo leído hasta ahí y
+                `aborted` explica dónde se detuvo.
+        """
+        report = ImportReport()
+        started = time.perf_counter()
+        products = self._validated(iter_records(lines, fmt), report)
+        batch: List[Product] = []
+        try:
+            for product in products:
+                batch.append(product)
+                if len(batch) >= self.batch_size:
+                    self._write(batch, repo, report, started)
+                    batch = []
+        except UnicodeDecodeError:
+            report.aborted = f"El feed no es UTF-8 válido después del registro {report.read}."
+        if batch:
+            self._write(batch, repo, report, started)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _write(self, batch: List[Product], repo: IProductRepository, report: ImportReport, started: float) -> None:
+        report.imported += repo.bulk_upsert(batch)
+        report.batches += 1
+        report.seconds = time.perf_counter() - started
+        if self.on_progress:
+            self.on_progress(report)
+
+    def _validated(self, records: Iterable[Tuple[int, object]], report: ImportReport) -> Iterator[Product]:
+        for number, record in records:
+            report.read += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                yield record_to_product(record)
+            except ValueError as e:
+                report.rejected += 1
+                if len(report.errors) < self.max_errors:
+                    report.errors.append(f"registro {number}: {e}")
+
+
+def text_lines(binary) -> io.TextIOWrapper:
+    """Líneas de texto UTF-8 de un archivo binario (sin cargarlo completo)."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def print_progress(report: ImportReport) -> None:
+    rate = report.imported / report.seconds if report.seconds else 0.0
+    print(f"⏳ {report.imported} productos importados, {report.rejected} rechazados ({rate:,.0f}/s)")
+
+
+# --------------------------------------------
+# Ejecución directa del módulo
+# --------------------------------------------
+if __name__ == "__main__":
+    from src.infrastructure.db.database import SessionLocal, init_db
+    from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+    parser = argparse.ArgumentParser(description="Importa un feed de productos CSV o JSONL.")
+    parser.add_argument("path", help="Archivo .csv, .jsonl o .ndjson")
+    parser.add_argument("--format", choices=FEED_FORMATS, help="Formato (por defecto, según la extensión)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Productos por transacción")
+    args = parser.parse_args()
+
+    init_db()
+    importer = ProductFeedImporter(batch_size=args.batch_size, on_progress=print_progress)
+    with open(args.path, "rb") as feed, SessionLocal() as db:
+        result = importer.run(text_lines(feed), args.format or detect_format(name=args.path), SQLProductRepository(db))
+    print(json.dumps(result.to_dict(), indent=2, ensure_ascii=False))
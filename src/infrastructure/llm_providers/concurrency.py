@@ -0,0 +1,81 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from src.domain.exceptions import LLMCapacityError
+
+
+class ConcurrencyLimiter:
+    """
+    Limita la cantidad de llamadas simultáneas al proveedor de IA.
+
+    Las llamadas que no consiguen un cupo esperan en cola hasta
+    `queue_timeout` segundos; pasado ese tiempo se lanza LLMCapacityError.
+
+    Attributes:
+        max_concurrency (int): Máximo de llamadas en vuelo.
+        queue_timeout (Optional[float]): Segundos máximos de espera por un cupo
+            (None = esperar indefinidamente).
+    """
+
+    def __init__(self, max_concurrency: int = 8, queue_timeout: Optional[float] = 10.0):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency debe ser mayor que 0.")
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Reserva un cupo durante el bloque `async with`.
+
+        Raises:
+            LLMCapacityError: Si no se obtuvo cupo dentro de `queue_timeout`.
+        """
+        if self._semaphore.locked():
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise LLMCapacityError(
+                    f"El asistente está saturado ({self.max_concurrency} consultas en curso). Inténtalo en unos segundos."
+                )
+            finally:
+                self.waiting -= 1
+        else:
+            # Hay cupo libre: se toma sin crear una espera con timeout
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    @property
+    def saturation(self) -> float:
+        """Fracción de cupos ocupados (1.0 = pool lleno)."""
+        return self.in_flight / self.max_concurrency
+
+    def stats(self) -> dict:
+        """Métricas actuales del pool."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout": self.queue_timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "saturation": round(self.saturation, 3),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,76 @@
+import os
+import asyncio
+from collections import deque
+from typing import Deque
+
+from src.infrastructure.llm_providers.prompt_budget import estimate_tokens
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeStream:
+    def __init__(self, text: str, chunk_delay: float):
+        self.words = text.split(" ")
+        self.chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for i, word in enumerate(self.words):
+            await asyncio.sleep(self.chunk_delay)
+            yield _FakeResponse(word if i == 0 else " " + word)
+
+
+class FakeGenerativeModel:
+    """
+    Sustituto local y determinista de `genai.GenerativeModel`.
+
+    No usa red ni API key: espera una latencia que crece con el tamaño del
+    prompt y responde siempre el mismo texto, a un ritmo fijo de fragmentos.
+    Se usa con `GeminiService(model=...)` en benchmarks y pruebas de carga.
+
+    Attributes:
+        base_latency (float): Segundos fijos por llamada (hasta el primer fragmento).
+        per_token_latency (float): Segundos adicionales por token de entrada.
+        chunk_delay (float): Segundos entre fragmentos (inverso del ritmo de tokens).
+        prompt_tokens (Deque[int]): Tokens estimados de los últimos
+            `prompt_window` prompts recibidos (acotado: el modelo vive
+            durante toda una prueba de carga).
+    """
+
+    RESPONSE = "Te recomiendo revisar estas opciones de nuestro catálogo."
+
+    def __init__(
+        self,
+        base_latency: float = 0.05,
+        per_token_latency: float = 0.00002,
+        chunk_delay: float = 0.01,
+        prompt_window: int = 1000,
+    ):
+        self.base_latency = base_latency
+        self.per_token_latency = per_token_latency
+        self.chunk_delay = chunk_delay
+        self.prompt_tokens: Deque[int] = deque(maxlen=prompt_window)
+
+    @classmethod
+    def from_env(cls) -> "FakeGenerativeModel":
+        """
+        Crea el modelo con FAKE_LLM_LATENCY_MS, FAKE_LLM_PER_TOKEN_MS y
+        FAKE_LLM_TOKENS_PER_SEC (fragmentos de salida por segundo).
+        """
+        tokens_per_sec = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "100"))
+        return cls(
+            base_latency=float(os.getenv("FAKE_LLM_LATENCY_MS", "50")) / 1000,
+            per_token_latency=float(os.getenv("FAKE_LLM_PER_TOKEN_MS", "0.02")) / 1000,
+            chunk_delay=1 / tokens_per_sec if tokens_per_sec > 0 else 0.0,
+        )
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        tokens = estimate_tokens(prompt)
+        self.prompt_tokens.append(tokens)
+        await asyncio.sleep(self.base_latency + tokens * self.per_token_latency)
+        if stream:
+            return _FakeStream(self.RESPONSE, self.chunk_delay)
+        await asyncio.sleep(self.chunk_delay * len(self.RESPONSE.split(" ")))
+        return _FakeResponse(self.RESPONSE)
@@ -1,71 +1,141 @@
 import os
+from typing import AsyncIterator, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 from src.domain.entities import ChatContext
+from src.domain.exceptions import LLMProviderError
+from src.domain.llm_provider import ILLMProvider, FALLBACK_RESPONSE
+from src.infrastructure.llm_providers.concurrency import ConcurrencyLimiter
+from src.infrastructure.llm_providers.prompt_builder import PromptBuilder
 
 # Cargar variables de entorno desde .env
 load_dotenv()
 
 
-class GeminiService:
+class GeminiService(ILLMProvider):
     """
     Servicio para interactuar con el modelo de Google Gemini.
     Integra IA conversacional con información del e-commerce.
-    """
-
-    def __init__(self):
-        # Cargar API key desde variables de entorno
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("❌ GEMINI_API_KEY no encontrada en el entorno (.env)")
 
-        # Configurar cliente de Gemini
-        genai.configure(api_key=self.api_key)
+    Se crea una sola vez al iniciar la API y se comparte entre requests.
+    Las llamadas al modelo pasan por un ConcurrencyLimiter que acota las
+    consultas simultáneas (LLM_MAX_CONCURRENCY) y la espera en cola
+    (LLM_QUEUE_TIMEOUT, en segundos).
 
-        # Inicializar modelo (versión rápida y rentable)
-        self.model = genai.GenerativeModel("gemini-2.5-flash")
+    `model` permite inyectar un modelo compatible con `generate_content_async`
+    (como el FakeGenerativeModel de las pruebas de carga). Con
+    `fail_silently=False` los errores del modelo se propagan como
+    LLMProviderError en lugar de responder FALLBACK_RESPONSE (lo usa el
+    enrutador para pasar a otro proveedor).
+    """
 
-    async def generate_response(self, user_message: str, products: list, context: ChatContext) -> str:
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        model=None,
+        fail_silently: bool = True,
+    ):
+        self.fail_silently = fail_silently
+
+        if model is not None:
+            # Modelo inyectado (p. ej. FakeGenerativeModel): no requiere API key
+            self.api_key = None
+            self.model_name = model_name or type(model).__name__
+            self.model = model
+        else:
+            # Cargar API key desde variables de entorno
+            self.api_key = os.getenv("GEMINI_API_KEY")
+            if not self.api_key:
+                raise ValueError("❌ GEMINI_API_KEY no encontrada en el entorno (.env)")
+
+            # Configurar cliente de Gemini
+            genai.configure(api_key=self.api_key)
+
+            # Inicializar modelo (versión rápida y rentable)
+            self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+            self.model = genai.GenerativeModel(self.model_name)
+
+        # Plantilla del prompt precompilada (cachea el bloque de productos)
+        self.prompt_builder = PromptBuilder()
+
+        # Pool de llamadas concurrentes
+        self.limiter = ConcurrencyLimiter(
+            max_concurrency=max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            queue_timeout=queue_timeout if queue_timeout is not None else float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+        )
+
+    async def generate_response(
+        self,
+        user_message: str,
+        products: list,
+        context: ChatContext,
+        catalog_version: Optional[int] = None,
+    ) -> str:
         """
         Genera una respuesta de Gemini combinando productos, contexto y mensaje actual.
         """
-
-        # 1️⃣ Formatear productos
-        products_info = self.format_products_info(products)
-
-        # 2️⃣ Formatear contexto conversacional
-        context_text = context.format_for_prompt() if context else ""
-
-        # 3️⃣ Construir prompt completo
-        prompt = f"""
-Eres un asistente virtual experto en ventas de zapatos para un e-commerce.
-Tu objetivo es ayudar a los clientes a encontrar los zapatos perfectos.
-
-PRODUCTOS DISPONIBLES:
-{products_info}
-
-INSTRUCCIONES:
-- Sé amigable y profesional
-- Usa el contexto de la conversación anterior
-- Recomienda productos específicos cuando sea apropiado
-- Menciona precios, tallas y disponibilidad
-- Si no tienes información, sé honesto
-
-HISTORIAL DE CONVERSACIÓN:
-{context_text}
-
-Usuario: {user_message}
-
-Asistente:
-"""
-
-        # 4️⃣ Llamar a Gemini API
-        try:
-            response = await self.model.generate_content_async(prompt)
-            return response.text.strip()
-        except Exception as e:
-            print(f"⚠️ Error al generar respuesta con Gemini: {e}")
-            return "Lo siento, hubo un problema al procesar tu mensaje. Inténtalo nuevamente más tarde."
+        prompt = self.build_prompt(user_message, products, context, catalog_version)
+
+        # Llamar a Gemini API (LLMCapacityError se propaga si el pool está lleno)
+        async with self.limiter.slot():
+            try:
+                response = await self.model.generate_content_async(prompt)
+                return response.text.strip()
+            except Exception as e:
+                if not self.fail_silently:
+                    raise LLMProviderError(f"{self.model_name}: {e}") from e
+                print(f"⚠️ Error al generar respuesta con Gemini: {e}")
+                return FALLBACK_RESPONSE
+
+    async def stream_response(
+        self,
+        user_message: str,
+        products: list,
+        context: ChatContext,
+        catalog_version: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Genera la respuesta en modo streaming, entregando cada fragmento de
+        texto apenas Gemini lo produce. El cupo del pool se mantiene hasta
+        que termina (o se abandona) el stream.
+        """
+        prompt = self.build_prompt(user_message, products, context, catalog_version)
+
+        async with self.limiter.slot():
+            produced = False
+            try:
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    if chunk.text:
+                        produced = True
+                        yield chunk.text
+            except Exception as e:
+                if not self.fail_silently:
+                    raise LLMProviderError(f"{self.model_name}: {e}") from e
+                print(f"⚠️ Error en el streaming de Gemini: {e}")
+                if not produced:
+                    yield FALLBACK_RESPONSE
+
+    def stats(self) -> dict:
+        """
+        Retorna el modelo en uso y las métricas del pool de concurrencia.
+        """
+        return {"model": self.model_name, **self.limiter.stats()}
+
+    def build_prompt(
+        self,
+        user_message: str,
+        products: list,
+        context: ChatContext,
+        catalog_version: Optional[int] = None,
+    ) -> str:
+        """
+        Construye el prompt completo con productos, contexto y mensaje actual.
+        Con `catalog_version` reutiliza el bloque de productos ya formateado.
+        """
+        return self.prompt_builder.build(user_message, products, context, catalog_version)
 
     def format_products_info(self, products: list) -> str:
         """
@@ -73,12 +143,4 @@ Asistente:
         Ejemplo:
         - Nike Air Zoom | Nike | $120 | Stock: 8
         """
-        if not products:
-            return "No hay productos disponibles en este momento."
-
-        formatted = []
-        for p in products:
-            formatted.append(
-                f"- {p.name} | {p.brand} | ${p.price:.2f} | Talla: {p.size} | Stock: {p.stock}"
-            )
-        return "\n".join(formatted)
+        return self.prompt_builder.render_products(products)
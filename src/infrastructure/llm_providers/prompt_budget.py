@@ -0,0 +1,196 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from src.domain.entities import SUMMARY_HEADER, ChatMessage, ChatSummary, Product
+from src.infrastructure.llm_providers.prompt_builder import (
+    PROMPT_FOOTER,
+    PROMPT_HEADER,
+    PROMPT_INSTRUCTIONS,
+    PROMPT_USER_PREFIX,
+    format_product_line,
+)
+
+# Secciones fijas presentes en todos los prompts
+_FIXED_TEXT = PROMPT_HEADER + PROMPT_INSTRUCTIONS + PROMPT_USER_PREFIX + PROMPT_FOOTER
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación rápida de tokens (≈ 4 caracteres por token)."""
+    return max(1, len(text) // 4)
+
+
+def _cost(text: str) -> int:
+    # Redondeo hacia arriba por sección: la suma nunca queda bajo la estimación del prompt completo
+    return -(-len(text) // 4)
+
+
+def _message_tokens(message: ChatMessage) -> int:
+    return _cost(f"{message.role}: {message.message}\n")
+
+
+@dataclass
+class FittedPrompt:
+    """Partes del prompt que entran en el presupuesto."""
+    products: List[Product]
+    recent: List[ChatMessage]
+    dropped: List[ChatMessage]  # Turnos que no entran y deben pasar al resumen
+    remaining_tokens: int
+
+
+class PromptBudget:
+    """
+    Reparte un presupuesto de tokens entre las secciones del prompt, en
+    orden de prioridad: instrucciones y mensaje del usuario, productos
+    relevantes (en el orden del índice), turnos recientes (del más nuevo
+    al más antiguo) y, con lo que sobra, el resumen de los turnos antiguos.
+
+    Attributes:
+        max_tokens (int): Tokens máximos del prompt (0 = sin presupuesto).
+        max_recent_messages (int): Turnos recientes que se consideran.
+        summary_tokens (int): Tokens máximos del resumen acumulado.
+    """
+
+    def __init__(self, max_tokens: int = 1500, max_recent_messages: int = 6, summary_tokens: int = 200):
+        self.max_tokens = max_tokens
+        self.max_recent_messages = max_recent_messages
+        self.summary_tokens = summary_tokens
+        self._fixed_tokens = _cost(_FIXED_TEXT)
+
+    @classmethod
+    def from_env(cls) -> "PromptBudget":
+        """
+        Crea el presupuesto con PROMPT_MAX_TOKENS, PROMPT_MAX_RECENT_MESSAGES
+        y PROMPT_SUMMARY_MAX_TOKENS.
+        """
+        return cls(
+            max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "1500")),
+            max_recent_messages=int(os.getenv("PROMPT_MAX_RECENT_MESSAGES", "6")),
+            summary_tokens=int(os.getenv("PROMPT_SUMMARY_MAX_TOKENS", "200")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_tokens > 0
+
+    @property
+    def history_window(self) -> int:
+        """
+        Mensajes a leer por turno: los recientes más un margen, para que los
+        que salen del prompt se vean al menos una vez y pasen al resumen.
+        """
+        return self.max_recent_messages + 6
+
+    def fit(self, user_message: str, products: Sequence[Product], messages: Sequence[ChatMessage]) -> FittedPrompt:
+        """
+        Selecciona los productos y turnos recientes que entran en el presupuesto.
+
+        Args:
+            user_message (str): Mensaje actual del usuario.
+            products (Sequence[Product]): Productos en orden de relevancia.
+            messages (Sequence[ChatMessage]): Historial reciente en orden cronológico.
+
+        Returns:
+            FittedPrompt: Productos y turnos elegidos, turnos descartados y tokens libres.
+        """
+        remaining = self.max_tokens - self._fixed_tokens - _cost(user_message)
+
+        fitted_products = []
+        for product in products:
+            cost = _cost(format_product_line(product) + "\n")
+            if cost > remaining:
+                break
+            fitted_products.append(product)
+            remaining -= cost
+
+        recent: List[ChatMessage] = []
+        candidates = list(messages)
+        cut = len(candidates)
+        for message in reversed(candidates[-self.max_recent_messages:] if self.max_recent_messages else []):
+            cost = _message_tokens(message)
+            if cost > remaining:
+                break
+            recent.append(message)
+            remaining -= cost
+            cut -= 1
+        recent.reverse()
+
+        return FittedPrompt(
+            products=fitted_products,
+            recent=recent,
+            dropped=candidates[:cut],
+            remaining_tokens=max(0, remaining),
+        )
+
+    def fit_summary(self, summary: Optional[str], remaining_tokens: int) -> Optional[str]:
+        """
+        Recorta el resumen (conservando sus líneas más nuevas) al espacio libre.
+        """
+        if not summary:
+            return None
+        limit = min(self.summary_tokens, remaining_tokens - _cost(SUMMARY_HEADER + "\n\n"))
+        lines = summary.splitlines()
+        while lines and _cost("\n".join(lines)) > limit:
+            lines.pop(0)
+        return "\n".join(lines) or None
+
+
+class RollingSummarizer:
+    """
+    Resumen acumulado y extractivo de los turnos antiguos de una sesión.
+
+    Cada turno que sale del prompt se agrega como una línea breve (el
+    mensaje del cliente recortado y la primera oración del asistente) y se
+    descartan las líneas más antiguas al superar `max_tokens`. Se actualiza
+    de forma incremental: nunca se vuelve a procesar el historial completo
+    ni se llama al modelo.
+
+    Attributes:
+        max_tokens (int): Tokens máximos del resumen.
+        user_chars (int): Caracteres máximos por mensaje del cliente.
+        assistant_chars (int): Caracteres máximos por respuesta del asistente.
+    """
+
+    def __init__(self, max_tokens: int = 200, user_chars: int = 160, assistant_chars: int = 100):
+        self.max_tokens = max_tokens
+        self.user_chars = user_chars
+        self.assistant_chars = assistant_chars
+
+    def fold(self, summary: ChatSummary, messages: Sequence[ChatMessage]) -> ChatSummary:
+        """
+        Agrega al resumen los mensajes que aún no incluye.
+
+        Returns:
+            ChatSummary: Resumen actualizado (el mismo objeto si no hubo cambios).
+        """
+        new = [m for m in messages if not summary.covers(m)]
+        if not new:
+            return summary
+
+        lines = summary.text.splitlines() if summary.text else []
+        for message in new:
+            lines.append(self._line(message))
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return ChatSummary(
+            session_id=summary.session_id,
+            text="\n".join(lines),
+            summarized_until=max(m.timestamp for m in new),
+        )
+
+    def _line(self, message: ChatMessage) -> str:
+        text = " ".join(message.message.split())
+        if message.is_from_user():
+            return f"- Cliente: {self._clip(text, self.user_chars)}"
+        first_sentence = text.split(". ")[0]
+        return f"- Asistente: {self._clip(first_sentence, self.assistant_chars)}"
+
+    @staticmethod
+    def _clip(text: str, limit: int) -> str:
+        if len(text) <= limit:
+            return text
+        return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+# Instancia compartida por todo el proceso (PROMPT_MAX_TOKENS=0 la desactiva)
+prompt_budget = PromptBudget.from_env()
@@ -0,0 +1,131 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from src.domain.entities import ChatContext, Product
+
+
+# --------------------------------------------
+# Secciones estáticas del prompt (se arman una sola vez)
+# --------------------------------------------
+PROMPT_HEADER = """
+Eres un asistente virtual experto en ventas de zapatos para un e-commerce.
+Tu objetivo es ayudar a los clientes a encontrar los zapatos perfectos.
+
+PRODUCTOS DISPONIBLES:
+"""
+
+PROMPT_INSTRUCTIONS = """
+
+INSTRUCCIONES:
+- Sé amigable y profesional
+- Usa el contexto de la conversación anterior
+- Recomienda productos específicos cuando sea apropiado
+- Menciona precios, tallas y disponibilidad
+- Si no tienes información, sé honesto
+
+HISTORIAL DE CONVERSACIÓN:
+"""
+
+PROMPT_USER_PREFIX = "\n\nUsuario: "
+PROMPT_FOOTER = "\n\nAsistente:\n"
+
+NO_PRODUCTS_TEXT = "No hay productos disponibles en este momento."
+
+
+def format_product_line(p: Product) -> str:
+    """
+    Convierte un producto a una línea del prompt.
+    Ejemplo:
+    - Nike Air Zoom | Nike | $120.00 | Talla: 42 | Stock: 8
+    """
+    return f"- {p.name} | {p.brand} | ${p.price:.2f} | Talla: {p.size} | Stock: {p.stock}"
+
+
+class PromptBuilder:
+    """
+    Arma el prompt de Gemini a partir de secciones precompiladas.
+
+    Las líneas de productos se formatean una vez por versión del catálogo y
+    los bloques ya unidos se guardan en una LRU pequeña, así cada turno solo
+    concatena el bloque cacheado, el historial y el mensaje del usuario.
+    Sin versión de catálogo (None) el bloque se formatea en cada llamada.
+
+    Attributes:
+        max_blocks (int): Cantidad de bloques de productos que se guardan.
+    """
+
+    def __init__(self, max_blocks: int = 256):
+        self.max_blocks = max_blocks
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._lines: Dict[int, str] = {}
+        self._blocks: "OrderedDict[Tuple[int, ...], str]" = OrderedDict()
+
+    def build(
+        self,
+        user_message: str,
+        products: Sequence[Product],
+        context: Optional[ChatContext],
+        catalog_version: Optional[int] = None,
+    ) -> str:
+        """
+        Construye el prompt completo.
+
+        Args:
+            user_message (str): Mensaje actual del usuario.
+            products (Sequence[Product]): Productos a incluir.
+            context (Optional[ChatContext]): Historial reciente.
+            catalog_version (Optional[int]): Versión del catálogo de la que
+                provienen los productos (habilita la cache).
+
+        Returns:
+            str: Prompt listo para enviar al modelo.
+        """
+        context_text = context.format_for_prompt() if context else ""
+        return "".join((
+            PROMPT_HEADER,
+            self.render_products(products, catalog_version),
+            PROMPT_INSTRUCTIONS,
+            context_text,
+            PROMPT_USER_PREFIX,
+            user_message,
+            PROMPT_FOOTER,
+        ))
+
+    def render_products(self, products: Sequence[Product], catalog_version: Optional[int] = None) -> str:
+        """
+        Retorna el bloque de texto con los productos, cacheado por versión.
+        """
+        if not products:
+            return NO_PRODUCTS_TEXT
+        if catalog_version is None:
+            return "\n".join(format_product_line(p) for p in products)
+
+        key = tuple(p.id for p in products)
+        if None in key:
+            return "\n".join(format_product_line(p) for p in products)
+
+        with self._lock:
+            if catalog_version != self._version:
+                self._version = catalog_version
+                self._lines.clear()
+                self._blocks.clear()
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+
+            lines = self._lines
+            parts = []
+            for p in products:
+                line = lines.get(p.id)
+                if line is None:
+                    line = lines[p.id] = format_product_line(p)
+                parts.append(line)
+            block = "\n".join(parts)
+
+            self._blocks[key] = block
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+            return block
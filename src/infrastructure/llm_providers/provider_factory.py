@@ -0,0 +1,38 @@
+import os
+from typing import Optional
+
+from src.domain.llm_provider import ILLMProvider
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.fake_provider import FakeGenerativeModel
+from src.infrastructure.llm_providers.router import HedgedLLMRouter
+
+
+def create_llm_provider() -> ILLMProvider:
+    """
+    Crea el proveedor de IA de la aplicación según el entorno.
+
+    - LLM_PROVIDER=fake usa el modelo local determinista (pruebas de carga).
+    - LLM_FALLBACK_MODELS (lista separada por comas) agrega modelos al pool
+      del HedgedLLMRouter, en orden de preferencia.
+    - LLM_HEDGE=1 sin modelos alternativos se ignora: la cobertura iría al
+      mismo modelo y a su mismo pool, duplicando la carga justo cuando está lento.
+
+    Raises:
+        ValueError: Si falta GEMINI_API_KEY para un modelo real.
+    """
+    fallbacks = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "").split(",") if m.strip()]
+    hedge = os.getenv("LLM_HEDGE", "0").lower() in {"1", "true", "yes"}
+    if not fallbacks:
+        if hedge:
+            print("⚠️ LLM_HEDGE=1 requiere LLM_FALLBACK_MODELS; la cobertura queda desactivada.")
+        return _create_gemini()
+
+    providers = [_create_gemini(fail_silently=False)]
+    providers += [_create_gemini(name, fail_silently=False) for name in fallbacks]
+    return HedgedLLMRouter.from_env(providers)
+
+
+def _create_gemini(model_name: Optional[str] = None, fail_silently: bool = True) -> GeminiService:
+    if os.getenv("LLM_PROVIDER", "gemini").lower() == "fake":
+        return GeminiService(model_name=model_name, model=FakeGenerativeModel.from_env(), fail_silently=fail_silently)
+    return GeminiService(model_name=model_name, fail_silently=fail_silently)
@@ -0,0 +1,268 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, List, Optional
+
+from src.domain.exceptions import LLMCapacityError, LLMProviderError
+from src.domain.llm_provider import ILLMProvider, FALLBACK_RESPONSE
+
+
+# --------------------------------------------
+# Latencias por proveedor
+# --------------------------------------------
+class LatencyTracker:
+    """
+    Ventana móvil de latencias (en segundos) de un proveedor, con
+    contadores de requests, éxitos, fallas, victorias y cancelaciones.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def stats(self) -> dict:
+        p50, p95 = self.percentile(0.50), self.percentile(0.95)
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "wins": self.wins,
+            "cancelled": self.cancelled,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# --------------------------------------------
+# Enrutador con solicitudes de cobertura (hedging)
+# --------------------------------------------
+class HedgedLLMRouter(ILLMProvider):
+    """
+    Proveedor que reparte cada consulta entre un pool ordenado de proveedores.
+
+    Se consulta primero al proveedor principal. Si no responde dentro del
+    retardo de cobertura (por defecto su p95 observado), se envía la misma
+    consulta al siguiente proveedor; gana la primera respuesta y las demás
+    se cancelan. Si un proveedor falla, se pasa al siguiente sin esperar.
+    En streaming la carrera se decide por el primer fragmento.
+
+    Los proveedores deben propagar sus errores (GeminiService con
+    `fail_silently=False`); una respuesta de FALLBACK_RESPONSE cuenta como éxito.
+
+    Attributes:
+        providers (List[ILLMProvider]): Proveedores en orden de preferencia.
+        hedge_delay (Optional[float]): Retardo fijo en segundos; None = percentil observado.
+        hedge_percentile (float): Percentil de latencia usado como retardo adaptativo.
+        min_samples (int): Muestras necesarias antes de usar el percentil.
+        initial_hedge_delay (float): Retardo mientras no hay muestras suficientes.
+    """
+
+    def __init__(
+        self,
+        providers: List[ILLMProvider],
+        hedge_delay: Optional[float] = None,
+        hedge_percentile: float = 0.95,
+        min_samples: int = 20,
+        initial_hedge_delay: float = 2.0,
+        fail_silently: bool = True,
+        names: Optional[List[str]] = None,
+    ):
+        if not providers:
+            raise ValueError("HedgedLLMRouter requiere al menos un proveedor")
+        self.providers = list(providers)
+        self.names = names or self._default_names(self.providers)
+        self.trackers = [LatencyTracker() for _ in self.providers]
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.initial_hedge_delay = initial_hedge_delay
+        self.fail_silently = fail_silently
+        self.hedges = 0
+
+    @classmethod
+    def from_env(cls, providers: List[ILLMProvider]) -> "HedgedLLMRouter":
+        """
+        Crea el enrutador con LLM_HEDGE_DELAY_MS (vacío = adaptativo),
+        LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES y LLM_HEDGE_INITIAL_DELAY_MS.
+        """
+        fixed_delay = os.getenv("LLM_HEDGE_DELAY_MS", "")
+        return cls(
+            providers,
+            hedge_delay=float(fixed_delay) / 1000 if fixed_delay else None,
+            hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+            min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+            initial_hedge_delay=float(os.getenv("LLM_HEDGE_INITIAL_DELAY_MS", "2000")) / 1000,
+        )
+
+    # -------------------------------------------------
+    # ILLMProvider
+    # -------------------------------------------------
+    async def generate_response(self, user_message, products, context, catalog_version=None) -> str:
+        try:
+            return await self._race(
+                lambda provider: provider.generate_response(user_message, products, context, catalog_version=catalog_version)
+            )
+        except LLMProviderError:
+            if not self.fail_silently:
+                raise
+            return FALLBACK_RESPONSE
+
+    async def stream_response(self, user_message, products, context, catalog_version=None) -> AsyncIterator[str]:
+        async def open_stream(provider):
+            # La carrera se decide por el primer fragmento
+            stream = provider.stream_response(user_message, products, context, catalog_version=catalog_version)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = ""
+            return stream, first
+
+        async def close_stream(result):
+            await result[0].aclose()
+
+        try:
+            stream, first = await self._race(open_stream, dispose=close_stream)
+        except LLMProviderError:
+            if not self.fail_silently:
+                raise
+            yield FALLBACK_RESPONSE
+            return
+
+        try:
+            if first:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "model": "router:" + ",".join(self.names),
+            "hedges": self.hedges,
+            "hedge_delay_ms": round(self._hedge_delay(0) * 1000, 1),
+            "providers": {
+                name: {**tracker.stats(), "pool": provider.stats()}
+                for name, tracker, provider in zip(self.names, self.trackers, self.providers)
+            },
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    async def _race(
+        self,
+        call: Callable[[ILLMProvider], Awaitable],
+        dispose: Optional[Callable[[object], Awaitable]] = None,
+    ):
+        """
+        Ejecuta `call` sobre los proveedores con cobertura y failover.
+
+        `dispose` se espera con cada resultado perdedor que alcanzó a
+        completarse (en la misma vuelta que el ganador o antes de cancelarse),
+        p. ej. para cerrar un stream abierto.
+
+        Raises:
+            LLMCapacityError: Si todos los proveedores están saturados.
+            LLMProviderError: Si todos los proveedores fallan.
+        """
+        pending = {}
+        errors = []
+        leftovers = []
+        winner = None
+        launched = 0
+
+        def launch():
+            nonlocal launched
+            index = launched
+            launched += 1
+            self.trackers[index].requests += 1
+            pending[asyncio.ensure_future(self._timed(index, call(self.providers[index])))] = index
+            return index
+
+        last = launch()
+        try:
+            while pending:
+                can_hedge = launched < len(self.providers)
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self._hedge_delay(last) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.hedges += 1
+                    last = launch()
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    elif winner is None:
+                        self.trackers[index].wins += 1
+                        winner = task
+                    else:
+                        leftovers.append(task)  # Otro proveedor respondió en la misma vuelta
+                if winner is not None:
+                    return winner.result()
+                if launched < len(self.providers):
+                    last = launch()
+        finally:
+            for task, index in pending.items():
+                task.cancel()
+                self.trackers[index].cancelled += 1
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                leftovers.extend(pending)
+            if dispose is not None:
+                for task in leftovers:
+                    if not task.cancelled() and task.exception() is None:
+                        await dispose(task.result())
+
+        if all(isinstance(e, LLMCapacityError) for e in errors):
+            raise errors[-1]
+        raise LLMProviderError("; ".join(str(e) for e in errors))
+
+    async def _timed(self, index: int, awaitable: Awaitable):
+        tracker = self.trackers[index]
+        start = time.perf_counter()
+        try:
+            result = await awaitable
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            tracker.failures += 1
+            print(f"⚠️ Proveedor de IA '{self.names[index]}' falló: {e}")
+            raise
+        tracker.record(time.perf_counter() - start)
+        tracker.successes += 1
+        return result
+
+    def _hedge_delay(self, index: int) -> float:
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        tracker = self.trackers[index]
+        if len(tracker.samples) < self.min_samples:
+            return self.initial_hedge_delay
+        return tracker.percentile(self.hedge_percentile)
+
+    @staticmethod
+    def _default_names(providers: List[ILLMProvider]) -> List[str]:
+        names = []
+        for i, provider in enumerate(providers):
+            name = getattr(provider, "model_name", None) or type(provider).__name__
+            names.append(name if name not in names else f"{name}#{i}")
+        return names
@@ -0,0 +1,65 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.repositories import IAsyncChatRepository
+from src.domain.entities import ChatMessage
+from src.infrastructure.db.models import ChatMemoryModel
+from src.infrastructure.repositories.chat_repository import (
+    SQLChatRepository,
+    build_history_page,
+    chunk_ids_query,
+    delete_ids_statement,
+    history_page_query,
+    recent_history_query,
+    rows_to_messages,
+)
+
+
+class AsyncSQLChatRepository(IAsyncChatRepository):
+    """
+    Implementación SQLAlchemy asíncrona (aiosqlite) del repositorio de mensajes del chat.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save_message(self, message: ChatMessage):
+        model = self._entity_to_model(message)
+        self.db.add(model)
+        # El ID se asigna en el INSERT; no hace falta un refresh adicional
+        await self.db.commit()
+        return self._model_to_entity(model)
+
+    async def get_session_history(self, session_id: str, limit: int = 10):
+        result = await self.db.execute(recent_history_query(session_id, limit))
+        messages = rows_to_messages(result)
+        messages.reverse()
+        return messages
+
+    async def get_session_history_page(self, session_id: str, limit: int, before=None, after=None):
+        stmt, ascending = history_page_query(session_id, limit, before, after)
+        result = await self.db.execute(stmt)
+        messages = rows_to_messages(result)
+        return build_history_page(messages, limit, ascending)
+
+    async def delete_session_history(self, session_id: str):
+        deleted = 0
+        while True:
+            result = await self.db.execute(chunk_ids_query(ChatMemoryModel.session_id == session_id))
+            ids = result.scalars().all()
+            if not ids:
+                return deleted
+            await self.db.execute(delete_ids_statement(ids))
+            await self.db.commit()
+            deleted += len(ids)
+            await asyncio.sleep(0)  # Cede el event loop entre lotes
+
+    async def get_recent_messages(self, session_id: str, limit: int = 6):
+        return await self.get_session_history(session_id, limit)
+
+    # -------------------------------------------------
+    # Conversión ORM <-> Entidad (compartida con el repositorio síncrono)
+    # -------------------------------------------------
+    _model_to_entity = SQLChatRepository._model_to_entity
+    _entity_to_model = SQLChatRepository._entity_to_model
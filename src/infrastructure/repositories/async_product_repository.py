@@ -0,0 +1,89 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.repositories import IAsyncProductRepository
+from src.domain.entities import Product, ProductQuery
+from src.infrastructure.db.models import ProductModel
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.search.product_index import product_index
+from src.infrastructure.repositories.product_repository import (
+    SQLProductRepository,
+    build_product_page,
+    catalog_version_bump_statement,
+    product_search_query,
+    products_query,
+    rows_to_products,
+)
+
+
+class AsyncSQLProductRepository(IAsyncProductRepository):
+    """
+    Implementación SQLAlchemy asíncrona (aiosqlite) del repositorio de productos.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    # -------------------------------------------------
+    # Métodos CRUD
+    # -------------------------------------------------
+    async def get_all(self):
+        return rows_to_products(await self.db.execute(products_query()))
+
+    async def get_by_id(self, product_id: int):
+        products = rows_to_products(await self.db.execute(products_query(ProductModel.id == product_id)))
+        return products[0] if products else None
+
+    async def get_by_brand(self, brand: str):
+        return rows_to_products(await self.db.execute(products_query(ProductModel.brand == brand)))
+
+    async def get_by_category(self, category: str):
+        return rows_to_products(await self.db.execute(products_query(ProductModel.category == category)))
+
+    async def search(self, query: ProductQuery):
+        result = await self.db.execute(product_search_query(query))
+        return build_product_page(result, query)
+
+    async def save(self, product: Product):
+        model = await self.db.get(ProductModel, product.id) if product.id else None
+        if model:
+            # Update
+            model.name = product.name
+            model.brand = product.brand
+            model.category = product.category
+            model.size = product.size
+            model.color = product.color
+            model.price = product.price
+            model.stock = product.stock
+            model.description = product.description
+        else:
+            # Insert
+            model = self._entity_to_model(product)
+            self.db.add(model)
+
+        stamp = await self._bump_catalog_version()
+        await self.db.commit()
+        saved = self._model_to_entity(model)
+        catalog_cache.invalidate(*stamp)
+        product_index.upsert(saved)
+        return saved
+
+    async def delete(self, product_id: int):
+        model = await self.db.get(ProductModel, product_id)
+        if not model:
+            return False
+        await self.db.delete(model)
+        stamp = await self._bump_catalog_version()
+        await self.db.commit()
+        catalog_cache.invalidate(*stamp)
+        product_index.remove(product_id)
+        return True
+
+    # -------------------------------------------------
+    # Métodos auxiliares (compartidos con el repositorio síncrono)
+    # -------------------------------------------------
+    async def _bump_catalog_version(self) -> tuple:
+        stmt = catalog_version_bump_statement(self.db.bind.dialect.name)
+        return tuple((await self.db.execute(stmt)).one()) if stmt is not None else ()
+
+    _model_to_entity = SQLProductRepository._model_to_entity
+    _entity_to_model = SQLProductRepository._entity_to_model
@@ -0,0 +1,118 @@
+import os
+import asyncio
+from typing import Callable, Optional
+
+from sqlalchemy import select
+
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.db.models import CatalogVersionModel
+from src.infrastructure.repositories.product_repository import CATALOG_VERSION_ID
+from src.infrastructure.search.product_index import ProductIndex
+
+
+# --------------------------------------------
+# Sincronización del catálogo entre procesos
+# --------------------------------------------
+class CatalogVersionWatcher:
+    """
+    Tarea en segundo plano que sigue la versión compartida del catálogo.
+
+    Cada `interval` segundos lee la fila de `catalog_version` (una lectura
+    por clave primaria). Si otro proceso escribió el catálogo (otro worker
+    de uvicorn o el importador CLI), adopta su versión en CatalogCache y
+    vacía el ProductIndex: la próxima lectura recarga el catálogo, las
+    claves de la cache de respuestas cambian y los ETag emitidos dejan de
+    validar. Un cambio hecho en otro proceso se ve, como mucho, `interval`
+    segundos después.
+
+    Attributes:
+        session_factory (Callable): Crea sesiones asíncronas (AsyncSessionLocal).
+        catalog (CatalogCache): Cache a sincronizar.
+        index (ProductIndex): Índice de búsqueda a vaciar tras un cambio externo.
+        interval (float): Segundos entre lecturas.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        catalog: CatalogCache,
+        index: Optional[ProductIndex] = None,
+        interval: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.catalog = catalog
+        self.index = index
+        self.interval = interval
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.external_changes = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls, session_factory: Callable, catalog: CatalogCache, index=None) -> Optional["CatalogVersionWatcher"]:
+        """Crea el watcher con CATALOG_SYNC_INTERVAL_S (por defecto 2; 0 = desactivado)."""
+        interval = float(os.getenv("CATALOG_SYNC_INTERVAL_S", "2"))
+        if interval <= 0:
+            return None
+        return cls(session_factory, catalog, index, interval=interval)
+
+    # -------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------
+    def start(self) -> None:
+        """Inicia la tarea periódica (requiere un event loop activo)."""
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+            self._task = None
+
+    async def check_once(self) -> bool:
+        """
+        Lee la versión compartida y la adopta si es más nueva.
+
+        Returns:
+            bool: True si el catálogo cambió en otro proceso.
+        """
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(CatalogVersionModel.version, CatalogVersionModel.modified_at)
+                .where(CatalogVersionModel.id == CATALOG_VERSION_ID)
+            )).first()
+        self.checks += 1
+        if row is None or not self.catalog.sync(row.version, row.modified_at):
+            return False
+        if self.index is not None:
+            self.index.clear()
+        self.external_changes += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "interval_s": self.interval,
+            "version": self.catalog.shared_version,
+            "checks": self.checks,
+            "external_changes": self.external_changes,
+            "failures": self.failures,
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set():
+                break
+            try:
+                await self.check_once()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Error al leer la versión del catálogo: {e}")
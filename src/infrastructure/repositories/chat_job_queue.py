@@ -0,0 +1,441 @@
+import os
+import uuid
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, Optional, Set
+
+from sqlalchemy import delete, func, insert, or_, select, update
+
+from src.domain.entities import ChatJob, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from src.domain.exceptions import ChatJobQueueFullError
+from src.infrastructure.db.models import ChatJobModel, ChatMemoryModel
+
+# Columnas en el orden de los campos de ChatJob (ver `ChatJob(*row)`)
+CHAT_JOB_COLUMNS = (
+    ChatJobModel.id,
+    ChatJobModel.session_id,
+    ChatJobModel.message,
+    ChatJobModel.priority,
+    ChatJobModel.status,
+    ChatJobModel.response,
+    ChatJobModel.error,
+    ChatJobModel.attempts,
+    ChatJobModel.created_at,
+    ChatJobModel.started_at,
+    ChatJobModel.finished_at,
+    ChatJobModel.user_saved,
+    ChatJobModel.lease_expires_at,
+)
+
+
+def _percentile(samples: Deque[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+# --------------------------------------------
+# Cola de trabajos de chat (tabla chat_jobs)
+# --------------------------------------------
+class ChatJobQueue:
+    """
+    Cola de prioridad acotada de mensajes de chat, persistida en `chat_jobs`.
+
+    Cada trabajo se guarda al encolarse, así que los pendientes sobreviven a
+    un reinicio. Un worker toma el próximo trabajo con un único UPDATE ...
+    RETURNING condicionado a `status = 'queued'`: dos workers nunca toman el
+    mismo, y no se toma un trabajo de una sesión que ya tiene otro en curso,
+    para que los turnos de una sesión no se mezclen.
+
+    Al tomarlo, el trabajo recibe un lease de `lease_seconds` que el worker
+    renueva mientras lo procesa. Si el lease vence (el proceso murió o no
+    pudo guardar el resultado), `requeue_expired` lo devuelve a la cola; los
+    trabajos con lease vigente de otros procesos no se tocan. Cada escritura
+    del worker está condicionada a su intento (`attempts`): un worker que
+    perdió el lease no puede pisar al que retomó el trabajo. Los mensajes
+    del usuario y del asistente se guardan en la misma transacción que el
+    cambio de estado del trabajo, así que cada uno queda una sola vez en el
+    historial aunque el trabajo se reintente.
+
+    Attributes:
+        session_factory (Callable): Crea sesiones asíncronas (AsyncSessionLocal).
+        max_pending (int): Trabajos en cola admitidos; por encima se rechazan.
+        result_ttl (float): Segundos que se conservan los trabajos terminados.
+        lease_seconds (float): Duración del lease de un trabajo en curso.
+        write_retries (int): Intentos de cada escritura de un worker.
+        on_session_written (Callable): Se llama con el session_id tras guardar
+            un mensaje en el historial (p. ej. para soltarla de SessionContextStore).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_pending: int = 1000,
+        result_ttl: float = 3600.0,
+        window: int = 500,
+        lease_seconds: float = 60.0,
+        write_retries: int = 3,
+        write_retry_delay: float = 0.05,
+        on_session_written: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.write_retries = write_retries
+        self.write_retry_delay = write_retry_delay
+        self.on_session_written = on_session_written
+        self._clock = clock
+        self._available: Optional[asyncio.Event] = None
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._wait_times: Deque[float] = deque(maxlen=window)
+        self._service_times: Deque[float] = deque(maxlen=window)
+        self.depth = 0
+        self.running = 0
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.requeued = 0
+        self.recovered = 0
+        self.purged = 0
+        self.lost_leases = 0
+
+    @classmethod
+    def from_env(cls, session_factory: Callable, on_session_written=None) -> Optional["ChatJobQueue"]:
+        """
+        Crea la cola si CHAT_JOBS=1. La capacidad, la retención de resultados
+        y el lease se leen de CHAT_JOBS_MAX_PENDING, CHAT_JOBS_RESULT_TTL_S y
+        CHAT_JOBS_LEASE_S.
+        """
+        if os.getenv("CHAT_JOBS", "0").lower() not in {"1", "true", "yes"}:
+            return None
+        return cls(
+            session_factory,
+            max_pending=int(os.getenv("CHAT_JOBS_MAX_PENDING", "1000")),
+            result_ttl=float(os.getenv("CHAT_JOBS_RESULT_TTL_S", "3600")),
+            lease_seconds=float(os.getenv("CHAT_JOBS_LEASE_S", "60")),
+            on_session_written=on_session_written,
+        )
+
+    # -------------------------------------------------
+    # Admisión y consulta
+    # -------------------------------------------------
+    async def recover(self) -> int:
+        """
+        Al iniciar: devuelve a la cola los trabajos con lease vencido (p. ej.
+        los de un proceso que murió) y sincroniza la profundidad con la tabla.
+        Los trabajos que otros procesos vivos están procesando no se tocan.
+
+        Returns:
+            int: Trabajos recuperados.
+        """
+        recovered = await self.requeue_expired()
+        async with self.session_factory() as db:
+            depth = await db.execute(select(func.count()).where(ChatJobModel.status == JOB_QUEUED))
+        self.depth = depth.scalar()
+        return recovered
+
+    async def requeue_expired(self) -> int:
+        """
+        Devuelve a la cola los trabajos en curso cuyo lease venció.
+
+        Returns:
+            int: Trabajos devueltos a la cola.
+        """
+        expired = or_(ChatJobModel.lease_expires_at.is_(None), ChatJobModel.lease_expires_at < self._clock())
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(ChatJobModel)
+                .where(ChatJobModel.status == JOB_RUNNING, expired)
+                .values(status=JOB_QUEUED, started_at=None, lease_expires_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            self.depth += result.rowcount
+            self.recovered += result.rowcount
+            self._notify()
+        return result.rowcount
+
+    async def enqueue(self, session_id: str, message: str, priority: int = 5) -> ChatJob:
+        """
+        Guarda un trabajo nuevo en la cola.
+
+        Raises:
+            ChatJobQueueFullError: Si ya hay `max_pending` trabajos en cola.
+        """
+        if self.depth >= self.max_pending:
+            self.rejected += 1
+            raise ChatJobQueueFullError()
+        job = ChatJob(
+            id=uuid.uuid4().hex,
+            session_id=session_id,
+            message=message,
+            priority=priority,
+            status=JOB_QUEUED,
+            response=None,
+            error=None,
+            attempts=0,
+            created_at=self._clock(),
+        )
+        # Se reserva el lugar antes de esperar el INSERT (admisión atómica en el event loop)
+        self.depth += 1
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(ChatJobModel).values(**{c.key: getattr(job, c.key) for c in CHAT_JOB_COLUMNS}))
+                await db.commit()
+        except Exception:
+            self.depth -= 1
+            raise
+        self.enqueued += 1
+        self._notify()
+        return job
+
+    async def get(self, job_id: str) -> Optional[ChatJob]:
+        """Retorna el trabajo o None si no existe (o ya se purgó)."""
+        async with self.session_factory() as db:
+            row = (await db.execute(select(*CHAT_JOB_COLUMNS).where(ChatJobModel.id == job_id))).first()
+        return ChatJob(*row) if row else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[ChatJob]:
+        """
+        Long-polling: espera hasta `timeout` segundos a que el trabajo termine.
+
+        Returns:
+            Optional[ChatJob]: El trabajo (terminado o no) o None si no existe.
+        """
+        # El evento se registra ANTES de leer: si el trabajo termina entre la
+        # lectura y la espera, el evento ya quedó marcado.
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, set()).add(event)
+        try:
+            job = await self.get(job_id)
+            if job is None or job.is_finished or timeout <= 0:
+                return job
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return job
+            return await self.get(job_id)
+        finally:
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    # -------------------------------------------------
+    # Workers
+    # -------------------------------------------------
+    async def claim(self) -> Optional[ChatJob]:
+        """
+        Toma el próximo trabajo en cola (menor número de prioridad, luego el más antiguo)
+        de una sesión sin trabajos en curso.
+
+        Returns:
+            Optional[ChatJob]: El trabajo, ya marcado como en curso, o None.
+        """
+        now = self._clock()
+        busy_sessions = select(ChatJobModel.session_id).where(ChatJobModel.status == JOB_RUNNING)
+        next_id = (
+            select(ChatJobModel.id)
+            .where(ChatJobModel.status == JOB_QUEUED, ChatJobModel.session_id.not_in(busy_sessions))
+            .order_by(ChatJobModel.priority, ChatJobModel.created_at)
+            .limit(1)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(ChatJobModel)
+            .where(ChatJobModel.id == next_id, ChatJobModel.status == JOB_QUEUED)
+            .values(
+                status=JOB_RUNNING,
+                started_at=now,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                attempts=ChatJobModel.attempts + 1,
+            )
+            .returning(*CHAT_JOB_COLUMNS)
+        )
+        async with self.session_factory() as db:
+            row = (await db.execute(stmt)).first()
+            await db.commit()
+        if row is None:
+            return None
+        job = ChatJob(*row)
+        self.depth -= 1
+        self.running += 1
+        self._wait_times.append(job.wait_seconds)
+        return job
+
+    async def save_user_message(self, job: ChatJob) -> bool:
+        """
+        Guarda el mensaje del usuario en el historial y marca `user_saved`,
+        en una transacción: un reintento nunca lo guarda dos veces.
+
+        Returns:
+            bool: False si el worker ya no tiene el trabajo (lease perdido).
+        """
+        owned = await self._transition(job, {"user_saved": True}, ChatJobModel.user_saved.is_(False),
+                                       message=("user", job.message))
+        if owned:
+            job.user_saved = True
+        return owned
+
+    async def complete(self, job: ChatJob, response: str) -> bool:
+        """
+        Guarda la respuesta del trabajo y el mensaje del asistente (en una
+        transacción) y despierta a quien lo espera.
+
+        Returns:
+            bool: False si el worker ya no tiene el trabajo (nada se guardó).
+        """
+        owned = await self._finish(job, JOB_DONE, response=response)
+        if owned:
+            self.completed += 1
+        return owned
+
+    async def fail(self, job: ChatJob, error: str) -> bool:
+        """Marca el trabajo como fallido y despierta a quien lo espera."""
+        owned = await self._finish(job, JOB_FAILED, error=error)
+        if owned:
+            self.failed += 1
+        return owned
+
+    async def release(self, job: ChatJob) -> bool:
+        """Devuelve a la cola un trabajo en curso (p. ej. sin capacidad de IA)."""
+        try:
+            owned = await self._transition(job, {"status": JOB_QUEUED, "started_at": None, "lease_expires_at": None})
+        finally:
+            # Si el UPDATE falla, el trabajo vuelve a la cola cuando vence su lease
+            self.running -= 1
+        if owned:
+            self.depth += 1
+            self.requeued += 1
+            self._notify()
+        return owned
+
+    async def renew(self, job: ChatJob) -> bool:
+        """Extiende el lease de un trabajo en curso (heartbeat del worker)."""
+        lease_expires_at = self._clock() + timedelta(seconds=self.lease_seconds)
+        owned = await self._transition(job, {"lease_expires_at": lease_expires_at})
+        if owned:
+            job.lease_expires_at = lease_expires_at
+        return owned
+
+    async def wait_available(self, timeout: float) -> None:
+        """Espera hasta `timeout` segundos a que se encole o libere un trabajo."""
+        if self._available is None:
+            self._available = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._available.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._available.clear()
+
+    async def purge_finished(self) -> int:
+        """Borra los trabajos terminados hace más de `result_ttl` segundos."""
+        cutoff = self._clock() - timedelta(seconds=self.result_ttl)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(ChatJobModel).where(
+                    ChatJobModel.status.in_((JOB_DONE, JOB_FAILED)), ChatJobModel.finished_at < cutoff
+                )
+            )
+            await db.commit()
+        self.purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "requeued": self.requeued,
+            "recovered": self.recovered,
+            "purged": self.purged,
+            "lost_leases": self.lost_leases,
+            "wait_p50_ms": _ms(_percentile(self._wait_times, 0.50)),
+            "wait_p95_ms": _ms(_percentile(self._wait_times, 0.95)),
+            "service_p50_ms": _ms(_percentile(self._service_times, 0.50)),
+            "service_p95_ms": _ms(_percentile(self._service_times, 0.95)),
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    def _notify(self) -> None:
+        if self._available is not None:
+            self._available.set()
+
+    async def _finish(
+        self, job: ChatJob, status: str, response: Optional[str] = None, error: Optional[str] = None
+    ) -> bool:
+        finished_at = self._clock()
+        values = {"status": status, "response": response, "error": error,
+                  "finished_at": finished_at, "lease_expires_at": None}
+        try:
+            owned = await self._transition(
+                job, values, message=("assistant", response) if status == JOB_DONE else None
+            )
+        finally:
+            self.running -= 1
+        if not owned:
+            return False
+        job.status, job.response, job.error, job.finished_at = status, response, error, finished_at
+        self._service_times.append(job.service_seconds)
+        # Trabajo terminado: una sesión puede tener otro esperando
+        self._notify()
+        for event in self._waiters.pop(job.id, ()):
+            event.set()
+        return True
+
+    async def _transition(self, job: ChatJob, values: dict, *conditions, message=None) -> bool:
+        """
+        UPDATE del trabajo condicionado a que siga en curso con el mismo
+        intento, más (si `message` es (role, texto) y el UPDATE aplicó) el
+        INSERT del mensaje en el historial, en la misma transacción. Reintenta
+        `write_retries` veces ante errores de la base.
+
+        Returns:
+            bool: False si el trabajo ya no es de este worker.
+        """
+        stmt = (
+            update(ChatJobModel)
+            .where(
+                ChatJobModel.id == job.id,
+                ChatJobModel.status == JOB_RUNNING,
+                ChatJobModel.attempts == job.attempts,
+                *conditions,
+            )
+            .values(**values)
+        )
+        for attempt in range(self.write_retries):
+            try:
+                async with self.session_factory() as db:
+                    owned = (await db.execute(stmt)).rowcount == 1
+                    if owned and message is not None:
+                        role, text = message
+                        await db.execute(insert(ChatMemoryModel).values(
+                            session_id=job.session_id, role=role, message=text, timestamp=self._clock()
+                        ))
+                    await db.commit()
+                break
+            except Exception:
+                if attempt + 1 >= self.write_retries:
+                    raise
+                await asyncio.sleep(self.write_retry_delay * 2 ** attempt)
+        if not owned:
+            self.lost_leases += 1
+        elif message is not None and self.on_session_written is not None:
+            self.on_session_written(job.session_id)
+        return owned
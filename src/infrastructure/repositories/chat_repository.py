@@ -1,9 +1,123 @@
+import base64
+from sqlalchemy import select, delete, and_, or_
 from src.domain.repositories import IChatRepository
 from src.domain.entities import ChatMessage
 from src.infrastructure.db.models import ChatMemoryModel
 from datetime import datetime
 
 
+# -------------------------------------------------
+# Lectura por columnas (sin objetos ORM)
+# -------------------------------------------------
+# En el orden de los campos de ChatMessage: cada fila se convierte con ChatMessage(*row)
+CHAT_MESSAGE_COLUMNS = (
+    ChatMemoryModel.id,
+    ChatMemoryModel.session_id,
+    ChatMemoryModel.role,
+    ChatMemoryModel.message,
+    ChatMemoryModel.timestamp,
+)
+
+
+def recent_history_query(session_id: str, limit: int):
+    """Últimos `limit` mensajes de la sesión, del más nuevo al más antiguo."""
+    return (
+        select(*CHAT_MESSAGE_COLUMNS)
+        .where(ChatMemoryModel.session_id == session_id)
+        .order_by(ChatMemoryModel.timestamp.desc(), ChatMemoryModel.id.desc())
+        .limit(limit)
+    )
+
+
+def rows_to_messages(rows):
+    return [ChatMessage(*row) for row in rows]
+
+
+# -------------------------------------------------
+# Borrado por lotes (transacciones cortas)
+# -------------------------------------------------
+# Filas por DELETE: cada lote es una transacción breve, de modo que los
+# INSERT del chat no esperan detrás de un borrado grande
+DELETE_CHUNK_SIZE = 500
+
+
+def chunk_ids_query(*where, limit: int = DELETE_CHUNK_SIZE):
+    """IDs del próximo lote a borrar (lectura: no toma el lock de escritura)."""
+    return select(ChatMemoryModel.id).where(*where).order_by(ChatMemoryModel.id).limit(limit)
+
+
+def delete_ids_statement(ids):
+    return delete(ChatMemoryModel).where(ChatMemoryModel.id.in_(ids))
+
+
+# -------------------------------------------------
+# Paginación por cursor (keyset) sobre (timestamp, id)
+# -------------------------------------------------
+def encode_cursor(message: ChatMessage) -> str:
+    """Cursor opaco que identifica la posición de un mensaje."""
+    raw = f"{message.timestamp.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Retorna (timestamp, id) a partir de un cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+def history_page_query(session_id: str, limit: int, before=None, after=None):
+    """
+    Construye la consulta de una página del historial.
+
+    Usa el índice (session_id, timestamp) y pide `limit + 1` filas para
+    saber si existe una página siguiente.
+
+    Returns:
+        Tuple[Select, bool]: La consulta y True si el orden es ascendente.
+    """
+    if before and after:
+        raise ValueError("Usa solo uno de los cursores: before o after.")
+
+    stmt = select(*CHAT_MESSAGE_COLUMNS).where(ChatMemoryModel.session_id == session_id)
+    ascending = after is not None
+    if ascending:
+        ts, message_id = decode_cursor(after)
+        stmt = stmt.where(or_(
+            ChatMemoryModel.timestamp > ts,
+            and_(ChatMemoryModel.timestamp == ts, ChatMemoryModel.id > message_id),
+        )).order_by(ChatMemoryModel.timestamp.asc(), ChatMemoryModel.id.asc())
+    else:
+        if before is not None:
+            ts, message_id = decode_cursor(before)
+            stmt = stmt.where(or_(
+                ChatMemoryModel.timestamp < ts,
+                and_(ChatMemoryModel.timestamp == ts, ChatMemoryModel.id < message_id),
+            ))
+        stmt = stmt.order_by(ChatMemoryModel.timestamp.desc(), ChatMemoryModel.id.desc())
+    return stmt.limit(limit + 1), ascending
+
+
+def build_history_page(messages, limit: int, ascending: bool):
+    """
+    Convierte el resultado de `history_page_query` en (mensajes cronológicos, next_cursor).
+    """
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    next_cursor = encode_cursor(messages[-1]) if has_more and messages else None
+    if not ascending:
+        messages.reverse()
+    return messages, next_cursor
+
+
 class SQLChatRepository(IChatRepository):
     """
     Implementación SQLAlchemy del repositorio de mensajes del chat.
@@ -20,24 +134,24 @@ class SQLChatRepository(IChatRepository):
         return self._model_to_entity(model)
 
     def get_session_history(self, session_id: str, limit: int = 10):
-        messages = (
-            self.db.query(ChatMemoryModel)
-            .filter(ChatMemoryModel.session_id == session_id)
-            .order_by(ChatMemoryModel.timestamp.desc())
-            .limit(limit)
-            .all()
-        )
+        messages = rows_to_messages(self.db.execute(recent_history_query(session_id, limit)))
         messages.reverse()
-        return [self._model_to_entity(m) for m in messages]
+        return messages
+
+    def get_session_history_page(self, session_id: str, limit: int, before=None, after=None):
+        stmt, ascending = history_page_query(session_id, limit, before, after)
+        messages = rows_to_messages(self.db.execute(stmt))
+        return build_history_page(messages, limit, ascending)
 
     def delete_session_history(self, session_id: str):
-        deleted = (
-            self.db.query(ChatMemoryModel)
-            .filter(ChatMemoryModel.session_id == session_id)
-            .delete()
-        )
-        self.db.commit()
-        return deleted
+        deleted = 0
+        while True:
+            ids = self.db.execute(chunk_ids_query(ChatMemoryModel.session_id == session_id)).scalars().all()
+            if not ids:
+                return deleted
+            self.db.execute(delete_ids_statement(ids))
+            self.db.commit()
+            deleted += len(ids)
 
     def get_recent_messages(self, session_id: str, limit: int = 6):
         return self.get_session_history(session_id, limit)
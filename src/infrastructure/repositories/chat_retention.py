@@ -0,0 +1,258 @@
+import os
+import time
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, exists, func, select
+
+from src.infrastructure.db.models import ChatMemoryModel, ChatSummaryModel
+from src.infrastructure.repositories.chat_repository import delete_ids_statement
+
+
+# --------------------------------------------
+# Política de retención
+# --------------------------------------------
+@dataclass
+class ChatRetentionPolicy:
+    """
+    Qué mensajes del chat se purgan y a qué ritmo.
+
+    Attributes:
+        max_age (Optional[timedelta]): Se borran los mensajes más antiguos que esto.
+        session_idle (Optional[timedelta]): Se borran las sesiones completas
+            (mensajes y resumen) sin mensajes nuevos desde hace esto.
+        batch_size (int): Filas por DELETE (una transacción breve por lote).
+        pause (float): Segundos de espera entre lotes, para ceder el lock de escritura.
+        interval (float): Segundos entre ejecuciones de la purga.
+        vacuum_pages (int): Páginas devueltas al sistema por lote (PRAGMA incremental_vacuum).
+    """
+    max_age: Optional[timedelta] = None
+    session_idle: Optional[timedelta] = None
+    batch_size: int = 500
+    pause: float = 0.02
+    interval: float = 3600.0
+    vacuum_pages: int = 256
+
+    @classmethod
+    def from_env(cls) -> "ChatRetentionPolicy":
+        """
+        Crea la política con CHAT_RETENTION_MAX_AGE_DAYS y
+        CHAT_RETENTION_SESSION_IDLE_DAYS (0 = sin límite), CHAT_PURGE_BATCH_SIZE,
+        CHAT_PURGE_PAUSE_MS, CHAT_PURGE_INTERVAL_S y CHAT_PURGE_VACUUM_PAGES.
+        """
+        max_age_days = float(os.getenv("CHAT_RETENTION_MAX_AGE_DAYS", "0"))
+        idle_days = float(os.getenv("CHAT_RETENTION_SESSION_IDLE_DAYS", "0"))
+        return cls(
+            max_age=timedelta(days=max_age_days) if max_age_days > 0 else None,
+            session_idle=timedelta(days=idle_days) if idle_days > 0 else None,
+            batch_size=int(os.getenv("CHAT_PURGE_BATCH_SIZE", "500")),
+            pause=float(os.getenv("CHAT_PURGE_PAUSE_MS", "20")) / 1000,
+            interval=float(os.getenv("CHAT_PURGE_INTERVAL_S", "3600")),
+            vacuum_pages=int(os.getenv("CHAT_PURGE_VACUUM_PAGES", "256")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age is not None or self.session_idle is not None
+
+
+# --------------------------------------------
+# Purga en segundo plano
+# --------------------------------------------
+class ChatRetentionPurger:
+    """
+    Tarea en segundo plano que aplica la ChatRetentionPolicy.
+
+    Cada ejecución busca los IDs a borrar con una lectura (que en WAL no
+    bloquea a nadie) y los borra en lotes de `batch_size`, cada uno en su
+    propia transacción, esperando `pause` segundos entre lotes. Así un
+    INSERT del chat espera como máximo un lote, nunca la purga completa.
+    En SQLite, tras cada lote se devuelven páginas libres al sistema con
+    `PRAGMA incremental_vacuum` (requiere auto_vacuum=INCREMENTAL).
+
+    Attributes:
+        session_factory (Callable): Crea sesiones asíncronas (AsyncSessionLocal).
+        policy (ChatRetentionPolicy): Qué purgar y a qué ritmo.
+        on_session_purged (Callable): Se llama con cada session_id a la que
+            se le borraron mensajes, por inactividad o por antigüedad (p. ej.
+            para soltarla de SessionContextStore y que no sirva turnos borrados).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        policy: ChatRetentionPolicy,
+        on_session_purged: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.session_factory = session_factory
+        self.policy = policy
+        self.on_session_purged = on_session_purged
+        self._clock = clock
+        self._stop: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.purged_messages = 0
+        self.purged_sessions = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_run_seconds: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, session_factory: Callable, on_session_purged=None) -> Optional["ChatRetentionPurger"]:
+        """Crea la purga si la política de ChatRetentionPolicy.from_env tiene algún límite."""
+        policy = ChatRetentionPolicy.from_env()
+        if not policy.enabled:
+            return None
+        return cls(session_factory, policy, on_session_purged=on_session_purged)
+
+    # -------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------
+    def start(self) -> None:
+        """Inicia la tarea periódica (requiere un event loop activo)."""
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Detiene la tarea; un lote en curso termina antes de salir."""
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+            self._task = None
+
+    # -------------------------------------------------
+    # Purga
+    # -------------------------------------------------
+    async def purge_once(self) -> dict:
+        """
+        Ejecuta una purga completa según la política.
+
+        Returns:
+            dict: Mensajes y sesiones borrados en esta ejecución.
+        """
+        started = time.perf_counter()
+        now = self._clock()
+        messages = sessions = 0
+
+        if self.policy.session_idle is not None:
+            cutoff = now - self.policy.session_idle
+            for session_id in await self._idle_sessions(cutoff):
+                if self._stopping:
+                    break
+                # Solo lo anterior al corte: un mensaje que llegue durante la
+                # purga reactiva la sesión y no se borra
+                deleted, _ = await self._purge(
+                    and_(ChatMemoryModel.session_id == session_id, ChatMemoryModel.timestamp < cutoff)
+                )
+                messages += deleted
+                if await self._drop_summary_if_empty(session_id):
+                    sessions += 1
+                    self._notify({session_id})
+
+        if self.policy.max_age is not None and not self._stopping:
+            cutoff = now - self.policy.max_age
+            deleted, affected = await self._purge(ChatMemoryModel.timestamp < cutoff)
+            messages += deleted
+            async with self.session_factory() as db:
+                # Resúmenes de sesiones que ya no tienen mensajes recientes
+                await db.execute(delete(ChatSummaryModel).where(ChatSummaryModel.updated_at < cutoff))
+                await db.commit()
+            self._notify(affected)
+
+        self.runs += 1
+        self.purged_messages += messages
+        self.purged_sessions += sessions
+        self.last_run_seconds = round(time.perf_counter() - started, 3)
+        return {"messages": messages, "sessions": sessions}
+
+    def stats(self) -> dict:
+        return {
+            "max_age_days": self.policy.max_age.total_seconds() / 86400 if self.policy.max_age else None,
+            "session_idle_days": self.policy.session_idle.total_seconds() / 86400 if self.policy.session_idle else None,
+            "runs": self.runs,
+            "purged_messages": self.purged_messages,
+            "purged_sessions": self.purged_sessions,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_run_s": self.last_run_seconds,
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    @property
+    def _stopping(self) -> bool:
+        return self._stop is not None and self._stop.is_set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.purge_once()
+            except Exception as e:
+                self.failures += 1
+                print(f"⚠️ Error en la purga del historial de chat: {e}")
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.policy.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _idle_sessions(self, cutoff: datetime) -> List[str]:
+        # Recorre el índice (session_id, timestamp) sin leer la tabla
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ChatMemoryModel.session_id)
+                .group_by(ChatMemoryModel.session_id)
+                .having(func.max(ChatMemoryModel.timestamp) < cutoff)
+            )
+            return list(result.scalars())
+
+    def _notify(self, session_ids: Set[str]) -> None:
+        if self.on_session_purged:
+            for session_id in session_ids:
+                self.on_session_purged(session_id)
+
+    async def _drop_summary_if_empty(self, session_id: str) -> bool:
+        # El resumen solo se borra si la sesión se quedó sin mensajes
+        async with self.session_factory() as db:
+            if await db.scalar(select(exists().where(ChatMemoryModel.session_id == session_id))):
+                return False
+            await db.execute(delete(ChatSummaryModel).where(ChatSummaryModel.session_id == session_id))
+            await db.commit()
+            return True
+
+    async def _purge(self, condition) -> Tuple[int, Set[str]]:
+        """Borra en lotes las filas que cumplen `condition`; retorna (filas, sesiones afectadas)."""
+        deleted = 0
+        sessions: Set[str] = set()
+        while not self._stopping:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(ChatMemoryModel.id, ChatMemoryModel.session_id)
+                    .where(condition)
+                    .order_by(ChatMemoryModel.id)
+                    .limit(self.policy.batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                ids = [row.id for row in rows]
+                sessions.update(row.session_id for row in rows)
+                await db.execute(delete_ids_statement(ids))
+                await db.commit()
+                if self.policy.vacuum_pages > 0 and db.bind.dialect.name == "sqlite":
+                    await self._incremental_vacuum(db)
+                    await db.commit()
+            deleted += len(ids)
+            self.batches += 1
+            await asyncio.sleep(self.policy.pause)
+        return deleted, sessions
+
+    async def _incremental_vacuum(self, db) -> None:
+        # executescript ejecuta el PRAGMA hasta el final; con execute el
+        # módulo sqlite3 da un solo paso y libera una única página
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.executescript(f"PRAGMA incremental_vacuum({self.policy.vacuum_pages});")
@@ -0,0 +1,43 @@
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.entities import ChatSummary
+from src.domain.repositories import IAsyncChatSummaryRepository
+from src.infrastructure.db.models import ChatSummaryModel
+
+
+class AsyncSQLChatSummaryRepository(IAsyncChatSummaryRepository):
+    """
+    Implementación SQLAlchemy asíncrona del repositorio de resúmenes de sesión.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, session_id: str):
+        model = await self.db.get(ChatSummaryModel, session_id)
+        return self._model_to_entity(model) if model else None
+
+    async def save(self, summary: ChatSummary):
+        await self.db.merge(ChatSummaryModel(
+            session_id=summary.session_id,
+            summary=summary.text,
+            summarized_until=summary.summarized_until,
+        ))
+        await self.db.commit()
+        return summary
+
+    async def delete(self, session_id: str):
+        result = await self.db.execute(delete(ChatSummaryModel).where(ChatSummaryModel.session_id == session_id))
+        await self.db.commit()
+        return result.rowcount > 0
+
+    # -------------------------------------------------
+    # Conversión ORM -> Entidad
+    # -------------------------------------------------
+    def _model_to_entity(self, model: ChatSummaryModel):
+        return ChatSummary(
+            session_id=model.session_id,
+            text=model.summary,
+            summarized_until=model.summarized_until,
+        )
@@ -1,6 +1,195 @@
+import json
+import time
+import base64
+from sqlalchemy import select, insert, update, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
 from src.domain.repositories import IProductRepository
-from src.domain.entities import Product
-from src.infrastructure.db.models import ProductModel
+from src.domain.entities import (
+    PRODUCT_FIELDS,
+    STOCK_INSUFFICIENT,
+    STOCK_NOT_APPLIED,
+    STOCK_NOT_FOUND,
+    STOCK_RELEASED,
+    STOCK_RESERVED,
+    Product,
+    ProductPage,
+    ProductQuery,
+    StockAdjustment,
+    StockResult,
+)
+from src.infrastructure.db.models import CatalogVersionModel, ProductModel
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.search.product_index import product_index
+
+
+# -------------------------------------------------
+# Lectura por columnas (sin objetos ORM)
+# -------------------------------------------------
+# En el orden de los campos de Product: cada fila se convierte con Product(*row)
+PRODUCT_COLUMNS = tuple(getattr(ProductModel, name) for name in PRODUCT_FIELDS)
+
+
+def products_query(*where):
+    """Productos que cumplen `where`, leídos como filas (sin identity map del ORM)."""
+    return select(*PRODUCT_COLUMNS).where(*where).order_by(ProductModel.id)
+
+
+def rows_to_products(rows):
+    return [Product(*row) for row in rows]
+
+
+# -------------------------------------------------
+# Búsqueda con filtros y paginación por cursor (keyset)
+# -------------------------------------------------
+def encode_product_cursor(sort: str, value, product_id: int) -> str:
+    """Cursor opaco con el orden y la posición del último producto de la página."""
+    raw = json.dumps([sort, value, product_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_product_cursor(cursor: str, sort: str):
+    """
+    Retorna (valor, id) a partir de un cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido o se generó con otro orden.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        product_id = int(product_id)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    if cursor_sort != sort:
+        raise ValueError("El cursor corresponde a otro orden; vuelve a pedir la primera página.")
+    return value, product_id
+
+
+def product_search_query(query: ProductQuery):
+    """
+    Construye la consulta de una página de productos.
+
+    Selecciona solo los campos pedidos (más el orden y el ID, necesarios
+    para el cursor) y, si la consulta está paginada, pide `limit + 1`
+    filas para saber si hay otra página.
+    """
+    sort_column = getattr(ProductModel, query.sort_field)
+    # Campos pedidos primero: build_product_page depende de este orden
+    names = list(dict.fromkeys(query.selected_fields + [query.sort_field, "id"]))
+    stmt = select(*(getattr(ProductModel, name) for name in names))
+
+    filters = []
+    if query.brand:
+        filters.append(ProductModel.brand == query.brand)
+    if query.category:
+        filters.append(ProductModel.category == query.category)
+    if query.size:
+        filters.append(ProductModel.size == query.size)
+    if query.color:
+        filters.append(ProductModel.color == query.color)
+    if query.min_price is not None:
+        filters.append(ProductModel.price >= query.min_price)
+    if query.max_price is not None:
+        filters.append(ProductModel.price <= query.max_price)
+    if query.in_stock:
+        filters.append(ProductModel.stock > 0)
+
+    if query.cursor:
+        value, last_id = decode_product_cursor(query.cursor, query.sort)
+        if query.sort_field == "id":
+            filters.append(ProductModel.id < last_id if query.descending else ProductModel.id > last_id)
+        elif query.descending:
+            filters.append(or_(sort_column < value, and_(sort_column == value, ProductModel.id < last_id)))
+        else:
+            filters.append(or_(sort_column > value, and_(sort_column == value, ProductModel.id > last_id)))
+
+    if filters:
+        stmt = stmt.where(*filters)
+    if query.descending:
+        stmt = stmt.order_by(sort_column.desc(), ProductModel.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), ProductModel.id.asc())
+    return stmt if query.limit is None else stmt.limit(query.limit + 1)
+
+
+def build_product_page(rows, query: ProductQuery) -> ProductPage:
+    """
+    Convierte las filas de `product_search_query` en una ProductPage.
+
+    Las filas traen primero los campos pedidos (en orden) y al final el
+    orden y el ID, así que cada elemento se arma con un solo `zip`.
+    """
+    rows = list(rows)
+    fields = query.selected_fields
+    next_cursor = None
+    if query.limit is not None and len(rows) > query.limit:
+        rows = rows[:query.limit]
+        names = list(dict.fromkeys(fields + [query.sort_field, "id"]))
+        last = rows[-1]
+        next_cursor = encode_product_cursor(
+            query.sort, last[names.index(query.sort_field)], last[names.index("id")]
+        )
+    return ProductPage(items=[dict(zip(fields, row)) for row in rows], next_cursor=next_cursor)
+
+
+# -------------------------------------------------
+# Escritura masiva (upsert por ID)
+# -------------------------------------------------
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def product_upsert_statement(dialect_name: str):
+    """
+    INSERT ... ON CONFLICT (id) DO UPDATE para ejecutar con executemany.
+
+    Raises:
+        ValueError: Si el motor no soporta upsert (solo SQLite y PostgreSQL).
+    """
+    if dialect_name not in _UPSERT_DIALECTS:
+        raise ValueError(f"Upsert masivo no soportado para el motor '{dialect_name}'.")
+    stmt = _UPSERT_DIALECTS[dialect_name](ProductModel)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductModel.id],
+        set_={name: stmt.excluded[name] for name in PRODUCT_FIELDS if name != "id"},
+    )
+
+
+CATALOG_VERSION_ID = 1
+
+
+def catalog_version_bump_statement(dialect_name: str):
+    """
+    Incrementa la versión compartida del catálogo (creando la fila si no
+    existe) y retorna (version, modified_at). Se ejecuta en la misma
+    transacción que la escritura, antes del commit.
+
+    Retorna None si el motor no soporta upsert: el catálogo solo se
+    invalida en el proceso que escribe.
+    """
+    if dialect_name not in _UPSERT_DIALECTS:
+        return None
+    stmt = _UPSERT_DIALECTS[dialect_name](CatalogVersionModel).values(
+        id=CATALOG_VERSION_ID, version=1, modified_at=time.time()
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CatalogVersionModel.id],
+        set_={"version": CatalogVersionModel.version + 1, "modified_at": stmt.excluded.modified_at},
+    ).returning(CatalogVersionModel.version, CatalogVersionModel.modified_at)
+
+
+# -------------------------------------------------
+# Ajustes de stock con UPDATE condicional
+# -------------------------------------------------
+def stock_update_statement(adjustment: StockAdjustment):
+    """
+    UPDATE products SET stock = stock - :qty WHERE id = :id [AND stock >= :qty]
+    RETURNING stock. No retorna filas si el producto no existe o (en una
+    reserva) si no alcanza el stock.
+    """
+    stmt = update(ProductModel).where(ProductModel.id == adjustment.product_id)
+    if adjustment.is_reservation():
+        stmt = stmt.where(ProductModel.stock >= adjustment.quantity)
+    return stmt.values(stock=ProductModel.stock - adjustment.quantity).returning(ProductModel.stock)
 
 
 class SQLProductRepository(IProductRepository):
@@ -15,20 +204,20 @@ class SQLProductRepository(IProductRepository):
     # Métodos CRUD
     # -------------------------------------------------
     def get_all(self):
-        products = self.db.query(ProductModel).all()
-        return [self._model_to_entity(p) for p in products]
+        return rows_to_products(self.db.execute(products_query()))
 
     def get_by_id(self, product_id: int):
-        model = self.db.query(ProductModel).filter(ProductModel.id == product_id).first()
-        return self._model_to_entity(model) if model else None
+        products = rows_to_products(self.db.execute(products_query(ProductModel.id == product_id)))
+        return products[0] if products else None
 
     def get_by_brand(self, brand: str):
-        models = self.db.query(ProductModel).filter(ProductModel.brand == brand).all()
-        return [self._model_to_entity(m) for m in models]
+        return rows_to_products(self.db.execute(products_query(ProductModel.brand == brand)))
 
     def get_by_category(self, category: str):
-        models = self.db.query(ProductModel).filter(ProductModel.category == category).all()
-        return [self._model_to_entity(m) for m in models]
+        return rows_to_products(self.db.execute(products_query(ProductModel.category == category)))
+
+    def search(self, query: ProductQuery):
+        return build_product_page(self.db.execute(product_search_query(query)), query)
 
     def save(self, product: Product):
         if product.id:
@@ -51,21 +240,112 @@ class SQLProductRepository(IProductRepository):
             model = self._entity_to_model(product)
             self.db.add(model)
 
+        stamp = self._bump_catalog_version()
         self.db.commit()
         self.db.refresh(model)
-        return self._model_to_entity(model)
+        saved = self._model_to_entity(model)
+        catalog_cache.invalidate(*stamp)
+        product_index.upsert(saved)
+        return saved
+
+    def bulk_upsert(self, products):
+        # executemany de Core: sin objetos ORM ni un commit por fila
+        with_id, new = [], []
+        for product in products:
+            row = {name: getattr(product, name) for name in PRODUCT_FIELDS}
+            if product.id is None:
+                del row["id"]
+                new.append(row)
+            else:
+                with_id.append(row)
+
+        connection = self.db.connection()
+        try:
+            if with_id:
+                connection.execute(product_upsert_statement(connection.dialect.name), with_id)
+            if new:
+                connection.execute(insert(ProductModel), new)
+            stamp = self._bump_catalog_version()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        catalog_cache.invalidate(*stamp)
+        product_index.clear()
+        return len(with_id) + len(new)
+
+    def adjust_stock(self, adjustments, all_or_nothing=True):
+        results = [None] * len(adjustments)
+        if not adjustments:
+            return results
+        # Orden fijo por producto: transacciones concurrentes toman las filas en el mismo orden
+        order = sorted(range(len(adjustments)), key=lambda i: adjustments[i].product_id)
+        connection = self.db.connection()
+        failed = False
+        try:
+            for i in order:
+                adjustment = adjustments[i]
+                if failed and all_or_nothing:
+                    results[i] = StockResult(adjustment.product_id, adjustment.quantity, STOCK_NOT_APPLIED)
+                    continue
+                stock = connection.execute(stock_update_statement(adjustment)).scalar()
+                if stock is not None:
+                    status = STOCK_RESERVED if adjustment.is_reservation() else STOCK_RELEASED
+                else:
+                    # Solo en el camino de falla: distinguir producto inexistente de stock insuficiente
+                    stock = connection.execute(
+                        select(ProductModel.stock).where(ProductModel.id == adjustment.product_id)
+                    ).scalar()
+                    status = STOCK_NOT_FOUND if stock is None else STOCK_INSUFFICIENT
+                    failed = True
+                results[i] = StockResult(adjustment.product_id, adjustment.quantity, status, stock)
+
+            if failed and all_or_nothing:
+                self.db.rollback()
+                # Stock real tras el rollback: con un producto repetido en el pedido, el
+                # stock leído dentro de la transacción incluía las reservas anteriores
+                stock_by_id = dict(self.db.execute(
+                    select(ProductModel.id, ProductModel.stock)
+                    .where(ProductModel.id.in_({a.product_id for a in adjustments}))
+                ).all())
+                return [
+                    StockResult(r.product_id, r.quantity, STOCK_NOT_APPLIED if r.ok else r.status,
+                                stock_by_id.get(r.product_id))
+                    for r in results
+                ]
+            # Un checkout no toca la fila compartida de catalog_version (serializaría
+            # todas las reservas) ni las caches: solo cuando un producto se agota o
+            # vuelve a tener stock. Las cantidades exactas en caché pueden quedar
+            # atrasadas hasta la próxima escritura del catálogo.
+            changed = any(r.changes_availability for r in results)
+            stamp = self._bump_catalog_version() if changed else None
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        if stamp is not None:
+            catalog_cache.invalidate(*stamp)
+        return results
 
     def delete(self, product_id: int):
         model = self.db.query(ProductModel).filter(ProductModel.id == product_id).first()
         if not model:
             return False
         self.db.delete(model)
+        stamp = self._bump_catalog_version()
         self.db.commit()
+        catalog_cache.invalidate(*stamp)
+        product_index.remove(product_id)
         return True
 
     # -------------------------------------------------
     # Métodos auxiliares
     # -------------------------------------------------
+    def _bump_catalog_version(self) -> tuple:
+        # (version, modified_at) de la base, o () si el motor no lo soporta
+        stmt = catalog_version_bump_statement(self.db.get_bind().dialect.name)
+        return tuple(self.db.execute(stmt).one()) if stmt is not None else ()
+
     def _model_to_entity(self, model: ProductModel):
         return Product(
             id=model.id,
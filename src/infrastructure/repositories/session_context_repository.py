@@ -0,0 +1,48 @@
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IAsyncChatRepository
+from src.infrastructure.cache.session_context import SessionContextStore
+
+
+# --------------------------------------------
+# Repositorio con contexto de sesión en memoria
+# --------------------------------------------
+class SessionContextChatRepository(IAsyncChatRepository):
+    """
+    Repositorio de chat que responde los mensajes recientes (contexto del
+    prompt) desde SessionContextStore y solo consulta la base la primera vez
+    que se usa una sesión (o si fue expulsada). El historial
+    (`get_session_history` y sus páginas) se lee siempre de la base. Las
+    escrituras pasan al repositorio interno y actualizan el buffer de la sesión.
+    """
+
+    def __init__(self, inner: IAsyncChatRepository, store: SessionContextStore):
+        self.inner = inner
+        self.store = store
+
+    async def save_message(self, message: ChatMessage):
+        saved = await self.inner.save_message(message)
+        self.store.append(saved)
+        return saved
+
+    async def get_session_history(self, session_id: str, limit: int = 10):
+        # El historial es una lectura explícita: siempre desde la base
+        return await self.inner.get_session_history(session_id, limit)
+
+    async def get_session_history_page(self, session_id: str, limit: int, before=None, after=None):
+        return await self.inner.get_session_history_page(session_id, limit, before, after)
+
+    async def delete_session_history(self, session_id: str):
+        deleted = await self.inner.delete_session_history(session_id)
+        self.store.drop(session_id)
+        return deleted
+
+    async def get_recent_messages(self, session_id: str, limit: int = 6):
+        messages = self.store.get(session_id, limit)
+        if messages is not None:
+            return messages
+
+        # Se carga el buffer completo una vez y se responde desde él
+        token = self.store.begin_hydration(session_id)
+        stored = await self.inner.get_recent_messages(session_id, max(limit, self.store.max_messages))
+        self.store.hydrate(session_id, stored, token)
+        return stored[-limit:] if limit else stored
@@ -0,0 +1,271 @@
+import os
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from src.domain.entities import ChatMessage
+from src.domain.repositories import IAsyncChatRepository
+from src.infrastructure.db.models import ChatMemoryModel
+
+
+# --------------------------------------------
+# Cola de escritura diferida (write-behind)
+# --------------------------------------------
+class ChatWriteBehindQueue:
+    """
+    Cola en memoria de mensajes de chat pendientes de guardar.
+
+    Una tarea en segundo plano vacía la cola con INSERTs de varias filas
+    en una sola transacción, cuando se juntan `max_batch` mensajes o cada
+    `flush_interval` segundos. Los mensajes siguen visibles (`pending_for`)
+    hasta que su commit termina, lo que permite leer lo recién escrito.
+
+    Si un lote falla vuelve a la cola, que nunca pasa de `max_pending`
+    mensajes: con la cola llena `enqueue` rechaza el mensaje y el llamador
+    lo escribe directamente (ver WriteBehindChatRepository), así una base
+    caída no acumula memoria sin límite y el error llega al request.
+
+    Al cerrar, el vaciado se reintenta `close_retries` veces; lo que sigue
+    en cola se guarda de a un mensaje y lo que aun así falla se descarta,
+    se cuenta en `dropped` y se informa en el log.
+
+    Attributes:
+        max_batch (int): Mensajes por INSERT/commit.
+        flush_interval (float): Segundos máximos que un mensaje espera en cola.
+        max_pending (int): Mensajes en cola como máximo.
+        close_retries (int): Intentos de vaciado completo al cerrar.
+        retry_delay (float): Espera base (segundos) entre esos intentos.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        max_batch: int = 100,
+        flush_interval: float = 0.05,
+        max_pending: int = 10000,
+        close_retries: int = 3,
+        retry_delay: float = 0.1,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.close_retries = close_retries
+        self.retry_delay = retry_delay
+        self._queue: Deque[ChatMessage] = deque()
+        self._by_session: Dict[str, List[ChatMessage]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.enqueued = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.overflows = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_env(cls, session_factory: Callable) -> Optional["ChatWriteBehindQueue"]:
+        """
+        Crea la cola si CHAT_WRITE_BEHIND=1. El tamaño de lote, el intervalo
+        y el máximo en cola se leen de CHAT_WRITE_BEHIND_BATCH,
+        CHAT_WRITE_BEHIND_INTERVAL_MS y CHAT_WRITE_BEHIND_MAX_PENDING.
+        """
+        if os.getenv("CHAT_WRITE_BEHIND", "0").lower() not in {"1", "true", "yes"}:
+            return None
+        return cls(
+            session_factory,
+            max_batch=int(os.getenv("CHAT_WRITE_BEHIND_BATCH", "100")),
+            flush_interval=float(os.getenv("CHAT_WRITE_BEHIND_INTERVAL_MS", "50")) / 1000,
+            max_pending=int(os.getenv("CHAT_WRITE_BEHIND_MAX_PENDING", "10000")),
+        )
+
+    # -------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------
+    def start(self) -> None:
+        """Inicia la tarea de vaciado (requiere un event loop activo)."""
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Detiene la tarea y guarda todo lo pendiente (ver reintentos arriba)."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        for attempt in range(self.close_retries):
+            await self.flush()
+            if not self._queue:
+                return
+            await asyncio.sleep(self.retry_delay * (attempt + 1))
+        await self._drain_one_by_one()
+
+    # -------------------------------------------------
+    # Escritura y lectura
+    # -------------------------------------------------
+    def enqueue(self, message: ChatMessage) -> bool:
+        """
+        Agrega un mensaje a la cola.
+
+        Returns:
+            bool: False si la cola está llena (el mensaje no se encoló).
+        """
+        if len(self._queue) >= self.max_pending:
+            self.overflows += 1
+            return False
+        self._queue.append(message)
+        self._by_session.setdefault(message.session_id, []).append(message)
+        self.enqueued += 1
+        if self._wakeup is not None and len(self._queue) >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    def pending_for(self, session_id: str) -> List[ChatMessage]:
+        """Mensajes de la sesión que aún no están confirmados en la base."""
+        return list(self._by_session.get(session_id, ()))
+
+    async def flush(self) -> int:
+        """
+        Guarda todos los mensajes pendientes en lotes de `max_batch`.
+
+        Returns:
+            int: Cantidad de mensajes guardados.
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        total = 0
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+                try:
+                    async with self.session_factory() as db:
+                        await db.execute(insert(ChatMemoryModel), [self._to_row(m) for m in batch])
+                        await db.commit()
+                except Exception as e:
+                    # Se reintenta en el próximo ciclo, conservando el orden
+                    self.failures += 1
+                    self._queue.extendleft(reversed(batch))
+                    print(f"⚠️ Error al guardar mensajes en lote: {e}")
+                    break
+                self._forget(batch)
+                total += len(batch)
+                self.flushed += len(batch)
+                self.batches += 1
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._queue),
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "avg_batch_size": round(self.flushed / self.batches, 2) if self.batches else 0.0,
+            "failures": self.failures,
+            "max_pending": self.max_pending,
+            "overflows": self.overflows,
+            "dropped": self.dropped,
+        }
+
+    # -------------------------------------------------
+    # Métodos auxiliares
+    # -------------------------------------------------
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _drain_one_by_one(self) -> None:
+        # Último recurso al cerrar: un mensaje que no se puede guardar no
+        # arrastra al resto, y los perdidos quedan contados
+        dropped, error = 0, None
+        async with self._flush_lock:
+            while self._queue:
+                message = self._queue.popleft()
+                try:
+                    async with self.session_factory() as db:
+                        await db.execute(insert(ChatMemoryModel), [self._to_row(message)])
+                        await db.commit()
+                    self.flushed += 1
+                except Exception as e:
+                    dropped += 1
+                    error = e
+                self._forget([message])
+        if dropped:
+            self.dropped += dropped
+            print(f"❌ Se perdieron {dropped} mensajes de chat al cerrar la cola: {error}")
+
+    def _forget(self, batch: List[ChatMessage]) -> None:
+        for message in batch:
+            pending = self._by_session.get(message.session_id)
+            if pending:
+                pending.remove(message)
+                if not pending:
+                    del self._by_session[message.session_id]
+
+    @staticmethod
+    def _to_row(message: ChatMessage) -> dict:
+        return {
+            "session_id": message.session_id,
+            "role": message.role,
+            "message": message.message,
+            "timestamp": message.timestamp,
+        }
+
+
+# --------------------------------------------
+# Repositorio con escritura diferida
+# --------------------------------------------
+class WriteBehindChatRepository(IAsyncChatRepository):
+    """
+    Repositorio de chat que encola las escrituras en ChatWriteBehindQueue
+    y combina las lecturas de la base con los mensajes aún en cola.
+    Los mensajes retornados por `save_message` no tienen ID asignado,
+    salvo que la cola esté llena: entonces se escriben directamente.
+    """
+
+    def __init__(self, inner: IAsyncChatRepository, queue: ChatWriteBehindQueue):
+        self.inner = inner
+        self.queue = queue
+
+    async def save_message(self, message: ChatMessage):
+        if self.queue.enqueue(message):
+            return message
+        # Cola llena (la base no da abasto o está fallando): escritura directa
+        return await self.inner.save_message(message)
+
+    async def get_session_history(self, session_id: str, limit: int = 10):
+        # Se toman los pendientes ANTES de consultar: si un lote se confirma
+        # durante la consulta, el mensaje aparece en ambos y se deduplica.
+        pending = self.queue.pending_for(session_id)
+        stored = await self.inner.get_session_history(session_id, limit)
+        if not pending:
+            return stored
+
+        seen = {(m.role, m.message, m.timestamp) for m in stored}
+        merged = stored + [m for m in pending if (m.role, m.message, m.timestamp) not in seen]
+        merged.sort(key=lambda m: m.timestamp)
+        return merged[-limit:] if limit else merged
+
+    async def get_session_history_page(self, session_id: str, limit: int, before=None, after=None):
+        # Los cursores usan el ID asignado por la base: se guardan antes los pendientes
+        if self.queue.pending_for(session_id):
+            await self.queue.flush()
+        return await self.inner.get_session_history_page(session_id, limit, before, after)
+
+    async def delete_session_history(self, session_id: str):
+        await self.queue.flush()
+        return await self.inner.delete_session_history(session_id)
+
+    async def get_recent_messages(self, session_id: str, limit: int = 6):
+        return await self.get_session_history(session_id, limit)
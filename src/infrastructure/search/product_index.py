@@ -0,0 +1,190 @@
+import math
+import re
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from src.domain.entities import Product
+
+
+# --------------------------------------------
+# Tokenización
+# --------------------------------------------
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palabras vacías frecuentes en las consultas de los clientes
+STOPWORDS = frozenset({
+    "a", "al", "algo", "con", "cual", "cuales", "de", "del", "el", "en", "es",
+    "hay", "la", "las", "lo", "los", "me", "mi", "para", "por", "que", "se",
+    "su", "tiene", "tienen", "tienes", "un", "una", "unos", "unas", "y", "o",
+    "quiero", "busco", "hola", "gracias",
+})
+
+# Peso de cada campo (se suma como frecuencia del término)
+FIELD_WEIGHTS = {
+    "name": 3,
+    "brand": 3,
+    "category": 2,
+    "color": 2,
+    "size": 1,
+    "description": 1,
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Normaliza un texto (minúsculas, sin tildes) y lo separa en términos.
+
+    Example:
+        >>> tokenize("Zapatillas de Running ¡Rojas!")
+        ['zapatillas', 'running', 'rojas']
+    """
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+    return [t for t in _TOKEN_RE.findall(normalized) if t not in STOPWORDS]
+
+
+# --------------------------------------------
+# Índice invertido con ranking BM25
+# --------------------------------------------
+class ProductIndex:
+    """
+    Índice invertido en memoria sobre los campos de texto de los productos.
+
+    Las búsquedas retornan los IDs de los productos más relevantes según
+    BM25. El índice se actualiza de forma incremental con `upsert`/`remove`
+    y se reconstruye completo con `rebuild` tras una carga masiva.
+
+    Attributes:
+        k1 (float): Saturación de la frecuencia del término.
+        b (float): Normalización por longitud del documento.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Counter] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._total_len = 0
+        self._built = False
+
+    @property
+    def is_built(self) -> bool:
+        """True si el índice refleja el catálogo (se construyó al menos una vez)."""
+        return self._built
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    # -------------------------------------------------
+    # Mantenimiento
+    # -------------------------------------------------
+    def rebuild(self, products: Iterable[Product]) -> None:
+        """Reconstruye el índice completo a partir del catálogo."""
+        with self._lock:
+            self._reset()
+            for product in products:
+                self._add(product)
+            self._built = True
+
+    def clear(self) -> None:
+        """Vacía el índice; se reconstruirá en la próxima búsqueda."""
+        with self._lock:
+            self._reset()
+
+    def upsert(self, product: Product) -> None:
+        """Indexa un producto nuevo o reemplaza su versión anterior."""
+        with self._lock:
+            if not self._built or product.id is None:
+                return
+            self._remove(product.id)
+            self._add(product)
+
+    def remove(self, product_id: int) -> None:
+        """Quita un producto del índice."""
+        with self._lock:
+            if self._built:
+                self._remove(product_id)
+
+    # -------------------------------------------------
+    # Búsqueda
+    # -------------------------------------------------
+    def search(self, query: str, k: int = 8) -> List[int]:
+        """
+        Retorna los IDs de hasta `k` productos ordenados por relevancia.
+
+        Args:
+            query (str): Texto libre (mensaje del usuario y contexto).
+            k (int): Cantidad máxima de resultados.
+
+        Returns:
+            List[int]: IDs de productos con puntaje mayor que cero.
+        """
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if n_docs == 0:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [doc_id for doc_id, _ in best]
+
+    # -------------------------------------------------
+    # Métodos auxiliares (requieren el lock tomado)
+    # -------------------------------------------------
+    def _reset(self) -> None:
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_len = {}
+        self._total_len = 0
+        self._built = False
+
+    def _add(self, product: Product) -> None:
+        terms = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(product, field, None)):
+                terms[token] += weight
+        doc_id = product.id
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove(self, doc_id: int) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._doc_len.pop(doc_id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+
+
+# Instancia compartida por todo el proceso
+product_index = ProductIndex()
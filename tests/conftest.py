@@ -0,0 +1,58 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from src.infrastructure.db.database import Base, apply_sqlite_pragmas
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+
+
+# -------------------------------
+# Bases asíncronas
+# -------------------------------
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    # Archivo real con el perfil de producción (WAL, auto_vacuum incremental):
+    # cada sesión usa su propia conexión, como en la API
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine.sync_engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db():
+    # Una AsyncSession sobre una base en memoria
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+# -------------------------------
+# Bases síncronas
+# -------------------------------
+@pytest.fixture
+def sync_session_factory(tmp_path):
+    # Archivo real: cada hilo usa su propia conexión, como en producción
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def sync_db():
+    # Una Session sobre una base en memoria
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
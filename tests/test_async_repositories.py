@@ -0,0 +1,65 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+from src.domain.entities import Product, ChatMessage
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.repositories.async_product_repository import AsyncSQLProductRepository
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+
+
+def _product(product_id=None, stock=10):
+    return Product(id=product_id, name="Nike Pegasus", brand="Nike", category="Running",
+                   size="42", color="Negro", price=150.0, stock=stock, description="Ligeras")
+
+
+# -------------------------------
+# AsyncSQLProductRepository
+# -------------------------------
+@pytest.mark.asyncio
+async def test_product_save_update_and_delete(db):
+    repo = AsyncSQLProductRepository(db)
+    saved = await repo.save(_product())
+    assert saved.id is not None
+
+    await repo.save(_product(product_id=saved.id, stock=3))
+    assert (await repo.get_by_id(saved.id)).stock == 3
+    assert len(await repo.get_by_brand("Nike")) == 1
+
+    assert await repo.delete(saved.id) is True
+    assert await repo.get_all() == []
+
+
+# -------------------------------
+# AsyncSQLChatRepository
+# -------------------------------
+@pytest.mark.asyncio
+async def test_chat_history_is_chronological(db):
+    repo = AsyncSQLChatRepository(db)
+    start = datetime(2025, 1, 1)
+    for i in range(4):
+        await repo.save_message(ChatMessage(id=None, session_id="s1", role="user",
+                                            message=f"m{i}", timestamp=start + timedelta(seconds=i)))
+
+    recent = await repo.get_recent_messages("s1", limit=2)
+    assert [m.message for m in recent] == ["m2", "m3"]
+    assert await repo.delete_session_history("s1") == 4
+
+
+# -------------------------------
+# ChatService con repositorios asíncronos
+# -------------------------------
+@pytest.mark.asyncio
+async def test_chat_service_with_async_repositories(db):
+    await AsyncSQLProductRepository(db).save(_product())
+    gemini = AsyncMock()
+    gemini.generate_response.return_value = "Te recomiendo las Pegasus."
+    service = ChatService(AsyncSQLProductRepository(db), AsyncSQLChatRepository(db), gemini)
+
+    result = await service.process_user_message(ChatMessageRequestDTO(session_id="s1", message="Hola"))
+
+    assert result.response == "Te recomiendo las Pegasus."
+    history = await service.get_session_history("s1")
+    assert [h.is_user for h in history] == [True, False]
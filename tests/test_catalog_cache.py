@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.domain.entities import Product
+from src.infrastructure.cache.catalog_cache import CatalogCache, catalog_cache
+from src.infrastructure.db.database import Base, _seed_catalog_version
+from src.infrastructure.cache.http_cache import CatalogHTTPCache
+from src.infrastructure.repositories.catalog_version import CatalogVersionWatcher
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+from src.infrastructure.search.product_index import ProductIndex
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+
+
+def _product(product_id=1, name="Pegasus"):
+    return Product(id=product_id, name=name, brand="Nike", category="Running",
+                   size="42", color="Negro", price=150.0, stock=10,
+                   description="Zapatillas ligeras")
+
+
+# -------------------------------
+# CatalogCache
+# -------------------------------
+def test_snapshot_is_reused_until_invalidated():
+    cache = CatalogCache()
+    loader = Mock(return_value=[_product()])
+
+    first = cache.get_snapshot(loader)
+    second = cache.get_snapshot(loader)
+    assert first is second
+    assert isinstance(first.products, tuple)
+    assert loader.call_count == 1
+
+    cache.invalidate()
+    third = cache.get_snapshot(loader)
+    assert third.version == first.version + 1
+    assert loader.call_count == 2
+
+
+def test_snapshot_loaded_during_invalidation_is_not_kept():
+    cache = CatalogCache()
+    version = cache.version
+    cache.invalidate()  # Una escritura ocurre mientras se cargaba
+    cache.put(version, [_product()])
+    assert cache.get() is None
+
+
+def test_sync_adopts_only_newer_versions():
+    cache = CatalogCache()
+    cache.get_snapshot(lambda: [_product()])
+    assert cache.sync(3, 100.0)
+    assert cache.get() is None and cache.shared_version == 3 and cache.modified_at == 100.0
+    assert not cache.sync(2, 50.0)
+    version = cache.version
+    # Una escritura más vieja invalida la copia pero no hace retroceder la versión compartida
+    assert cache.invalidate(2) == version + 1 and cache.shared_version == 3
+
+
+# -------------------------------
+# Versión compartida entre procesos
+# -------------------------------
+@pytest.mark.asyncio
+async def test_watcher_sees_writes_from_another_process(tmp_path):
+    url = f"sqlite:///{tmp_path / 'catalog.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+    api_catalog, api_index = CatalogCache(), ProductIndex()
+    api_index.rebuild([_product()])
+    watcher = CatalogVersionWatcher(async_sessionmaker(async_engine), api_catalog, api_index)
+
+    # El importador CLI escribe con su propio proceso (y su propia CatalogCache)
+    with sessionmaker(bind=engine)() as db:
+        SQLProductRepository(db).bulk_upsert([_product(None, "Pegasus"), _product(None, "Vomero")])
+        SQLProductRepository(db).bulk_upsert([_product(None, "Structure")])
+    assert catalog_cache.shared_version >= 2
+
+    assert await watcher.check_once()
+    assert api_catalog.shared_version == 2
+    assert not api_index.is_built
+    assert not await watcher.check_once()
+    assert watcher.stats()["external_changes"] == 1
+    await async_engine.dispose()
+    engine.dispose()
+
+
+
+@pytest.mark.asyncio
+async def test_workers_share_etags_before_any_catalog_write(tmp_path):
+    url = f"sqlite:///{tmp_path / 'catalog.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    _seed_catalog_version(engine)
+    _seed_catalog_version(engine)  # Cada worker ejecuta init_db: la fila se crea una vez
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+    workers = []
+    for _ in range(2):
+        catalog = CatalogCache()
+        await CatalogVersionWatcher(async_sessionmaker(async_engine), catalog).check_once()
+        workers.append((catalog.modified_at, CatalogHTTPCache(catalog).etag("/products")))
+    assert workers[0] == workers[1]
+    await async_engine.dispose()
+    engine.dispose()
+
+# -------------------------------
+# ChatService + CatalogCache
+# -------------------------------
+@pytest.mark.asyncio
+async def test_chat_turns_read_cached_catalog():
+    product_repo = Mock()
+    product_repo.get_all.return_value = [_product()]
+    chat_repo = Mock()
+    chat_repo.get_recent_messages.return_value = []
+    gemini = AsyncMock()
+    gemini.generate_response.return_value = "Te recomiendo las Pegasus."
+
+    service = ChatService(product_repo, chat_repo, gemini, CatalogCache())
+    for _ in range(3):
+        await service.process_user_message(ChatMessageRequestDTO(session_id="s1", message="Hola"))
+
+    assert product_repo.get_all.call_count == 1
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+
+from src.application.chat_batch import ChatBatchProcessor
+from src.application.dtos import ChatMessageRequestDTO, ChatMessageResponseDTO
+from src.domain.exceptions import LLMCapacityError
+
+
+class RecordingChatService:
+    """Servicio falso que registra el orden y la concurrencia de los mensajes."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.processed = []
+
+    async def process_user_message(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if request.message == "capacidad":
+                raise LLMCapacityError("sin capacidad")
+            if request.message == "falla":
+                raise RuntimeError("boom")
+            self.processed.append((request.session_id, request.message))
+            return ChatMessageResponseDTO(session_id=request.session_id, response=f"eco: {request.message}")
+        finally:
+            self.in_flight -= 1
+
+
+def make_processor(service, concurrency):
+    @asynccontextmanager
+    async def factory():
+        yield service
+    return ChatBatchProcessor(factory, concurrency=concurrency)
+
+
+def requests(sessions, per_session):
+    return [ChatMessageRequestDTO(session_id=f"s{s}", message=str(n))
+            for n in range(per_session) for s in range(sessions)]
+
+
+@pytest.mark.asyncio
+async def test_batch_bounds_concurrency_and_keeps_session_order():
+    service = RecordingChatService()
+    batch = requests(sessions=6, per_session=4)
+
+    results = [r async for r in make_processor(service, concurrency=3).run(batch)]
+
+    assert sorted(r["index"] for r in results) == list(range(len(batch)))
+    assert all(r["response"] == f"eco: {batch[r['index']].message}" for r in results)
+    assert service.peak == 3
+    for s in range(6):
+        assert [m for sid, m in service.processed if sid == f"s{s}"] == ["0", "1", "2", "3"]
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_errors_per_message_and_continues():
+    service = RecordingChatService(delay=0)
+    batch = [ChatMessageRequestDTO(session_id="s1", message=m) for m in ("capacidad", "falla", "hola")]
+
+    results = {r["index"]: r async for r in make_processor(service, concurrency=2).run(batch)}
+
+    assert results[0]["status"] == 503 and results[0]["detail"] == "sin capacidad"
+    assert results[1]["status"] == 500 and "boom" in results[1]["detail"]
+    assert results[2]["response"] == "eco: hola"
+
+
+@pytest.mark.asyncio
+async def test_batch_cancels_pending_messages_when_consumer_stops():
+    service = RecordingChatService()
+    stream = make_processor(service, concurrency=2).run(requests(sessions=2, per_session=50))
+
+    await stream.__anext__()
+    await stream.aclose()
+    await asyncio.sleep(0.05)
+
+    assert service.in_flight == 0
+    assert len(service.processed) < 10
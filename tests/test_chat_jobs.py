@@ -0,0 +1,268 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+from sqlalchemy import func, select
+
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageResponseDTO
+from src.domain.entities import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+from src.domain.exceptions import ChatJobQueueFullError, LLMCapacityError
+from src.infrastructure.db.models import ChatMemoryModel
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.infrastructure.repositories.async_product_repository import AsyncSQLProductRepository
+from src.infrastructure.repositories.chat_job_queue import ChatJobQueue
+from src.application.chat_jobs import ChatJobWorkers
+
+
+class EchoChatService:
+    """Servicio falso: responde con eco y falla por capacidad las primeras `busy` veces."""
+
+    def __init__(self, busy=0):
+        self.busy = busy
+        self.calls = []
+
+    async def process_user_message(self, request, user_message_saved=False, save_response=True):
+        if self.busy:
+            self.busy -= 1
+            raise LLMCapacityError()
+        self.calls.append((request.session_id, request.message))
+        await asyncio.sleep(0.01)
+        return ChatMessageResponseDTO(session_id=request.session_id, response=f"eco: {request.message}")
+
+
+async def _history(session_factory, session_id):
+    async with session_factory() as db:
+        rows = await db.execute(
+            select(ChatMemoryModel.role, ChatMemoryModel.message)
+            .where(ChatMemoryModel.session_id == session_id)
+            .order_by(ChatMemoryModel.id)
+        )
+    return [tuple(r) for r in rows]
+
+
+def factory_for(service):
+    @asynccontextmanager
+    async def factory():
+        yield service
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_claim_follows_priority_and_skips_busy_sessions(session_factory):
+    queue = ChatJobQueue(session_factory)
+    await queue.enqueue("a", "a1")
+    await queue.enqueue("a", "a2")
+    await queue.enqueue("b", "b1", priority=9)
+    urgent = await queue.enqueue("c", "c1", priority=0)
+
+    first = await queue.claim()
+    second = await queue.claim()
+    third = await queue.claim()
+
+    assert first.id == urgent.id and first.status == JOB_RUNNING and first.attempts == 1
+    assert second.message == "a1"
+    # "a" ya tiene un trabajo en curso: se salta a2 aunque tenga mejor prioridad que b1
+    assert third.message == "b1"
+    assert await queue.claim() is None
+    assert queue.depth == 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_when_queue_is_full(session_factory):
+    queue = ChatJobQueue(session_factory, max_pending=2)
+    await queue.enqueue("s1", "uno")
+    await queue.enqueue("s2", "dos")
+
+    with pytest.raises(ChatJobQueueFullError):
+        await queue.enqueue("s3", "tres")
+    assert queue.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_only_jobs_with_an_expired_lease(session_factory):
+    now = datetime(2025, 6, 1)
+    queue = ChatJobQueue(session_factory, lease_seconds=30, clock=lambda: now)
+    job = await queue.enqueue("s1", "hola")
+    await queue.enqueue("s2", "chau")
+    await queue.claim()
+
+    # Otro proceso inicia mientras el primero sigue procesando: no le quita el trabajo
+    other = ChatJobQueue(session_factory, lease_seconds=30, clock=lambda: now)
+    assert await other.recover() == 0
+    assert (await other.get(job.id)).status == JOB_RUNNING
+
+    # El primero murió y su lease venció
+    now += timedelta(seconds=31)
+    assert await other.recover() == 1
+    assert other.depth == 2
+    assert (await other.get(job.id)).status == JOB_QUEUED
+
+
+@pytest.mark.asyncio
+async def test_worker_that_lost_its_lease_cannot_write(session_factory):
+    now = datetime(2025, 6, 1)
+    queue = ChatJobQueue(session_factory, lease_seconds=30, clock=lambda: now)
+    await queue.enqueue("s1", "hola")
+    stale = await queue.claim()
+    assert await queue.save_user_message(stale)
+
+    now += timedelta(seconds=31)
+    assert await queue.requeue_expired() == 1
+    current = await queue.claim()
+    assert current.attempts == 2 and current.user_saved
+
+    assert not await queue.renew(stale)
+    assert not await queue.complete(stale, "respuesta vieja")
+    assert await queue.complete(current, "respuesta nueva")
+    assert (await queue.get(current.id)).response == "respuesta nueva"
+    assert await _history(session_factory, "s1") == [("user", "hola"), ("assistant", "respuesta nueva")]
+    assert queue.stats()["lost_leases"] == 2
+
+
+@pytest.mark.asyncio
+async def test_result_write_is_retried_on_transient_errors(session_factory):
+    failures = {"left": 2}
+
+    @asynccontextmanager
+    async def flaky_db():
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("database is locked")
+        async with session_factory() as db:
+            yield db
+
+    queue = ChatJobQueue(session_factory, write_retry_delay=0)
+    await queue.enqueue("s1", "hola")
+    job = await queue.claim()
+    queue.session_factory = flaky_db
+
+    assert await queue.complete(job, "ok")
+    assert (await queue.get(job.id)).status == JOB_DONE
+
+
+@pytest.mark.asyncio
+async def test_workers_complete_jobs_and_wake_long_pollers(session_factory):
+    queue = ChatJobQueue(session_factory)
+    service = EchoChatService(busy=1)
+    workers = ChatJobWorkers(queue, factory_for(service), workers=2, poll_interval=0.05, retry_delay=0)
+    jobs = [await queue.enqueue(f"s{i % 2}", f"m{i}") for i in range(6)]
+
+    workers.start()
+    try:
+        finished = await asyncio.gather(*(queue.wait(job.id, timeout=5) for job in jobs))
+    finally:
+        await workers.close()
+
+    assert [j.status for j in finished] == [JOB_DONE] * 6
+    assert [j.response for j in finished] == [f"eco: m{i}" for i in range(6)]
+    assert await _history(session_factory, "s0") == [
+        (role, text) for i in (0, 2, 4) for role, text in (("user", f"m{i}"), ("assistant", f"eco: m{i}"))
+    ]
+    # Los turnos de cada sesión se procesan en orden
+    assert [m for s, m in service.calls if s == "s0"] == ["m0", "m2", "m4"]
+    stats = queue.stats()
+    assert stats["completed"] == 6 and stats["requeued"] == 1 and stats["depth"] == 0
+    assert stats["service_p50_ms"] is not None
+
+
+@pytest.mark.asyncio
+async def test_purge_finished_removes_only_expired_results(session_factory):
+    now = datetime(2025, 6, 1)
+    queue = ChatJobQueue(session_factory, result_ttl=60, clock=lambda: now)
+    done = await queue.enqueue("s1", "hola")
+    pending = await queue.enqueue("s2", "hola")
+    await queue.complete(await queue.claim(), "ok")
+
+    assert await queue.purge_finished() == 0
+    now += timedelta(seconds=61)
+    assert await queue.purge_finished() == 1
+    assert await queue.get(done.id) is None
+    assert (await queue.get(pending.id)).status == JOB_QUEUED
+
+
+@pytest.mark.asyncio
+async def test_requeued_job_saves_the_user_message_once(session_factory):
+    gemini = AsyncMock()
+    gemini.generate_response.side_effect = [LLMCapacityError(), LLMCapacityError(), "Tenemos Nike."]
+
+    @asynccontextmanager
+    async def factory():
+        async with session_factory() as db:
+            yield ChatService(AsyncSQLProductRepository(db), AsyncSQLChatRepository(db), gemini)
+
+    queue = ChatJobQueue(session_factory)
+    workers = ChatJobWorkers(queue, factory, workers=1, poll_interval=0.05, retry_delay=0)
+    job = await queue.enqueue("s1", "¿Tienen Nike?")
+
+    workers.start()
+    try:
+        finished = await queue.wait(job.id, timeout=5)
+    finally:
+        await workers.close()
+
+    assert finished.status == JOB_DONE and finished.attempts == 3 and finished.user_saved
+    async with session_factory() as db:
+        rows = (await db.execute(
+            select(ChatMemoryModel.role, func.count()).group_by(ChatMemoryModel.role).order_by(ChatMemoryModel.role)
+        )).all()
+    assert [tuple(r) for r in rows] == [("assistant", 1), ("user", 1)]
+    # El reintento no ve el mensaje del usuario dos veces en el contexto
+    context = gemini.generate_response.call_args.args[2]
+    assert [m.message for m in context.messages] == ["¿Tienen Nike?"]
+
+
+@pytest.mark.asyncio
+async def test_job_fails_after_max_attempts(session_factory):
+    queue = ChatJobQueue(session_factory)
+    service = EchoChatService(busy=10)
+    workers = ChatJobWorkers(queue, factory_for(service), workers=1, poll_interval=0.05,
+                             retry_delay=0, max_attempts=3)
+    job = await queue.enqueue("s1", "hola")
+
+    workers.start()
+    try:
+        finished = await queue.wait(job.id, timeout=5)
+    finally:
+        await workers.close()
+
+    assert finished.status == JOB_FAILED and finished.attempts == 3
+    assert service.busy == 7 and queue.stats()["requeued"] == 2
+
+
+@pytest.mark.asyncio
+async def test_job_whose_result_write_fails_is_retried_after_its_lease(session_factory):
+    queue = ChatJobQueue(session_factory, lease_seconds=0.3, write_retry_delay=0)
+    original_complete = queue.complete
+    calls = {"n": 0}
+
+    @asynccontextmanager
+    async def locked_db():
+        raise RuntimeError("database is locked")
+        yield
+
+    async def flaky_complete(job, response):
+        # La primera escritura del resultado falla en todos sus reintentos
+        calls["n"] += 1
+        queue.session_factory = locked_db if calls["n"] == 1 else session_factory
+        try:
+            return await original_complete(job, response)
+        finally:
+            queue.session_factory = session_factory
+
+    queue.complete = flaky_complete
+    service = EchoChatService()
+    workers = ChatJobWorkers(queue, factory_for(service), workers=1, poll_interval=0.05, retry_delay=0)
+    job = await queue.enqueue("s1", "uno")
+
+    workers.start()
+    try:
+        finished = await queue.wait(job.id, timeout=5)  # Solo despierta con el resultado guardado
+    finally:
+        await workers.close()
+
+    assert finished.status == JOB_DONE and finished.attempts == 2 and len(service.calls) == 2
+    # El turno quedó una sola vez en el historial
+    assert await _history(session_factory, "s1") == [("user", "uno"), ("assistant", "eco: uno")]
+    assert workers.stats()["worker_errors"] == 1 and queue.running == 0
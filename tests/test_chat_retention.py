@@ -0,0 +1,122 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+
+from src.infrastructure.db.models import ChatMemoryModel, ChatSummaryModel
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.infrastructure.repositories.chat_retention import ChatRetentionPolicy, ChatRetentionPurger
+
+NOW = datetime(2025, 6, 1)
+
+
+async def _seed(session_factory, session_id, count, age_days):
+    async with session_factory() as db:
+        await db.execute(insert(ChatMemoryModel), [
+            {"session_id": session_id, "role": "user", "message": "x" * 200,
+             "timestamp": NOW - timedelta(days=age_days, seconds=i)}
+            for i in range(count)
+        ])
+        await db.execute(insert(ChatSummaryModel), [
+            {"session_id": session_id, "summary": "- Cliente: hola", "updated_at": NOW - timedelta(days=age_days)}
+        ])
+        await db.commit()
+
+
+async def _scalar(session_factory, stmt):
+    async with session_factory() as db:
+        return (await db.execute(stmt)).scalar()
+
+
+@pytest.mark.asyncio
+async def test_age_policy_purges_old_messages_in_batches(session_factory):
+    await _seed(session_factory, "vieja", 250, age_days=40)
+    await _seed(session_factory, "nueva", 10, age_days=1)
+    purger = ChatRetentionPurger(session_factory, ChatRetentionPolicy(max_age=timedelta(days=30), batch_size=100, pause=0),
+                                 clock=lambda: NOW)
+
+    assert await purger.purge_once() == {"messages": 250, "sessions": 0}
+    assert purger.batches == 3
+    assert await _scalar(session_factory, select(func.count()).select_from(ChatMemoryModel)) == 10
+    assert await _scalar(session_factory, select(ChatSummaryModel.session_id)) == "nueva"
+
+
+@pytest.mark.asyncio
+async def test_idle_policy_purges_whole_sessions_and_notifies(session_factory):
+    await _seed(session_factory, "inactiva", 30, age_days=10)
+    await _seed(session_factory, "activa", 5, age_days=0)
+    purged = []
+    purger = ChatRetentionPurger(session_factory, ChatRetentionPolicy(session_idle=timedelta(days=7), pause=0),
+                                 on_session_purged=purged.append, clock=lambda: NOW)
+
+    assert await purger.purge_once() == {"messages": 30, "sessions": 1}
+    assert purged == ["inactiva"]
+    remaining = await _scalar(session_factory, select(func.group_concat(ChatMemoryModel.session_id.distinct())))
+    assert remaining == "activa"
+    assert await _scalar(session_factory, select(func.count()).select_from(ChatSummaryModel)) == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_purge_keeps_messages_that_arrive_during_the_purge(session_factory):
+    await _seed(session_factory, "s1", 20, age_days=10)
+    purged = []
+    purger = ChatRetentionPurger(session_factory, ChatRetentionPolicy(session_idle=timedelta(days=7), pause=0),
+                                 on_session_purged=purged.append, clock=lambda: NOW)
+    idle_sessions = purger._idle_sessions
+
+    async def idle_then_new_message(cutoff):
+        sessions = await idle_sessions(cutoff)
+        # El cliente vuelve justo después de elegir las sesiones inactivas
+        async with session_factory() as db:
+            await db.execute(insert(ChatMemoryModel), [
+                {"session_id": "s1", "role": "user", "message": "sigo aquí", "timestamp": NOW}
+            ])
+            await db.commit()
+        return sessions
+
+    purger._idle_sessions = idle_then_new_message
+
+    assert await purger.purge_once() == {"messages": 20, "sessions": 0}
+    assert purged == []
+    assert await _scalar(session_factory, select(ChatMemoryModel.message)) == "sigo aquí"
+    assert await _scalar(session_factory, select(func.count()).select_from(ChatSummaryModel)) == 1
+
+
+@pytest.mark.asyncio
+async def test_age_purge_notifies_sessions_that_lost_messages(session_factory):
+    await _seed(session_factory, "vieja", 5, age_days=40)
+    await _seed(session_factory, "nueva", 5, age_days=1)
+    purged = []
+    purger = ChatRetentionPurger(session_factory, ChatRetentionPolicy(max_age=timedelta(days=30), pause=0),
+                                 on_session_purged=purged.append, clock=lambda: NOW)
+
+    await purger.purge_once()
+    assert purged == ["vieja"]
+
+
+@pytest.mark.asyncio
+async def test_purge_returns_free_pages_with_incremental_vacuum(session_factory):
+    await _seed(session_factory, "vieja", 2000, age_days=40)
+    purger = ChatRetentionPurger(session_factory, ChatRetentionPolicy(max_age=timedelta(days=30), pause=0),
+                                 clock=lambda: NOW)
+    await purger.purge_once()
+
+    async with session_factory() as db:
+        connection = await db.connection()
+        assert (await connection.exec_driver_sql("PRAGMA auto_vacuum")).scalar() == 2  # INCREMENTAL
+        assert (await connection.exec_driver_sql("PRAGMA freelist_count")).scalar() == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_session_history_deletes_in_chunks(session_factory):
+    await _seed(session_factory, "s1", 1200, age_days=0)
+    async with session_factory() as db:
+        assert await AsyncSQLChatRepository(db).delete_session_history("s1") == 1200
+    assert await _scalar(session_factory, select(func.count()).select_from(ChatMemoryModel)) == 0
+
+
+def test_policy_is_disabled_without_limits(monkeypatch):
+    monkeypatch.delenv("CHAT_RETENTION_MAX_AGE_DAYS", raising=False)
+    monkeypatch.delenv("CHAT_RETENTION_SESSION_IDLE_DAYS", raising=False)
+    assert ChatRetentionPurger.from_env(session_factory=None) is None
+    monkeypatch.setenv("CHAT_RETENTION_MAX_AGE_DAYS", "90")
+    assert ChatRetentionPurger.from_env(session_factory=None).policy.max_age == timedelta(days=90)
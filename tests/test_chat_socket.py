@@ -0,0 +1,135 @@
+import time
+import asyncio
+import pytest
+from datetime import datetime
+from starlette.applications import Starlette
+from starlette.routing import WebSocketRoute
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.api.chat_socket import CLOSE_IDLE_TIMEOUT, ChatSocketConnection, ChatSocketSettings
+
+
+class StubChatRepository:
+    def __init__(self):
+        self.warmed = []
+
+    async def get_recent_messages(self, session_id, limit=6):
+        self.warmed.append(session_id)
+        return [ChatMessage(id=1, session_id=session_id, role="user", message="hola de nuevo",
+                            timestamp=datetime(2025, 6, 1, 12, 0))]
+
+
+class StreamingChatService:
+    """Servicio falso que responde con eco, palabra por palabra."""
+
+    history_window = 6
+
+    def __init__(self, delay=0.0):
+        self.chat_repo = StubChatRepository()
+        self.delay = delay
+        self.requests = []
+
+    async def stream_user_message(self, request, recent=None):
+        self.requests.append(request)
+        self.recent = recent
+        await asyncio.sleep(self.delay)
+        for word in f"eco: {request.message}".split(" "):
+            yield word + " "
+
+
+def make_client(service, **settings):
+    turns = []
+
+    async def endpoint(websocket):
+        await websocket.accept()
+        async def after_turn():
+            turns.append(1)
+        await ChatSocketConnection(websocket, websocket.path_params["session_id"], service,
+                                   ChatSocketSettings(**settings), after_turn=after_turn).run()
+
+    app = Starlette(routes=[WebSocketRoute("/ws/chat/{session_id}", endpoint)])
+    return TestClient(app), turns
+
+
+def receive_until_done(ws, message_id):
+    tokens = []
+    while True:
+        frame = ws.receive_json()
+        if frame["type"] == "token":
+            tokens.append(frame["token"])
+        elif frame["type"] == "done" and frame["id"] == message_id:
+            return "".join(tokens)
+
+
+def test_socket_streams_tokens_and_keeps_session_warm():
+    service = StreamingChatService()
+    client, turns = make_client(service)
+
+    with client.websocket_connect("/ws/chat/s1") as ws:
+        assert ws.receive_json() == {
+            "type": "ready", "session_id": "s1",
+            "history": [{"session_id": "s1", "message": "hola de nuevo", "is_user": True,
+                         "timestamp": "2025-06-01T12:00:00"}],
+        }
+        ws.send_json({"id": "a", "message": "hola"})
+        assert receive_until_done(ws, "a").strip() == "eco: hola"
+        ws.send_json({"id": "b", "message": "¿tienen Nike?"})
+        assert receive_until_done(ws, "b").strip() == "eco: ¿tienen Nike?"
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+    assert service.chat_repo.warmed == ["s1"]
+    assert [m.message for m in service.recent] == ["hola de nuevo"]  # Los turnos reciben el contexto de la conexión
+    assert [r.session_id for r in service.requests] == ["s1", "s1"]
+    assert len(turns) == 3  # Calentamiento + un cierre por mensaje
+
+
+def test_socket_rejects_messages_over_pending_limit():
+    service = StreamingChatService(delay=0.2)
+    client, _ = make_client(service, max_pending=1, idle_timeout=5)
+
+    with client.websocket_connect("/ws/chat/s1") as ws:
+        ws.receive_json()
+        ws.send_json({"id": "a", "message": "hola"})
+        time.sleep(0.05)  # "a" ya está en proceso: "b" espera y "c" excede el límite
+        for message_id in ("b", "c"):
+            ws.send_json({"id": message_id, "message": "hola"})
+        frames = []
+        while not any(f["type"] == "done" and f["id"] == "b" for f in frames):
+            frames.append(ws.receive_json())
+
+    errors = [f for f in frames if f["type"] == "error"]
+    assert [(f["id"], f["status"]) for f in errors] == [("c", 429)]
+    assert [f["id"] for f in frames if f["type"] == "done"] == ["a", "b"]
+
+
+def test_socket_rejects_invalid_frames():
+    client, _ = make_client(StreamingChatService())
+
+    with client.websocket_connect("/ws/chat/s1") as ws:
+        ws.receive_json()
+        ws.send_text("no es json")
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"id": "x"})
+        assert ws.receive_json() == {"type": "error", "id": "x", "status": 400, "detail": "Falta el campo message"}
+        # Un frame binario no cierra la conexión
+        ws.send_bytes(b"\x00\x01")
+        assert ws.receive_json()["status"] == 400
+        ws.send_json({"id": "y", "message": "hola"})
+        assert receive_until_done(ws, "y").strip() == "eco: hola"
+
+
+def test_socket_pings_silent_clients_and_closes_after_idle_timeout():
+    client, _ = make_client(StreamingChatService(), heartbeat_interval=0.05, idle_timeout=0.3)
+
+    with client.websocket_connect("/ws/chat/s1") as ws:
+        ws.receive_json()
+        assert ws.receive_json() == {"type": "ping"}
+        ws.send_json({"type": "pong"})
+        assert ws.receive_json() == {"type": "ping"}
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                ws.receive_json()
+    assert closed.value.code == CLOSE_IDLE_TIMEOUT
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from src.domain.exceptions import LLMCapacityError
+from src.infrastructure.llm_providers.concurrency import ConcurrencyLimiter
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_in_flight_calls():
+    limiter = ConcurrencyLimiter(max_concurrency=2, queue_timeout=None)
+
+    async def call():
+        async with limiter.slot():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    stats = limiter.stats()
+    assert stats["peak_in_flight"] == 2
+    assert stats["completed"] == 6
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_after_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrency=1, queue_timeout=0.01)
+    release = asyncio.Event()
+
+    async def hold():
+        async with limiter.slot():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    assert limiter.saturation == 1.0
+
+    with pytest.raises(LLMCapacityError):
+        async with limiter.slot():
+            pass
+
+    release.set()
+    await holder
+    assert limiter.stats()["rejected"] == 1
@@ -0,0 +1,15 @@
+from sqlalchemy import create_engine, event, text
+
+from src.infrastructure.db.database import SQLITE_PRAGMAS, apply_sqlite_pragmas
+
+
+def test_sqlite_profile_is_applied_on_connect(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    event.listen(engine, "connect", lambda conn, _record: apply_sqlite_pragmas(conn))
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_PRAGMAS["busy_timeout"]
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == SQLITE_PRAGMAS["cache_size"]
+    engine.dispose()
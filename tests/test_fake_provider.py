@@ -0,0 +1,37 @@
+import pytest
+from src.domain.entities import ChatContext
+from src.infrastructure.llm_providers.fake_provider import FakeGenerativeModel
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+
+
+def test_from_env_reads_latency_and_token_rate(monkeypatch):
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "20")
+    monkeypatch.setenv("FAKE_LLM_TOKENS_PER_SEC", "50")
+    model = FakeGenerativeModel.from_env()
+    assert model.base_latency == pytest.approx(0.02)
+    assert model.chunk_delay == pytest.approx(0.02)
+
+
+@pytest.mark.asyncio
+async def test_gemini_service_with_injected_model_needs_no_api_key(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    model = FakeGenerativeModel(base_latency=0, per_token_latency=0, chunk_delay=0)
+    service = GeminiService(model=model)
+
+    response = await service.generate_response("Hola", [], ChatContext(messages=[]))
+    chunks = [c async for c in service.stream_response("Hola", [], ChatContext(messages=[]))]
+
+    assert response == FakeGenerativeModel.RESPONSE
+    assert "".join(chunks) == FakeGenerativeModel.RESPONSE
+    assert len(model.prompt_tokens) == 2
+    assert service.stats()["model"] == "FakeGenerativeModel"
+
+
+@pytest.mark.asyncio
+async def test_prompt_tokens_keep_only_the_last_window():
+    model = FakeGenerativeModel(base_latency=0, per_token_latency=0, chunk_delay=0, prompt_window=3)
+    for words in range(1, 6):
+        await model.generate_content_async("palabra " * words * 10)
+
+    assert len(model.prompt_tokens) == 3
+    assert list(model.prompt_tokens) == sorted(model.prompt_tokens)
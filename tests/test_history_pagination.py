@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+
+
+async def _seed(repo, count, session_id="s1"):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        # Pares de mensajes con el mismo timestamp: el desempate es por ID
+        await repo.save_message(ChatMessage(id=None, session_id=session_id, role="user",
+                                            message=f"m{i}", timestamp=start + timedelta(seconds=i // 2)))
+
+
+@pytest.mark.asyncio
+async def test_pages_walk_backwards_without_gaps_or_duplicates(db):
+    repo = AsyncSQLChatRepository(db)
+    await _seed(repo, 7)
+    await _seed(repo, 3, session_id="otra")
+
+    messages, cursor = await repo.get_session_history_page("s1", limit=3)
+    assert [m.message for m in messages] == ["m4", "m5", "m6"]
+
+    seen = [m.message for m in messages]
+    while cursor:
+        messages, cursor = await repo.get_session_history_page("s1", limit=3, before=cursor)
+        seen = [m.message for m in messages] + seen
+    assert seen == [f"m{i}" for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_after_cursor_returns_newer_messages(db):
+    repo = AsyncSQLChatRepository(db)
+    await _seed(repo, 5)
+    page, oldest_cursor = await repo.get_session_history_page("s1", limit=4)
+    assert [m.message for m in page] == ["m1", "m2", "m3", "m4"]
+
+    messages, cursor = await repo.get_session_history_page("s1", limit=2, after=oldest_cursor)
+    assert [m.message for m in messages] == ["m2", "m3"]
+    messages, cursor = await repo.get_session_history_page("s1", limit=2, after=cursor)
+    assert [m.message for m in messages] == ["m4"]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_raises_value_error(db):
+    repo = AsyncSQLChatRepository(db)
+    with pytest.raises(ValueError):
+        await repo.get_session_history_page("s1", limit=5, before="no-es-un-cursor")
+    with pytest.raises(ValueError):
+        await repo.get_session_history_page("s1", limit=5, before="a", after="b")
+
+
+@pytest.mark.asyncio
+async def test_page_query_uses_composite_index(db):
+    result = await db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM chat_memory WHERE session_id = 's1' "
+        "ORDER BY timestamp DESC, id DESC LIMIT 21"
+    ))
+    plan = " ".join(str(row[-1]) for row in result)
+    assert "ix_chat_memory_session_timestamp" in plan
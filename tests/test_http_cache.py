@@ -0,0 +1,59 @@
+from email.utils import formatdate
+
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.cache.http_cache import CatalogHTTPCache
+
+
+def test_etag_changes_with_catalog_version_and_variant():
+    catalog = CatalogCache()
+    cache = CatalogHTTPCache(catalog)
+
+    etag = cache.etag("product:1")
+    assert etag == cache.etag("product:1")
+    assert etag != cache.etag("product:2")
+    assert etag.startswith(f'"0-{int(catalog.modified_at):x}-')
+
+    catalog.invalidate()
+    assert cache.etag("product:1") != etag
+
+
+def test_etag_is_shared_by_processes_with_the_same_catalog_version():
+    worker_a, worker_b = CatalogCache(), CatalogCache()
+    worker_a.invalidate(7, 1_700_000_000.0)  # Escritura hecha en este worker
+    worker_b.sync(7, 1_700_000_000.0)  # Leída de catalog_version por el otro
+    etag = CatalogHTTPCache(worker_a).etag("product:1")
+
+    assert CatalogHTTPCache(worker_b).etag("product:1") == etag
+    # Una base recreada con la misma versión no valida ETags viejos
+    recreated = CatalogCache()
+    recreated.sync(7, 1_800_000_000.0)
+    assert CatalogHTTPCache(recreated).etag("product:1") != etag
+
+
+def test_if_none_match_returns_not_modified_only_for_current_etag():
+    catalog = CatalogCache()
+    cache = CatalogHTTPCache(catalog)
+    etag = cache.etag()
+
+    assert cache.not_modified({"if-none-match": etag}, etag)
+    assert cache.not_modified({"if-none-match": f'"otro", W/{etag}'}, etag)
+    assert cache.not_modified({"if-none-match": "*"}, etag)
+    assert not cache.not_modified({}, etag)
+
+    catalog.invalidate()
+    assert not cache.not_modified({"if-none-match": etag}, cache.etag())
+    assert cache.stats()["hits"] == 3
+
+
+def test_if_modified_since_is_used_without_if_none_match():
+    catalog = CatalogCache()
+    cache = CatalogHTTPCache(catalog, max_age=30)
+    etag = cache.etag()
+    headers = cache.headers(etag)
+    assert headers["Cache-Control"] == "public, max-age=30, must-revalidate"
+
+    assert cache.not_modified({"if-modified-since": headers["Last-Modified"]}, etag)
+    assert not cache.not_modified({"if-modified-since": formatdate(0, usegmt=True)}, etag)
+    assert not cache.not_modified({"if-modified-since": "no es una fecha"}, etag)
+    # If-None-Match tiene prioridad
+    assert not cache.not_modified({"if-none-match": '"otro"', "if-modified-since": headers["Last-Modified"]}, etag)
@@ -0,0 +1,144 @@
+import asyncio
+import pytest
+from src.domain.entities import ChatContext
+from src.domain.exceptions import LLMCapacityError, LLMProviderError
+from src.domain.llm_provider import ILLMProvider, FALLBACK_RESPONSE
+from src.infrastructure.llm_providers.gemini_service import GeminiService
+from src.infrastructure.llm_providers.provider_factory import create_llm_provider
+from src.infrastructure.llm_providers.router import HedgedLLMRouter
+
+
+class StubProvider(ILLMProvider):
+    """Proveedor local con latencia fija y error opcional."""
+
+    def __init__(self, name, latency, error=None):
+        self.model_name = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate_response(self, user_message, products, context, catalog_version=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return f"{self.model_name}: {user_message}"
+
+    async def stream_response(self, user_message, products, context, catalog_version=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.error:
+            raise self.error
+        for word in ["hola", " desde", f" {self.model_name}"]:
+            yield word
+
+    def stats(self):
+        return {"model": self.model_name}
+
+
+CONTEXT = ChatContext(messages=[])
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_does_not_hedge():
+    primary, backup = StubProvider("a", 0.01), StubProvider("b", 0.01)
+    router = HedgedLLMRouter([primary, backup], hedge_delay=0.1)
+
+    assert await router.generate_response("hola", [], CONTEXT) == "a: hola"
+    assert backup.calls == 0
+    assert router.stats()["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary, backup = StubProvider("lento", 1.0), StubProvider("rapido", 0.01)
+    router = HedgedLLMRouter([primary, backup], hedge_delay=0.02)
+
+    assert await router.generate_response("hola", [], CONTEXT) == "rapido: hola"
+    assert primary.cancelled == 1
+    stats = router.stats()
+    assert stats["hedges"] == 1
+    assert stats["providers"]["rapido"]["wins"] == 1
+    assert stats["providers"]["lento"]["cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_fails_over_without_waiting_for_hedge_delay():
+    primary = StubProvider("roto", 0, error=LLMProviderError("caído"))
+    router = HedgedLLMRouter([primary, StubProvider("b", 0)], hedge_delay=10)
+
+    assert await asyncio.wait_for(router.generate_response("hola", [], CONTEXT), timeout=1) == "b: hola"
+    assert router.stats()["providers"]["roto"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_all_failures_return_fallback_or_capacity_error():
+    broken = [StubProvider("a", 0, error=LLMProviderError()), StubProvider("b", 0, error=LLMProviderError())]
+    assert await HedgedLLMRouter(broken).generate_response("hola", [], CONTEXT) == FALLBACK_RESPONSE
+
+    saturated = [StubProvider("a", 0, error=LLMCapacityError()), StubProvider("b", 0, error=LLMCapacityError())]
+    with pytest.raises(LLMCapacityError):
+        await HedgedLLMRouter(saturated).generate_response("hola", [], CONTEXT)
+
+
+@pytest.mark.asyncio
+async def test_adaptive_delay_uses_observed_percentile():
+    router = HedgedLLMRouter([StubProvider("a", 0)], min_samples=3, initial_hedge_delay=5)
+    assert router._hedge_delay(0) == 5
+    for seconds in (0.1, 0.2, 0.3):
+        router.trackers[0].record(seconds)
+    assert router._hedge_delay(0) == pytest.approx(0.3)
+
+
+@pytest.mark.asyncio
+async def test_stream_is_hedged_on_first_chunk():
+    router = HedgedLLMRouter([StubProvider("lento", 1.0), StubProvider("rapido", 0.01)], hedge_delay=0.02)
+    chunks = [c async for c in router.stream_response("hola", [], CONTEXT)]
+    assert "".join(chunks) == "hola desde rapido"
+
+
+class GatedStreamProvider(StubProvider):
+    """Entrega el primer fragmento cuando `gate` se abre y registra si el stream se cerró."""
+
+    def __init__(self, name, gate, opens_gate=False):
+        super().__init__(name, 0)
+        self.gate = gate
+        self.opens_gate = opens_gate
+        self.closed = False
+
+    async def stream_response(self, user_message, products, context, catalog_version=None):
+        try:
+            if self.opens_gate:
+                self.gate.set()
+            await self.gate.wait()
+            yield f"{self.model_name} "
+            yield "fin"
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_stream_closes_losers_that_finish_in_the_same_round():
+    gate = asyncio.Event()
+    providers = [GatedStreamProvider("a", gate), GatedStreamProvider("b", gate, opens_gate=True)]
+    router = HedgedLLMRouter(providers, hedge_delay=0.01)
+
+    chunks = [c async for c in router.stream_response("hola", [], CONTEXT)]
+
+    assert chunks[-1] == "fin"
+    assert all(p.closed for p in providers)
+
+
+def test_hedge_without_fallback_models_uses_a_single_provider(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.setenv("LLM_HEDGE", "1")
+    monkeypatch.delenv("LLM_FALLBACK_MODELS", raising=False)
+    assert isinstance(create_llm_provider(), GeminiService)
+
+    monkeypatch.setenv("LLM_FALLBACK_MODELS", "respaldo")
+    assert isinstance(create_llm_provider(), HedgedLLMRouter)
@@ -0,0 +1,80 @@
+import io
+import json
+
+import pytest
+
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.importers.product_feed import ProductFeedImporter, detect_format, text_lines
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+CSV_FEED = """id,name,brand,category,size,color,price,stock,description
+1,Pegasus,Nike,Running,42,Negro,150,10,Ligeras
+,Ultraboost,Adidas,Running,43,Blanco,180,8,
+,Sin precio,Puma,Casual,41,Gris,,3,
+,Gratis,Puma,Casual,41,Gris,0,3,
+,Classic,Reebok,Casual,42,Blanco,90,12,Urbano
+"""
+
+
+@pytest.fixture
+def repo(sync_db):
+    return SQLProductRepository(sync_db)
+
+
+def test_csv_feed_is_imported_in_batches_and_invalid_rows_are_reported(repo):
+    progress = []
+    importer = ProductFeedImporter(batch_size=2, on_progress=lambda r: progress.append(r.imported))
+    version = catalog_cache.version
+
+    report = importer.run(io.StringIO(CSV_FEED), "csv", repo)
+
+    assert (report.read, report.imported, report.rejected, report.batches) == (5, 3, 2, 2)
+    assert progress == [2, 3]
+    assert report.errors[0].startswith("registro 3: Campos faltantes: price")
+    assert "registro 4" in report.errors[1]
+    assert sorted(p.name for p in repo.get_all()) == ["Classic", "Pegasus", "Ultraboost"]
+    assert catalog_cache.version > version
+
+
+def test_jsonl_feed_upserts_by_id(repo):
+    importer = ProductFeedImporter()
+    importer.run(io.StringIO(CSV_FEED), "csv", repo)
+
+    lines = [
+        json.dumps({"id": 1, "name": "Pegasus 41", "brand": "Nike", "category": "Running",
+                    "size": "42", "color": "Negro", "price": 140.0, "stock": 4}),
+        "{no es json",
+        "",
+        json.dumps({"id": 50, "name": "Nuevo", "brand": "Vans", "category": "Casual",
+                    "size": "40", "color": "Azul", "price": 85.0, "stock": 1, "description": "x"}),
+    ]
+    feed = text_lines(io.BytesIO("\n".join(lines).encode()))
+    report = importer.run(feed, "jsonl", repo)
+
+    assert (report.read, report.imported, report.rejected) == (3, 2, 1)
+    updated = repo.get_by_id(1)
+    assert (updated.name, updated.price, updated.stock, updated.description) == ("Pegasus 41", 140.0, 4, "")
+    assert repo.get_by_id(50).name == "Nuevo"
+    assert len(repo.get_all()) == 4
+
+
+def test_invalid_utf8_mid_feed_reports_what_was_imported(repo):
+    record = {"name": "Pegasus", "brand": "Nike", "category": "Running",
+              "size": "42", "color": "Negro", "price": 150.0, "stock": 4}
+    good = "".join(json.dumps(record) + "\n" for _ in range(300)).encode()
+    feed = text_lines(io.BytesIO(good + b'{"name": "\xff"}\n'))
+
+    report = ProductFeedImporter(batch_size=50).run(feed, "jsonl", repo)
+
+    assert "UTF-8" in report.aborted
+    assert 0 < report.imported <= 300
+    assert len(repo.get_all()) == report.imported
+    assert report.to_dict()["aborted"] == report.aborted
+
+def test_format_detection():
+    assert detect_format(content_type="text/csv; charset=utf-8") == "csv"
+    assert detect_format(content_type="application/x-ndjson") == "jsonl"
+    assert detect_format(name="catalogo.ndjson") == "jsonl"
+    with pytest.raises(ValueError):
+        detect_format(name="catalogo.xlsx")
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.domain.entities import Product
+from src.infrastructure.search.product_index import ProductIndex, tokenize
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+
+
+@pytest.fixture
+def catalog():
+    return [
+        Product(id=1, name="Nike Air Zoom Pegasus", brand="Nike", category="Running", size="42",
+                color="Negro", price=150.0, stock=10, description="Zapatillas ligeras para correr."),
+        Product(id=2, name="Timberland Boot", brand="Timberland", category="Formal", size="44",
+                color="Marrón", price=200.0, stock=5, description="Resistente y elegante."),
+        Product(id=3, name="Vans Old Skool", brand="Vans", category="Casual", size="41",
+                color="Azul", price=85.0, stock=14, description="Estilo skate clásico."),
+    ]
+
+
+def test_tokenize_removes_accents_and_stopwords():
+    assert tokenize("¿Qué zapatillas de Running tienen en marrón?") == ["zapatillas", "running", "marron"]
+
+
+def test_search_ranks_matching_products(catalog):
+    index = ProductIndex()
+    index.rebuild(catalog)
+    assert index.search("zapatillas running", k=2)[0] == 1
+    assert index.search("algo formal color marron", k=2)[0] == 2
+    assert index.search("hola", k=2) == []
+
+
+def test_index_updates_incrementally(catalog):
+    index = ProductIndex()
+    index.rebuild(catalog)
+
+    index.remove(3)
+    assert 3 not in index.search("vans skate")
+
+    index.upsert(Product(id=3, name="Vans Sk8-Hi", brand="Vans", category="Casual", size="41",
+                         color="Rojo", price=90.0, stock=3, description="Caña alta."))
+    assert index.search("vans rojo", k=1) == [3]
+    assert len(index) == 3
+
+
+@pytest.mark.asyncio
+async def test_chat_service_sends_only_top_k_products(catalog):
+    product_repo = Mock()
+    product_repo.get_all.return_value = catalog
+    chat_repo = Mock()
+    chat_repo.get_recent_messages.return_value = []
+    gemini = AsyncMock()
+    gemini.generate_response.return_value = "Te recomiendo las Timberland."
+
+    service = ChatService(product_repo, chat_repo, gemini, product_index=ProductIndex(), top_k=1)
+    await service.process_user_message(ChatMessageRequestDTO(session_id="s1", message="Busco botas Timberland"))
+
+    _, products, _ = gemini.generate_response.call_args.args
+    assert [p.id for p in products] == [2]
@@ -0,0 +1,77 @@
+import pytest
+
+from src.domain.entities import Product, ProductQuery
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+
+@pytest.fixture
+def repo(sync_db):
+    repo = SQLProductRepository(sync_db)
+    for i in range(10):
+        repo.save(Product(
+            id=None,
+            name=f"Zapato {i}",
+            brand="Nike" if i % 2 == 0 else "Adidas",
+            category="Running",
+            size="42",
+            color="Negro",
+            # Precios repetidos: el desempate del cursor es por ID
+            price=100.0 + (i // 3) * 10,
+            stock=0 if i == 4 else 5,
+            description="",
+        ))
+    return repo
+
+
+def _walk(repo, **kwargs):
+    items, cursor = [], None
+    while True:
+        page = repo.search(ProductQuery(cursor=cursor, **kwargs))
+        items += page.items
+        cursor = page.next_cursor
+        if not cursor:
+            return items
+
+
+def test_filters_are_combined(repo):
+    page = repo.search(ProductQuery(brand="Nike", min_price=105, max_price=120, in_stock=True))
+    assert [p["name"] for p in page.items] == ["Zapato 6", "Zapato 8"]
+    assert page.next_cursor is None
+
+
+def test_without_limit_returns_every_product(repo):
+    page = repo.search(ProductQuery(fields=["id"]))
+    assert [p["id"] for p in page.items] == list(range(1, 11))
+    assert page.next_cursor is None
+
+
+def test_keyset_pages_cover_results_once_in_order(repo):
+    items = _walk(repo, sort="-price", limit=3, fields=["id", "price"])
+    assert len(items) == 10
+    assert len({p["id"] for p in items}) == 10
+    keys = [(p["price"], p["id"]) for p in items]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_fields_projection_only_returns_requested_fields(repo):
+    page = repo.search(ProductQuery(sort="price", limit=2, fields=["name"]))
+    assert page.items == [{"name": "Zapato 0"}, {"name": "Zapato 1"}]
+    assert page.next_cursor
+
+
+def test_cursor_from_another_sort_is_rejected(repo):
+    cursor = repo.search(ProductQuery(sort="price", limit=2)).next_cursor
+    with pytest.raises(ValueError):
+        repo.search(ProductQuery(sort="name", cursor=cursor))
+    with pytest.raises(ValueError):
+        repo.search(ProductQuery(cursor="no-es-un-cursor"))
+
+
+def test_query_validation():
+    with pytest.raises(ValueError):
+        ProductQuery(sort="description")
+    with pytest.raises(ValueError):
+        ProductQuery(fields=["id", "secreto"])
+    with pytest.raises(ValueError):
+        ProductQuery(min_price=50, max_price=10)
@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from src.domain.entities import ChatMessage, ChatSummary
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.llm_providers.prompt_budget import PromptBudget, RollingSummarizer, estimate_tokens
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+from benchmarks.common import (
+    FakeGenerativeModel,
+    InMemoryChatRepository,
+    InMemoryChatSummaryRepository,
+    InMemoryProductRepository,
+    make_catalog,
+    make_gemini_service,
+)
+
+
+def _message(i, text="hola", role="user"):
+    return ChatMessage(id=i, session_id="s1", role=role, message=text,
+                       timestamp=datetime(2025, 1, 1) + timedelta(seconds=i))
+
+
+PRODUCTS = make_catalog(5)
+
+
+def test_fit_keeps_products_before_recent_turns_and_drops_oldest():
+    budget = PromptBudget(max_tokens=10_000, max_recent_messages=3)
+    messages = [_message(i) for i in range(5)]
+    fitted = budget.fit("hola", PRODUCTS, messages)
+    assert fitted.products == PRODUCTS
+    assert [m.id for m in fitted.recent] == [2, 3, 4]
+    assert [m.id for m in fitted.dropped] == [0, 1]
+
+    # Un turno largo no entra: se descarta junto con los anteriores
+    messages[3] = _message(3, text="x" * 40_000)
+    fitted = budget.fit("hola", PRODUCTS, messages)
+    assert [m.id for m in fitted.recent] == [4]
+    assert [m.id for m in fitted.dropped] == [0, 1, 2, 3]
+
+
+def test_tight_budget_limits_products():
+    budget = PromptBudget(max_tokens=PromptBudget()._fixed_tokens + 30)
+    fitted = budget.fit("hola", PRODUCTS, [_message(1)])
+    assert 0 < len(fitted.products) < len(PRODUCTS)
+    assert fitted.remaining_tokens < 30
+
+
+def test_summarizer_is_incremental_and_bounded():
+    summarizer = RollingSummarizer(max_tokens=40)
+    summary = ChatSummary(session_id="s1", text="")
+    summary = summarizer.fold(summary, [_message(1, "Busco Nike negras"), _message(2, "Tenemos dos. Más texto.", "assistant")])
+    assert summary.text == "- Cliente: Busco Nike negras\n- Asistente: Tenemos dos"
+
+    # Los mensajes ya resumidos se ignoran
+    assert summarizer.fold(summary, [_message(2, "Tenemos dos.", "assistant")]) is summary
+
+    for i in range(3, 30):
+        summary = summarizer.fold(summary, [_message(i, f"mensaje número {i}")])
+    assert estimate_tokens(summary.text) <= 40
+    assert summary.text.endswith("mensaje número 29")
+
+
+@pytest.mark.asyncio
+async def test_prompt_size_stays_flat_in_long_conversations():
+    model = FakeGenerativeModel(base_latency=0, per_token_latency=0, chunk_delay=0)
+    summaries = InMemoryChatSummaryRepository()
+    service = ChatService(
+        InMemoryProductRepository(make_catalog(50)),
+        InMemoryChatRepository(),
+        make_gemini_service(model),
+        CatalogCache(),
+        prompt_budget=PromptBudget(max_tokens=800),
+        summary_repo=summaries,
+    )
+    for turn in range(30):
+        await service.process_user_message(ChatMessageRequestDTO(
+            session_id="s1", message=f"Turno {turn}: busco zapatillas " + "muy cómodas " * 30))
+
+    assert max(model.prompt_tokens) <= 800
+    assert "- Cliente: Turno 2" in summaries.summaries["s1"].text
+
+    await service.delete_session_history("s1")
+    assert "s1" not in summaries.summaries
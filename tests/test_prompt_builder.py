@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.domain.entities import Product, ChatMessage, ChatContext
+from src.infrastructure.llm_providers.prompt_builder import PromptBuilder
+
+
+def _product(product_id, stock=10):
+    return Product(id=product_id, name=f"Pegasus {product_id}", brand="Nike", category="Running",
+                   size="42", color="Negro", price=150.0, stock=stock, description="Ligeras")
+
+
+def test_prompt_contains_every_section():
+    context = ChatContext(messages=[
+        ChatMessage(id=1, session_id="s", role="user", message="Hola", timestamp=datetime.utcnow()),
+    ])
+    prompt = PromptBuilder().build("¿Tienen Nike?", [_product(1)], context, catalog_version=1)
+
+    assert "PRODUCTOS DISPONIBLES:\n- Pegasus 1 | Nike | $150.00 | Talla: 42 | Stock: 10\n\nINSTRUCCIONES:" in prompt
+    assert "HISTORIAL DE CONVERSACIÓN:\nuser: Hola\n\nUsuario: ¿Tienen Nike?\n\nAsistente:\n" in prompt
+
+
+def test_product_block_is_cached_per_catalog_version():
+    builder = PromptBuilder()
+    products = [_product(1), _product(2)]
+
+    first = builder.render_products(products, catalog_version=1)
+    assert builder.render_products(list(products), catalog_version=1) is first
+
+    # Con una versión nueva el bloque se vuelve a formatear
+    updated = builder.render_products([_product(1, stock=3), _product(2)], catalog_version=2)
+    assert "Stock: 3" in updated
+
+
+def test_empty_catalog_message():
+    assert PromptBuilder().render_products([], catalog_version=1) == "No hay productos disponibles en este momento."
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.domain.entities import Product
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.cache.response_cache import ResponseCache, normalize_message
+from src.infrastructure.llm_providers.gemini_service import FALLBACK_RESPONSE
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+PRODUCTS = [Product(id=1, name="Pegasus", brand="Nike", category="Running", size="42",
+                    color="Negro", price=150.0, stock=10, description="Ligeras")]
+
+
+def test_normalize_message():
+    assert normalize_message("¿Qué zapatillas de  Running tienen?") == "que zapatillas de running tienen"
+
+
+def test_similar_messages_share_key_but_catalog_version_does_not():
+    cache = ResponseCache()
+    key = cache.make_key("¿Qué zapatillas tienen?", PRODUCTS, [], catalog_version=1)
+    assert cache.make_key("que zapatillas tienen", PRODUCTS, [], catalog_version=1) == key
+    assert cache.make_key("que zapatillas tienen", PRODUCTS, [], catalog_version=2) != key
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")  # expulsa "b", la menos usada
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_exclusion_rules():
+    cache = ResponseCache(max_message_length=20, exclude_patterns=[r"\bpedido\b"])
+    assert cache.make_key("¿Dónde está mi pedido?", PRODUCTS, [], 1) is None
+    assert cache.make_key("x" * 21, PRODUCTS, [], 1) is None
+    assert cache.stats()["excluded"] == 2
+
+
+@pytest.fixture
+def repos():
+    product_repo = Mock()
+    product_repo.get_all.return_value = PRODUCTS
+    chat_repo = Mock()
+    chat_repo.get_recent_messages.return_value = []
+    return product_repo, chat_repo
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_llm_but_persists_messages(repos):
+    product_repo, chat_repo = repos
+    gemini = AsyncMock()
+    gemini.generate_response.return_value = "Tenemos las Pegasus."
+    service = ChatService(product_repo, chat_repo, gemini, CatalogCache(), response_cache=ResponseCache())
+
+    await service.process_user_message(ChatMessageRequestDTO(session_id="s1", message="¿Qué zapatillas tienen?"))
+    result = await service.process_user_message(ChatMessageRequestDTO(session_id="s2", message="que zapatillas tienen"))
+
+    assert result.response == "Tenemos las Pegasus."
+    assert gemini.generate_response.await_count == 1
+    assert chat_repo.save_message.call_count == 4
+
+
+@pytest.mark.asyncio
+async def test_fallback_responses_are_not_cached(repos):
+    product_repo, chat_repo = repos
+    gemini = AsyncMock()
+    gemini.generate_response.return_value = FALLBACK_RESPONSE
+    cache = ResponseCache()
+    service = ChatService(product_repo, chat_repo, gemini, CatalogCache(), response_cache=cache)
+
+    for _ in range(2):
+        await service.process_user_message(ChatMessageRequestDTO(session_id="s1", message="Hola"))
+
+    assert gemini.generate_response.await_count == 2
+    assert cache.stats()["size"] == 0
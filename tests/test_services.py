@@ -67,3 +67,77 @@ async def test_process_user_message_error(mock_product_repo, mock_chat_repo, moc
     dto = ChatMessageRequestDTO(session_id="test2", message="Hola")
     with pytest.raises(Exception):
         await service.process_user_message(dto)
+
+
+# -------------------------------
+# ChatService (streaming)
+# -------------------------------
+class StreamingStub:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def stream_response(self, user_message, products, context, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.asyncio
+async def test_stream_user_message_persists_full_response(mock_product_repo, mock_chat_repo):
+    service = ChatService(mock_product_repo, mock_chat_repo, StreamingStub(["Te ", "recomiendo ", "la camisa."]))
+    dto = ChatMessageRequestDTO(session_id="s1", message="¿Qué me recomiendas?")
+
+    chunks = [chunk async for chunk in service.stream_user_message(dto)]
+
+    assert "".join(chunks) == "Te recomiendo la camisa."
+    saved = mock_chat_repo.save_message.call_args.args[0]
+    assert saved.role == "assistant"
+    assert saved.message == "Te recomiendo la camisa."
+
+
+@pytest.mark.asyncio
+async def test_stream_user_message_reuses_caller_context(mock_product_repo, mock_chat_repo):
+    contexts = []
+
+    class RecordingStub(StreamingStub):
+        async def stream_response(self, user_message, products, context, **kwargs):
+            contexts.append([m.message for m in context.messages])
+            async for chunk in super().stream_response(user_message, products, context):
+                yield chunk
+
+    mock_chat_repo.save_message.side_effect = lambda message: message
+    service = ChatService(mock_product_repo, mock_chat_repo, RecordingStub(["Claro."]))
+    recent = [ChatMessage(id=1, session_id="s1", role="user", message="Hola", timestamp=datetime(2025, 1, 1))]
+
+    for text in ("¿Tienen Nike?", "¿Y en rojo?"):
+        _ = [chunk async for chunk in service.stream_user_message(
+            ChatMessageRequestDTO(session_id="s1", message=text), recent=recent)]
+
+    mock_chat_repo.get_recent_messages.assert_not_called()
+    assert contexts[1] == ["Hola", "¿Tienen Nike?", "Claro.", "¿Y en rojo?"]
+    assert [m.message for m in recent] == ["Hola", "¿Tienen Nike?", "Claro.", "¿Y en rojo?", "Claro."]
+
+@pytest.mark.asyncio
+async def test_stream_user_message_persists_partial_response_on_disconnect(mock_product_repo, mock_chat_repo):
+    service = ChatService(mock_product_repo, mock_chat_repo, StreamingStub(["Te ", "recomiendo ", "la camisa."]))
+    stream = service.stream_user_message(ChatMessageRequestDTO(session_id="s1", message="Hola"))
+
+    assert await stream.__anext__() == "Te "
+    await stream.aclose()  # El cliente se desconecta
+
+    saved = mock_chat_repo.save_message.call_args.args[0]
+    assert saved.message == "Te"
+
+
+@pytest.mark.asyncio
+async def test_history_payload_matches_dto_json(mock_product_repo, mock_chat_repo, mock_gemini_service):
+    import orjson
+
+    mock_chat_repo.get_session_history.return_value = [
+        ChatMessage(id=1, session_id="s1", role="user", message="Hola", timestamp=datetime(2025, 1, 1, 12, 0, 0, 123456)),
+        ChatMessage(id=2, session_id="s1", role="assistant", message="¡Hola!", timestamp=datetime(2025, 1, 1, 12, 0, 1)),
+    ]
+    service = ChatService(mock_product_repo, mock_chat_repo, mock_gemini_service)
+
+    fast = orjson.loads(orjson.dumps(await service.get_session_history_payload("s1")))
+    validated = [dto.model_dump(mode="json") for dto in await service.get_session_history("s1")]
+    assert fast == validated
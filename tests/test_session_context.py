@@ -0,0 +1,94 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.cache.session_context import SessionContextStore, MESSAGE_OVERHEAD_BYTES
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.infrastructure.repositories.session_context_repository import SessionContextChatRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _message(i, session_id="s1", text=None):
+    return ChatMessage(id=None, session_id=session_id, role="user", message=text or f"m{i}",
+                       timestamp=datetime(2025, 1, 1) + timedelta(seconds=i))
+
+
+def _hydrate(store, session_id, messages):
+    return store.hydrate(session_id, messages, store.begin_hydration(session_id))
+
+
+def test_ring_buffer_keeps_last_messages():
+    store = SessionContextStore(max_messages=3)
+    _hydrate(store, "s1", [_message(i) for i in range(5)])
+    store.append(_message(5))
+
+    assert [m.message for m in store.get("s1", 3)] == ["m3", "m4", "m5"]
+    assert [m.message for m in store.get("s1", 2)] == ["m4", "m5"]
+    assert store.get("s1", 10) is None  # Más de lo que guarda el buffer: se lee de la base
+
+
+def test_lru_idle_and_memory_eviction():
+    clock = FakeClock()
+    store = SessionContextStore(max_sessions=2, idle_ttl=60, clock=clock)
+    _hydrate(store, "a", [_message(1, "a")])
+    _hydrate(store, "b", [_message(1, "b")])
+    store.get("a", 1)
+    _hydrate(store, "c", [_message(1, "c")])  # Expulsa "b", la menos usada
+    assert store.get("b", 1) is None
+    assert store.get("a", 1) is not None
+
+    clock.now = 61
+    assert store.get("a", 1) is None
+
+    small = SessionContextStore(max_bytes=2 * (MESSAGE_OVERHEAD_BYTES + 2))
+    for session_id in ("x", "y", "z"):
+        _hydrate(small, session_id, [_message(1, session_id)])
+    assert small.stats()["sessions"] == 2
+    assert small.get("x", 1) is None
+
+
+def test_write_during_hydration_discards_stale_load():
+    store = SessionContextStore()
+    token = store.begin_hydration("s1")
+    store.append(_message(2))  # Llega una escritura mientras se consultaba la base
+    assert store.hydrate("s1", [_message(1)], token) is False
+    assert store.get("s1", 1) is None
+
+
+@pytest.mark.asyncio
+async def test_repository_reads_db_once_per_session(db):
+    inner = AsyncSQLChatRepository(db)
+    await inner.save_message(_message(0))
+    spy = AsyncMock(wraps=inner)
+    repo = SessionContextChatRepository(spy, SessionContextStore())
+
+    assert [m.message for m in await repo.get_recent_messages("s1")] == ["m0"]
+    for i in range(1, 4):
+        await repo.save_message(_message(i))
+        recent = await repo.get_recent_messages("s1", limit=2)
+    assert [m.message for m in recent] == ["m2", "m3"]
+    assert spy.get_recent_messages.await_count == 1
+
+    await repo.delete_session_history("s1")
+    assert await repo.get_recent_messages("s1") == []
+
+
+@pytest.mark.asyncio
+async def test_session_history_is_read_from_db(db):
+    inner = AsyncSQLChatRepository(db)
+    repo = SessionContextChatRepository(inner, SessionContextStore())
+    await repo.save_message(_message(0))
+    await repo.get_recent_messages("s1")
+    # Otro proceso escribe en la misma sesión sin pasar por este buffer
+    await inner.save_message(_message(1))
+
+    assert [m.message for m in await repo.get_session_history("s1")] == ["m0", "m1"]
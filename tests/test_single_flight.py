@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from unittest.mock import Mock
+from src.domain.entities import Product
+from src.infrastructure.cache.catalog_cache import CatalogCache
+from src.infrastructure.cache.single_flight import SingleFlight
+from src.application.chat_service import ChatService
+from src.application.dtos import ChatMessageRequestDTO
+
+
+class SlowCall:
+    def __init__(self, result="ok", error=None, delay=0.05):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_keys_share_one_call():
+    flight, call = SingleFlight(), SlowCall()
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(5)))
+
+    assert results == ["ok"] * 5
+    assert call.calls == 1
+    assert flight.stats() == {"in_flight": 0, "upstream_calls": 1, "coalesced": 4, "coalesced_ratio": 0.8}
+
+    await flight.do("k", call)  # Terminada la llamada, la clave se libera
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_none_key_is_not_coalesced():
+    flight, failing = SingleFlight(), SlowCall(error=RuntimeError("caído"))
+    results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert failing.calls == 1
+
+    call = SlowCall()
+    await asyncio.gather(flight.do(None, call), flight.do(None, call))
+    assert call.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    flight, call = SingleFlight(), SlowCall(delay=0.1)
+    first = asyncio.ensure_future(flight.do("k", call))
+    second = asyncio.ensure_future(flight.do("k", call))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "ok"
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_chat_service_coalesces_identical_prompts():
+    product_repo = Mock()
+    product_repo.get_all.return_value = [Product(id=1, name="Pegasus", brand="Nike", category="Running",
+                                                 size="42", color="Negro", price=150.0, stock=10,
+                                                 description="Ligeras")]
+    chat_repo = Mock()
+    chat_repo.get_recent_messages.return_value = []
+    gemini = Mock()
+    calls = []
+
+    async def generate_response(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(0.05)
+        return "Tenemos las Pegasus."
+
+    gemini.generate_response = generate_response
+    flight = SingleFlight()
+    service = ChatService(product_repo, chat_repo, gemini, CatalogCache(), single_flight=flight)
+
+    requests = [ChatMessageRequestDTO(session_id=f"s{i}", message="¿Tienen Pegasus?") for i in range(4)]
+    results = await asyncio.gather(*(service.process_user_message(r) for r in requests))
+
+    assert {r.response for r in results} == {"Tenemos las Pegasus."}
+    assert len(calls) == 1
+    assert chat_repo.save_message.call_count == 8
+    assert flight.stats()["coalesced"] == 3
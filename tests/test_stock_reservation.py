@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from src.domain.entities import Product, StockAdjustment
+from src.infrastructure.cache.catalog_cache import catalog_cache
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.repositories.product_repository import SQLProductRepository
+
+
+@pytest.fixture
+def session_factory(sync_session_factory):
+    with sync_session_factory() as db:
+        repo = SQLProductRepository(db)
+        for name, stock in [("Pegasus", 5), ("Ultraboost", 1)]:
+            repo.save(Product(id=None, name=name, brand="Nike", category="Running", size="42",
+                              color="Negro", price=100.0, stock=stock, description=""))
+    return sync_session_factory
+
+
+def _stock(Session, product_id):
+    with Session() as db:
+        return SQLProductRepository(db).get_by_id(product_id).stock
+
+
+def test_reservations_are_applied_in_one_transaction(session_factory):
+    with session_factory() as db:
+        results = SQLProductRepository(db).adjust_stock([StockAdjustment(1, 2), StockAdjustment(2, 1)])
+    assert [(r.status, r.stock) for r in results] == [("reserved", 3), ("reserved", 0)]
+    assert _stock(session_factory, 1) == 3
+
+
+def test_all_or_nothing_rolls_back_when_one_item_fails(session_factory):
+    with session_factory() as db:
+        results = SQLProductRepository(db).adjust_stock(
+            [StockAdjustment(1, 2), StockAdjustment(2, 5), StockAdjustment(99, 1)]
+        )
+    assert [r.status for r in results] == ["not_applied", "insufficient_stock", "not_applied"]
+    assert results[0].stock == 5 and results[1].stock == 1
+    assert _stock(session_factory, 1) == 5
+
+
+def test_rollback_reports_real_stock_for_repeated_products(session_factory):
+    with session_factory() as db:
+        results = SQLProductRepository(db).adjust_stock(
+            [StockAdjustment(1, 2), StockAdjustment(1, 2), StockAdjustment(2, 5)]
+        )
+    assert [(r.status, r.stock) for r in results] == [
+        ("not_applied", 5), ("not_applied", 5), ("insufficient_stock", 1)
+    ]
+    assert _stock(session_factory, 1) == 5
+
+
+def test_catalog_version_changes_only_when_availability_does(session_factory):
+    version = catalog_cache.version
+    with session_factory() as db:
+        SQLProductRepository(db).adjust_stock([StockAdjustment(1, 2)])
+    assert catalog_cache.version == version  # 5 -> 3: sigue disponible
+
+    with session_factory() as db:
+        SQLProductRepository(db).adjust_stock([StockAdjustment(2, 1)])
+    assert catalog_cache.version == version + 1  # 1 -> 0: agotado
+
+    with session_factory() as db:
+        SQLProductRepository(db).adjust_stock([StockAdjustment(2, -2)])
+    assert catalog_cache.version == version + 2  # 0 -> 2: vuelve a estar disponible
+
+def test_partial_mode_reports_each_item(session_factory):
+    with session_factory() as db:
+        results = SQLProductRepository(db).adjust_stock(
+            [StockAdjustment(99, 1), StockAdjustment(2, 5), StockAdjustment(1, -3)], all_or_nothing=False
+        )
+    assert [(r.status, r.stock) for r in results] == [("not_found", None), ("insufficient_stock", 1), ("released", 8)]
+
+
+def test_concurrent_reservations_never_oversell(session_factory):
+    outcomes = []
+
+    def checkout():
+        with session_factory() as db:
+            outcomes.append(SQLProductRepository(db).adjust_stock([StockAdjustment(1, 1)])[0].status)
+
+    threads = [threading.Thread(target=checkout) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count("reserved") == 5
+    assert _stock(session_factory, 1) == 0
+
+
+def test_zero_quantity_is_rejected():
+    with pytest.raises(ValueError):
+        StockAdjustment(1, 0)
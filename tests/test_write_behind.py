@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from src.domain.entities import ChatMessage
+from src.infrastructure.db import models  # noqa: F401  (registra las tablas)
+from src.infrastructure.repositories.async_chat_repository import AsyncSQLChatRepository
+from src.infrastructure.repositories.write_behind import ChatWriteBehindQueue, WriteBehindChatRepository
+
+
+def _message(i, session_id="s1"):
+    return ChatMessage(id=None, session_id=session_id, role="user" if i % 2 == 0 else "assistant",
+                       message=f"m{i}", timestamp=datetime(2025, 1, 1) + timedelta(seconds=i))
+
+
+@pytest.mark.asyncio
+async def test_reads_see_queued_messages_before_flush(session_factory):
+    queue = ChatWriteBehindQueue(session_factory, max_batch=100, flush_interval=60)
+    async with session_factory() as db:
+        repo = WriteBehindChatRepository(AsyncSQLChatRepository(db), queue)
+        for i in range(3):
+            await repo.save_message(_message(i))
+
+        assert [m.message for m in await repo.get_recent_messages("s1", limit=2)] == ["m1", "m2"]
+        assert await AsyncSQLChatRepository(db).get_session_history("s1") == []
+
+        await queue.flush()
+        assert [m.message for m in await repo.get_session_history("s1")] == ["m0", "m1", "m2"]
+        assert queue.stats()["batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_background_flush_batches_and_close_drains(session_factory):
+    queue = ChatWriteBehindQueue(session_factory, max_batch=4, flush_interval=60)
+    queue.start()
+    for i in range(10):
+        queue.enqueue(_message(i, session_id=f"s{i % 3}"))
+    await asyncio.sleep(0.05)  # Al llenarse un lote se vacía sin esperar el intervalo
+    assert queue.stats()["flushed"] == 10
+    assert queue.stats()["batches"] == 3
+
+    queue.enqueue(_message(10))
+    await queue.close()
+    stats = queue.stats()
+    assert stats["flushed"] == 11
+    assert stats["pending"] == 0
+    assert queue.pending_for("s1") == []
+
+
+@pytest.mark.asyncio
+async def test_full_queue_falls_back_to_direct_writes(session_factory):
+    @asynccontextmanager
+    async def broken_db():
+        raise RuntimeError("database is locked")
+        yield
+
+    queue = ChatWriteBehindQueue(broken_db, max_batch=2, flush_interval=60, max_pending=3)
+    async with session_factory() as db:
+        repo = WriteBehindChatRepository(AsyncSQLChatRepository(db), queue)
+        for i in range(3):
+            await repo.save_message(_message(i))
+        assert await queue.flush() == 0  # El lote fallido vuelve a la cola, sin crecer
+
+        direct = await repo.save_message(_message(3))
+
+    assert direct.id is not None
+    assert queue.stats()["pending"] == 3 and queue.stats()["overflows"] == 1
+    assert [m.message for m in queue.pending_for("s1")] == ["m0", "m1", "m2"]
+
+
+@pytest.mark.asyncio
+async def test_close_retries_then_counts_dropped_messages(session_factory):
+    calls = {"n": 0}
+
+    @asynccontextmanager
+    async def flaky_db():
+        calls["n"] += 1
+        if calls["n"] <= 2:
+            raise RuntimeError("database is locked")
+        async with session_factory() as db:
+            yield db
+
+    queue = ChatWriteBehindQueue(flaky_db, max_batch=10, flush_interval=60, retry_delay=0)
+    for i in range(3):
+        queue.enqueue(_message(i))
+    await queue.close()  # Dos vaciados fallidos y el tercero guarda todo
+
+    async with session_factory() as db:
+        assert len(await AsyncSQLChatRepository(db).get_session_history("s1")) == 3
+    assert queue.stats()["dropped"] == 0
+
+    @asynccontextmanager
+    async def broken_db():
+        raise RuntimeError("disk I/O error")
+        yield
+
+    queue = ChatWriteBehindQueue(broken_db, max_batch=10, flush_interval=60, retry_delay=0)
+    for i in range(3):
+        queue.enqueue(_message(i))
+    await queue.close()
+    stats = queue.stats()
+    assert stats["dropped"] == 3 and stats["pending"] == 0
+    assert queue.pending_for("s1") == []